@@ -0,0 +1,98 @@
+"""
+Measure the CPU and byte cost of compressing an ad list response.
+
+Builds a JSON body shaped like /api/ads/ (ads with embedded images and
+owner_info) and reports, for each coding and level, the compressed size,
+the ratio and the time to compress it, as the middleware would.
+
+Usage:
+    python -m benchmarks.compression --ads 50 --rounds 50
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from shum.core.compression import COMPRESSORS
+from shum.core.compression import compress
+
+LEVELS = {
+    "gzip": [1, 4, 6, 9],
+    "br": [1, 4, 5, 8, 11],
+    "zstd": [1, 3, 6, 12],
+}
+
+
+def build_payload(ads):
+    """An ad list body with the fields and nesting of AdSerializer."""
+    return json.dumps(
+        [
+            {
+                "id": number,
+                "title": f"Bicycle for sale, good condition #{number}",
+                "description": (
+                    f"Road bike, {number % 7 + 2} years old, serviced last spring. "
+                    "Pickup only, price is negotiable for quick sale."
+                ),
+                "price": f"{100 + number * 3}.00",
+                "is_active": True,
+                "is_sold": False,
+                "created_at": f"2025-07-{number % 28 + 1:02d}T10:{number % 60:02d}:00Z",
+                "updated_at": f"2025-07-{number % 28 + 1:02d}T11:{number % 60:02d}:00Z",
+                "owner_info": {
+                    "id": number % 13,
+                    "email": f"seller{number % 13}@example.com",
+                    "first_name": "Seller",
+                    "last_name": f"Number {number % 13}",
+                },
+                "images": [
+                    {
+                        "id": number * 10 + position,
+                        "image": (
+                            "https://shum-media.s3.amazonaws.com/ads/images/"
+                            f"{number:06d}-{position}.jpg"
+                        ),
+                        "uploaded_at": f"2025-07-{number % 28 + 1:02d}T10:00:00Z",
+                    }
+                    for position in range(number % 4 + 1)
+                ],
+            }
+            for number in range(ads)
+        ],
+    ).encode()
+
+
+def measure(payload, coding, level, rounds):
+    """Return the compressed size and the best seconds per compression."""
+    timings = []
+    for _round in range(rounds):
+        started = time.perf_counter()
+        size = len(compress(payload, coding, level))
+        timings.append(time.perf_counter() - started)
+    return size, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--ads", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    payload = build_payload(args.ads)
+    sys.stdout.write(f"{args.ads} ads, {len(payload)} bytes uncompressed\n\n")
+    sys.stdout.write("coding  level     bytes  ratio      us    MB/s\n")
+    for coding, levels in LEVELS.items():
+        if coding not in COMPRESSORS:
+            sys.stdout.write(f"{coding:<6}  not installed\n")
+            continue
+        for level in levels:
+            size, seconds = measure(payload, coding, level, args.rounds)
+            sys.stdout.write(
+                f"{coding:<6}  {level:>5}  {size:>8}  {len(payload) / size:>5.1f}  "
+                f"{seconds * 1_000_000:>6.0f}  {len(payload) / seconds / 1e6:>6.0f}\n",
+            )
+
+
+if __name__ == "__main__":
+    main()
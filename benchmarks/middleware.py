@@ -0,0 +1,93 @@
+"""
+Measure the middleware cost of an API request with and without WebOnlyMiddleware.
+
+Runs a trivial DRF view through Django's request handler, once with the
+configured MIDDLEWARE (web-only middleware skipped for the API) and once with
+WEB_ONLY_MIDDLEWARE inlined as a flat chain, and reports the time per request.
+
+Usage:
+    DATABASE_URL=postgres://... python -m benchmarks.middleware --requests 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.base import BaseHandler  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from django.urls import path  # noqa: E402
+from rest_framework.permissions import AllowAny  # noqa: E402
+from rest_framework.response import Response  # noqa: E402
+from rest_framework.views import APIView  # noqa: E402
+
+WEB_ONLY = "shum.core.middleware.WebOnlyMiddleware"
+
+
+class PingView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response({"ok": True})
+
+
+urlpatterns = [path("api/ping/", PingView.as_view())]
+
+
+def flat_middleware():
+    """The configured chain with the web-only middleware always running."""
+    middleware = []
+    for name in settings.MIDDLEWARE:
+        middleware += settings.WEB_ONLY_MIDDLEWARE if name == WEB_ONLY else [name]
+    return middleware
+
+
+def measure(middleware, requests):
+    """Return seconds per request through a handler with middleware."""
+    with override_settings(
+        MIDDLEWARE=middleware,
+        ROOT_URLCONF=__name__,
+        ALLOWED_HOSTS=["testserver"],
+    ):
+        handler = BaseHandler()
+        handler.load_middleware()
+        factory = RequestFactory()
+        # Build requests up front, only the handler is timed
+        batch = [factory.get("/api/ping/") for _ in range(requests)]
+        started = time.perf_counter()
+        for request in batch:
+            handler.get_response(request)
+        return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    variants = {"flat": flat_middleware(), "web-only": list(settings.MIDDLEWARE)}
+    results: dict[str, list[float]] = {name: [] for name in variants}
+    for _round in range(args.rounds):
+        for name, middleware in variants.items():
+            results[name].append(measure(middleware, args.requests))
+
+    best = {name: min(timings) * 1_000_000 for name, timings in results.items()}
+    for name, microseconds in best.items():
+        sys.stdout.write(f"{name:>9}: {microseconds:8.1f} us/request\n")
+    saved = best["flat"] - best["web-only"]
+    sys.stdout.write(
+        f"{'saved':>9}: {saved:8.1f} us/request ({saved / best['flat']:.0%})\n",
+    )
+
+
+if __name__ == "__main__":
+    main()
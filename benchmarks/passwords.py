@@ -0,0 +1,68 @@
+"""
+Measure the password hashing cost of one login.
+
+Verifies a password with the configured Argon2 costs, or the ones given on
+the command line, and reports wall time and CPU time per login, alone and
+with --concurrency logins at once.
+
+Usage:
+    python -m benchmarks.passwords --concurrency 4
+    python -m benchmarks.passwords --time-cost 3 --memory-cost 65536
+"""
+
+import argparse
+import os
+import sys
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.hashers import Argon2PasswordHasher  # noqa: E402
+
+from shum.users.hashers import time_hashes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--time-cost", type=int, default=settings.ARGON2_TIME_COST)
+    parser.add_argument(
+        "--memory-cost",
+        type=int,
+        default=settings.ARGON2_MEMORY_COST,
+    )
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=settings.ARGON2_PARALLELISM,
+    )
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    # The hashing itself, without the pool's concurrency limit
+    hasher = Argon2PasswordHasher()
+    hasher.time_cost = args.time_cost
+    hasher.memory_cost = args.memory_cost
+    hasher.parallelism = args.parallelism
+
+    sys.stdout.write(
+        f"argon2 t={args.time_cost} m={args.memory_cost} KiB p={args.parallelism}\n",
+    )
+    sys.stdout.write("concurrency  median ms  p95 ms  CPU ms/login\n")
+    for concurrency in sorted({1, args.concurrency}):
+        median, p95, cpu = time_hashes(
+            hasher,
+            concurrency=concurrency,
+            rounds=args.rounds,
+        )
+        sys.stdout.write(
+            f"{concurrency:>11}  {median * 1000:>9.1f}  {p95 * 1000:>6.1f}  "
+            f"{cpu * 1000:>12.1f}\n",
+        )
+
+
+if __name__ == "__main__":
+    main()
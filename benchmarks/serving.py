@@ -0,0 +1,203 @@
+"""
+Compare WSGI and ASGI serving of the hot read endpoints.
+
+Starts gunicorn with sync workers (config.wsgi) and with uvicorn workers
+(config.asgi, async views enabled), then raises the number of concurrent
+keep-alive clients until the p95 latency exceeds the target. The highest
+concurrency that stays within the target is reported for each interface.
+
+Usage:
+    python -m benchmarks.serving --settings config.settings.local \\
+        --path /api/ads/ --latency-ms 100 --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+
+SERVERS = {
+    "wsgi": ["config.wsgi"],
+    "asgi": ["config.asgi", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+
+
+def start_server(interface, args):
+    """Start gunicorn for interface and wait until it accepts connections."""
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": args.settings,
+        "DJANGO_ASYNC_API_VIEWS": str(interface == "asgi"),
+    }
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        *SERVERS[interface],
+        "--bind",
+        f"{args.host}:{args.port}",
+        "--workers",
+        str(args.workers),
+        "--log-level",
+        "warning",
+    ]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)  # noqa: S603
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and process.poll() is None:
+        try:
+            asyncio.run(request_once(args.host, args.port, args.path))
+        except OSError:
+            time.sleep(0.2)
+        else:
+            return process
+    process.terminate()
+    error_message = f"{interface} server did not start"
+    raise RuntimeError(error_message)
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, return its status and whether to reconnect."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readline()).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    return int(status_line.split()[1]), headers.get("connection") == "close"
+
+
+def build_request(host, path):
+    return f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n"
+
+
+async def request_once(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(build_request(host, path).encode())
+        await writer.drain()
+        return (await read_response(reader))[0]
+    finally:
+        writer.close()
+
+
+async def client(args, stop_at, latencies, errors):
+    """
+    Send requests until stop_at, keeping the connection alive when allowed.
+
+    Sync gunicorn workers close the connection after each response, so the
+    reconnect is part of the measured latency, as it is for real clients.
+    """
+    request = build_request(args.host, args.path).encode()
+    writer = None
+    try:
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection(args.host, args.port)
+            writer.write(request)
+            await writer.drain()
+            status, closed = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:  # noqa: PLR2004
+                errors.append(status)
+            if closed:
+                writer.close()
+                writer = None
+    except (OSError, asyncio.IncompleteReadError):
+        errors.append(None)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_level(args, concurrency):
+    """Run concurrency clients for args.duration seconds."""
+    latencies: list[float] = []
+    errors: list[int | None] = []
+    stop_at = time.monotonic() + args.duration
+    await asyncio.gather(
+        *(client(args, stop_at, latencies, errors) for _ in range(concurrency)),
+    )
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    if len(values) < 2:  # noqa: PLR2004
+        return values[0] if values else float("inf")
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+def benchmark(interface, args):
+    """Return (concurrency, throughput, p95) rows and the best concurrency."""
+    rows = []
+    best = 0
+    process = start_server(interface, args)
+    try:
+        for concurrency in args.concurrency:
+            latencies, errors = asyncio.run(run_level(args, concurrency))
+            p95_ms = percentile(latencies, 0.95) * 1000
+            rows.append((concurrency, len(latencies) / args.duration, p95_ms, errors))
+            if errors or p95_ms > args.latency_ms:
+                break
+            best = concurrency
+    finally:
+        process.terminate()
+        process.wait()
+    return rows, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--settings", default="config.settings.local")
+    parser.add_argument("--path", default="/api/ads/")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 2, 4, 8, 16, 32, 64, 128, 256],
+    )
+    parser.add_argument(
+        "--interfaces",
+        type=lambda value: value.split(","),
+        default=list(SERVERS),
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for interface in args.interfaces:
+        rows, best = benchmark(interface, args)
+        results[interface] = best
+        sys.stdout.write(f"\n{interface.upper()} {args.path}\n")
+        sys.stdout.write("concurrency  req/s     p95 ms  errors\n")
+        for concurrency, throughput, p95_ms, errors in rows:
+            sys.stdout.write(
+                f"{concurrency:>11}  {throughput:>8.1f}  {p95_ms:>6.1f}  "
+                f"{len(errors)}\n",
+            )
+
+    sys.stdout.write(f"\nMax concurrency with p95 <= {args.latency_ms:g} ms:\n")
+    for interface, best in results.items():
+        sys.stdout.write(f"  {interface}: {best}\n")
+
+
+if __name__ == "__main__":
+    main()
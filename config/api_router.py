@@ -3,12 +3,13 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.routers import SimpleRouter
 
 from shum.ads.api.views import AdViewSet
+from shum.ads.api.views import AsyncAdViewSet
 from shum.users.api.views import UserViewSet
 
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
 
 router.register("users", UserViewSet)
-router.register("ads", AdViewSet)
+router.register("ads", AsyncAdViewSet if settings.ASYNC_API_VIEWS else AdViewSet)
 
 app_name = "api"
 urlpatterns = router.urls
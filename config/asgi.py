@@ -0,0 +1,25 @@
+"""
+ASGI config for shum project.
+
+This module contains the ASGI application used by ASGI servers such as
+uvicorn. It should expose a module-level variable named ``application``.
+Run it with ``DJANGO_ASYNC_API_VIEWS=True`` so the hot read endpoints are
+served by async views instead of sync views run in a thread pool.
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# shum directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "shum"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+# This application object is used by any ASGI server configured to use this
+# file.
+application = get_asgi_application()
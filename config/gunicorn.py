@@ -0,0 +1,106 @@
+"""
+Gunicorn configuration for shum project.
+
+Used by the production start script as ``--config python:config.gunicorn``.
+Sizing and recycling can be tuned with GUNICORN_* environment variables;
+command line options still take precedence.
+
+"""
+
+import gc
+import os
+import time
+
+from gunicorn.workers.gthread import ThreadWorker
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def cpu_count():
+    """CPUs this process may run on, respecting affinity limits."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Server socket
+# ------------------------------------------------------------------------------
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+backlog = env_int("GUNICORN_BACKLOG", 2048)
+
+
+# Workers
+# ------------------------------------------------------------------------------
+class QueueTimingWorker(ThreadWorker):
+    """
+    Threaded worker that stamps X-Request-Start when it queues a request.
+
+    Requests wait in the worker's queue until a thread is free. Traefik
+    doesn't send the header, so load shedding measures that wait from this
+    stamp. A header set by the proxy is kept, it also covers the proxy.
+    """
+
+    def enqueue_req(self, conn):
+        conn.queued_at = time.time()
+        super().enqueue_req(conn)
+
+    def handle_request(self, req, conn):
+        if not any(name == "X-REQUEST-START" for name, _value in req.headers):
+            queued_at = int(conn.queued_at * 1_000_000)
+            req.headers.append(("X-REQUEST-START", f"t={queued_at}"))
+        return super().handle_request(req, conn)
+
+
+# https://docs.gunicorn.org/en/stable/design.html#how-many-workers
+workers = env_int("GUNICORN_WORKERS", cpu_count() * 2 + 1)
+worker_class = "config.gunicorn.QueueTimingWorker"
+# Requests a worker serves at once, also the default load shedding capacity
+# (LOAD_SHEDDING_MAX_IN_FLIGHT). Each thread's batch requests take up to
+# BATCH_MAX_WORKERS more connections, DATABASE_POOL_MAX_SIZE defaults to
+# threads * (1 + BATCH_MAX_WORKERS) + 2 for them and the background threads.
+threads = env_int("GUNICORN_THREADS", 4)
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+# Heartbeat files on tmpfs, a slow disk can get workers killed
+worker_tmp_dir = os.environ.get("GUNICORN_WORKER_TMP_DIR", "/dev/shm")  # noqa: S108
+
+# Recycle workers to bound memory growth, jitter avoids restarting all at once
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+
+# Load the application in the master so workers share its memory
+preload_app = True
+
+# Logging
+# ------------------------------------------------------------------------------
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    """Warm up the preloaded application before workers are forked."""
+    if not server.cfg.preload_app:
+        return
+
+    from shum.core.warmup import warm_up  # noqa: PLC0415
+
+    warm_up()
+    # Keep warmed objects out of the collector, so its passes in the workers
+    # don't write to and un-share copy-on-write pages
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    """Store buffered last_login timestamps before the worker goes away."""
+    from shum.users.last_login import last_logins  # noqa: PLC0415
+
+    try:
+        last_logins.flush()
+    except Exception:
+        server.log.exception("Could not store last logins on exit")
@@ -46,11 +46,55 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/dev/ref/settings/#locale-paths
 LOCALE_PATHS = [str(BASE_DIR / "locale")]
 
+# REDIS
+# ------------------------------------------------------------------------------
+# Shared state across workers (auth cache, token revocation), optional
+REDIS_URL = env("REDIS_URL", default="")
+
 # DATABASES
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Read replicas, used for safe requests to DATABASE_REPLICA_VIEWS
+DATABASE_REPLICAS = []
+for _index, _url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[])):
+    DATABASES[f"replica_{_index}"] = env.db_url_config(_url)
+    DATABASE_REPLICAS.append(f"replica_{_index}")
+# Server-side query limits in milliseconds, applied per request by
+# DatabaseTimeoutMiddleware: views matching DATABASE_TIMEOUT_VIEWS (first
+# match wins) use their profile, other views the default one. Migrations,
+# management commands and background threads run without limits.
+DATABASE_TIMEOUTS = {
+    "default": {
+        "statement_timeout": env.int("DATABASE_STATEMENT_TIMEOUT", default=5000),
+        "lock_timeout": env.int("DATABASE_LOCK_TIMEOUT", default=2000),
+    },
+    "public_read": {"statement_timeout": 1000, "lock_timeout": 500},
+    "admin": {"statement_timeout": 30000, "lock_timeout": 5000},
+    "export": {"statement_timeout": 120000, "lock_timeout": 10000},
+}
+DATABASE_TIMEOUT_VIEWS = [
+    ("api:ad-list", "public_read"),
+    ("api:ad-detail", "public_read"),
+    ("api:ad-batch", "public_read"),
+    ("api:ad-changes", "public_read"),
+    ("admin:*", "admin"),
+]
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["shum.core.routers.ReplicaRouter"]
+# View name patterns whose GET requests may read from a replica
+DATABASE_REPLICA_VIEWS = [
+    "api:ad-list",
+    "api:ad-detail",
+    "api:user-list",
+    "api:user-detail",
+    "api:user-me",
+    "admin:*_changelist",
+]
+# Reads of a client stay on the primary this long after its writes
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=10)
+DATABASE_REPLICA_PIN_COOKIE = "db_primary_pin"
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -60,6 +104,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/ref/settings/#asgi-application
+ASGI_APPLICATION = "config.asgi.application"
+# Serve hot read endpoints with async views; enable when running under ASGI
+ASYNC_API_VIEWS = env.bool("DJANGO_ASYNC_API_VIEWS", default=False)
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -89,6 +137,7 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    "shum.core",
     "shum.users",
     "shum.ads",
     # Your stuff: custom apps go here
@@ -114,24 +163,40 @@ AUTH_USER_MODEL = "users.User"
 LOGIN_REDIRECT_URL = "users:redirect"
 # https://docs.djangoproject.com/en/dev/ref/settings/#login-url
 LOGIN_URL = "account_login"
+# last_login is written in batches at most this many seconds after a login,
+# 0 writes it during the login request
+LAST_LOGIN_FLUSH_SECONDS = env.int("LAST_LOGIN_FLUSH_SECONDS", default=30)
+LAST_LOGIN_BATCH_SIZE = 1000
+# Cache of users and DRF tokens used by shum.users.authentication
+AUTH_CACHE_ALIAS = "default"
+AUTH_CACHE_TIMEOUT = env.int("AUTH_CACHE_TIMEOUT", default=60)
 
 # PASSWORDS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#password-hashers
 PASSWORD_HASHERS = [
     # https://docs.djangoproject.com/en/dev/topics/auth/passwords/#using-argon2-with-django
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "shum.users.hashers.TunedArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
 ]
+# Argon2 costs, calibrate with `python manage.py calibrate_argon2`. Defaults
+# are Django's, memory is in KiB.
+ARGON2_TIME_COST = env.int("ARGON2_TIME_COST", default=2)
+ARGON2_MEMORY_COST = env.int("ARGON2_MEMORY_COST", default=102400)
+ARGON2_PARALLELISM = env.int("ARGON2_PARALLELISM", default=8)
+# Argon2 runs in a per-process pool of this many threads. Up to
+# PASSWORD_HASHING_QUEUE_SIZE more logins wait for one, further logins get 503.
+PASSWORD_HASHING_WORKERS = env.int("PASSWORD_HASHING_WORKERS", default=2)
+PASSWORD_HASHING_QUEUE_SIZE = env.int("PASSWORD_HASHING_QUEUE_SIZE", default=8)
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
     {
-        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+        "NAME": "shum.users.validators.BoundedUserAttributeSimilarityValidator",
     },
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
-    {"NAME": "django.contrib.auth.password_validation.CommonPasswordValidator"},
+    {"NAME": "shum.users.validators.CompactCommonPasswordValidator"},
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
@@ -141,16 +206,107 @@ AUTH_PASSWORD_VALIDATORS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "shum.core.middleware.CompressionMiddleware",
+    "shum.core.middleware.LoadSheddingMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "shum.core.middleware.WebOnlyMiddleware",
+    "shum.core.middleware.ReplicaMiddleware",
+    "shum.core.middleware.DatabaseTimeoutMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "allauth.account.middleware.AccountMiddleware",
+]
+# Run by WebOnlyMiddleware in this order, except for API requests without a
+# session cookie. WhiteNoise is sync-only, here it doesn't keep API views
+# off the event loop under ASGI.
+WEB_ONLY_MIDDLEWARE = [
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "allauth.account.middleware.AccountMiddleware",
 ]
+# The admin checks only look at MIDDLEWARE, shum.core.checks covers
+# WEB_ONLY_MIDDLEWARE instead
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
+# COMPRESSION
+# ------------------------------------------------------------------------------
+# Codings for API responses, in order of preference when the client accepts
+# several equally. Brotli and zstd are skipped if their packages are missing.
+COMPRESSION_ENCODINGS = env.list(
+    "COMPRESSION_ENCODINGS",
+    default=["zstd", "br", "gzip"],
+)
+# Levels trade CPU for bytes, see `python -m benchmarks.compression`
+COMPRESSION_LEVELS = {
+    "gzip": env.int("COMPRESSION_GZIP_LEVEL", default=6),
+    "br": env.int("COMPRESSION_BROTLI_LEVEL", default=4),
+    "zstd": env.int("COMPRESSION_ZSTD_LEVEL", default=3),
+}
+# Smaller bodies fit in a packet or two, compressing them only costs CPU
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=1024)
+COMPRESSION_CONTENT_TYPES = [
+    "application/json",
+    "application/*+json",
+    "application/vnd.oai.openapi*",
+    "text/*",
+]
+# Views whose responses contain secrets, compressing them next to
+# attacker-controlled input would allow BREACH-style attacks
+COMPRESSION_EXCLUDE_VIEWS = [
+    "token_*",
+    "user_login",
+    "user_register",
+    "auth_token",
+    # Embeds the responses of the views above
+    "api_batch",
+]
+
+# LOAD SHEDDING
+# ------------------------------------------------------------------------------
+# Route classes by view name pattern: (pattern, class for reads, class for
+# writes), first match wins. Unmatched views use the "default" class.
+LOAD_SHEDDING_ROUTES = [
+    ("api:ad-upload-image", "uploads", "uploads"),
+    ("api:ad-upload-images", "uploads", "uploads"),
+    ("token_*", "auth", "auth"),
+    ("auth_token", "auth", "auth"),
+    ("user_login", "auth", "auth"),
+    ("user_register", "auth", "auth"),
+    ("api:ad-*", "ads-read", "ads-write"),
+    ("admin:*", "admin", "admin"),
+]
+# Requests that waited longer than this in the proxy and server queues are
+# shed, 0 disables. This is the main trigger: requests only queue once every
+# thread is busy. The wait is measured from X-Request-Start, which the
+# Gunicorn worker sets when it queues a request unless the proxy already did.
+LOAD_SHEDDING_QUEUE_BUDGET_MS = env.int(
+    "LOAD_SHEDDING_QUEUE_BUDGET_MS",
+    default=1000,
+)
+# Share of the queue budget each priority may wait, so anonymous reads are
+# shed first when queues build up
+LOAD_SHEDDING_PRIORITY_SHARES = {"high": 1.0, "normal": 0.8, "low": 0.6}
+# Maximum in-flight requests per worker process in total. Under WSGI a
+# process serves GUNICORN_THREADS requests at once (config/gunicorn.py) and
+# never exceeds it, under ASGI set it to the concurrency a process should
+# take on.
+LOAD_SHEDDING_MAX_IN_FLIGHT = env.int(
+    "LOAD_SHEDDING_MAX_IN_FLIGHT",
+    default=env.int("GUNICORN_THREADS", default=4),
+)
+# Maximum in-flight requests per worker process, by route class. Every class
+# may use the whole worker by default, so only a saturated worker sheds.
+# Lower a limit to keep a slow class from taking all threads.
+LOAD_SHEDDING_LIMITS = {
+    route_class: env.int(
+        f"LOAD_SHEDDING_{route_class.upper().replace('-', '_')}_LIMIT",
+        default=LOAD_SHEDDING_MAX_IN_FLIGHT,
+    )
+    for route_class in ["auth", "ads-read", "ads-write", "uploads", "admin", "default"]
+}
+LOAD_SHEDDING_RETRY_AFTER = env.int("LOAD_SHEDDING_RETRY_AFTER", default=1)
 
 # STATIC
 # ------------------------------------------------------------------------------
@@ -293,12 +449,31 @@ SOCIALACCOUNT_FORMS = {"signup": "shum.users.forms.UserSocialSignupForm"}
 # django-rest-framework - https://www.django-rest-framework.org/api-guide/settings/
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
+        # Sub-requests of /api/batch/ only
+        "shum.core.authentication.BatchAuthentication",
+        "shum.users.authentication.CachedJWTAuthentication",
+        "shum.users.authentication.CachedSessionAuthentication",
+        "shum.users.authentication.CachedTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Token buckets for views with a throttle_scope, see shum.core.throttling
+    "DEFAULT_THROTTLE_CLASSES": (
+        "shum.core.throttling.IPThrottle",
+        "shum.core.throttling.AnonThrottle",
+        "shum.core.throttling.UserThrottle",
+        "shum.core.throttling.EmailThrottle",
+    ),
+    # "<scope>_<key>": "N/period", bursts of N refilled at N per period
+    "DEFAULT_THROTTLE_RATES": {
+        "auth_ip": env("THROTTLE_AUTH_IP_RATE", default="30/min"),
+        "auth_email": env("THROTTLE_AUTH_EMAIL_RATE", default="10/min"),
+        "register_ip": env("THROTTLE_REGISTER_IP_RATE", default="20/hour"),
+        "ads_anon": env("THROTTLE_ADS_ANON_RATE", default="120/min"),
+    },
+    # Proxies in front of Django, the client address is the one before them
+    # in X-Forwarded-For. With 0 it is REMOTE_ADDR.
+    "NUM_PROXIES": env.int("DJANGO_NUM_PROXIES", default=0),
 }
 
 # Security validation for JWT
@@ -364,7 +539,8 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # Logins are recorded by shum.users.last_login instead
+    "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": _secret_key,  # Set securely with validation above
     "VERIFYING_KEY": None,
@@ -379,7 +555,28 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(minutes=60),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
+    "TOKEN_REFRESH_SERIALIZER": "shum.users.api.serializers.RevocableTokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "shum.users.api.serializers.RevocableTokenVerifySerializer",
 }
+# Asymmetric signing, see shum.users.signing. Without JWT_KEYS_DIR tokens
+# are signed with SIGNING_KEY (HS256) and can only be verified here.
+JWT_KEYS_DIR = env("JWT_KEYS_DIR", default="")
+JWT_ACTIVE_KEY_ID = env("JWT_ACTIVE_KEY_ID", default="")
+# Verifiers may cache /.well-known/jwks.json this long, publish a new key at
+# least this long before making it active
+JWT_JWKS_MAX_AGE = env.int("JWT_JWKS_MAX_AGE", default=300)
+# Rotated refresh tokens are revoked in shum.users.revocation. Concurrent
+# refreshes with the same token get the same new tokens for this long.
+JWT_REVOCATION_GRACE_SECONDS = env.int("JWT_REVOCATION_GRACE_SECONDS", default=10)
+# How stale each process's Bloom filter of revoked tokens may get, keep it
+# below the grace window
+JWT_REVOCATION_SYNC_SECONDS = env.float("JWT_REVOCATION_SYNC_SECONDS", default=1.0)
+# Revoked tokens per filter before it is rebuilt, about 1.8 MB at 0.1%
+JWT_REVOCATION_BLOOM_CAPACITY = env.int(
+    "JWT_REVOCATION_BLOOM_CAPACITY",
+    default=1_000_000,
+)
+JWT_REVOCATION_BLOOM_ERROR_RATE = 0.001
 
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
 CORS_URLS_REGEX = r"^/api/.*$"
@@ -414,5 +611,48 @@ SPECTACULAR_SETTINGS = {
         },
         {"name": "Users", "description": "User management operations"},
         {"name": "Ads", "description": "Marketplace ads with S3 image storage"},
+        {"name": "Batch", "description": "Run several API requests in one round trip"},
+        {"name": "Health", "description": "Service and database health checks"},
     ],
 }
+
+# Batch API
+# -------------------------------------------------------------------------------
+# Maximum number of sub-requests accepted by POST /api/batch/
+BATCH_MAX_REQUESTS = env.int("BATCH_MAX_REQUESTS", default=20)
+# Maximum size in bytes of a POST /api/batch/ request body
+BATCH_MAX_REQUEST_SIZE = env.int("BATCH_MAX_REQUEST_SIZE", default=1024 * 1024)
+# Threads used to run read-only sub-requests concurrently (1 disables it)
+BATCH_MAX_WORKERS = env.int("BATCH_MAX_WORKERS", default=4)
+
+# Ads
+# -------------------------------------------------------------------------------
+# Maximum number of files accepted by a single batch image upload request
+ADS_IMAGE_BATCH_MAX_FILES = env.int("ADS_IMAGE_BATCH_MAX_FILES", default=10)
+# Size of the thread pool used to validate and store batch-uploaded images
+ADS_IMAGE_UPLOAD_WORKERS = env.int("ADS_IMAGE_UPLOAD_WORKERS", default=4)
+# Maximum number of items accepted by bulk ad endpoints
+ADS_BULK_MAX_ITEMS = env.int("ADS_BULK_MAX_ITEMS", default=500)
+# Maximum number of IDs accepted by the batch ad fetch endpoint
+ADS_BATCH_FETCH_MAX_IDS = env.int("ADS_BATCH_FETCH_MAX_IDS", default=50)
+# Delta sync: ads per page, seconds a change must settle before it's served
+# and days tombstones of deleted ads are kept
+ADS_SYNC_PAGE_SIZE = env.int("ADS_SYNC_PAGE_SIZE", default=500)
+ADS_SYNC_SETTLE_SECONDS = env.int("ADS_SYNC_SETTLE_SECONDS", default=5)
+ADS_SYNC_TOMBSTONE_RETENTION_DAYS = env.int(
+    "ADS_SYNC_TOMBSTONE_RETENTION_DAYS",
+    default=30,
+)
+# Ad events stream: "off" publishes nothing and the stream answers 501,
+# "postgres" fans out through LISTEN/NOTIFY across processes, "local"
+# delivers within the current process only. Enable it with ASGI streaming:
+# the listener holds a connection of each process, which must not go
+# through PgBouncer in transaction mode.
+ADS_EVENTS_BACKEND = env("ADS_EVENTS_BACKEND", default="off")
+ADS_EVENTS_QUEUE_SIZE = env.int("ADS_EVENTS_QUEUE_SIZE", default=100)
+ADS_EVENTS_HEARTBEAT_SECONDS = env.int("ADS_EVENTS_HEARTBEAT_SECONDS", default=15)
+ADS_EVENTS_MAX_STREAM_SECONDS = env.int("ADS_EVENTS_MAX_STREAM_SECONDS", default=600)
+ADS_EVENTS_RETRY_MS = env.int("ADS_EVENTS_RETRY_MS", default=5000)
+# Concurrent streams per process, each holds a queue of ADS_EVENTS_QUEUE_SIZE.
+# Streams are only served under ASGI (DJANGO_SERVER_INTERFACE=asgi).
+ADS_EVENTS_MAX_STREAMS = env.int("ADS_EVENTS_MAX_STREAMS", default=1000)
@@ -7,8 +7,11 @@ from sentry_sdk.integrations.logging import LoggingIntegration
 
 from .base import *  # noqa: F403
 from .base import BASE_DIR
+from .base import BATCH_MAX_WORKERS
 from .base import DATABASES
 from .base import INSTALLED_APPS
+from .base import REDIS_URL
+from .base import REST_FRAMEWORK
 from .base import SPECTACULAR_SETTINGS
 from .base import env
 
@@ -24,7 +27,45 @@ ALLOWED_HOSTS = env.list(
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# "pool": a psycopg connection pool per worker process. Postgres sees at most
+#   workers * DATABASE_POOL_MAX_SIZE connections per host.
+# "pgbouncer": connections to PgBouncer in transaction pooling mode, which may
+#   run each transaction on a different server connection.
+# "persistent": one persistent connection per worker thread.
+DATABASE_CONNECTION_MODE = env("DATABASE_CONNECTION_MODE", default="pool")
+# Connections a worker process may hold at once: one per request thread, up
+# to BATCH_MAX_WORKERS more for the sub-requests of each read batch, and one
+# each for the ad event listener and the last_login flush timer.
+DATABASE_POOL_MAX_SIZE = env.int(
+    "DATABASE_POOL_MAX_SIZE",
+    default=env.int("GUNICORN_THREADS", default=4) * (1 + BATCH_MAX_WORKERS) + 2,
+)
+# Applies to the primary and the replicas
+for _database in DATABASES.values():
+    _database.setdefault("OPTIONS", {})
+    if DATABASE_CONNECTION_MODE == "pool":
+        # https://docs.djangoproject.com/en/dev/ref/databases/#connection-pool
+        _database["CONN_MAX_AGE"] = 0
+        # Verify connections on checkout, dropped ones are replaced
+        _database["CONN_HEALTH_CHECKS"] = True
+        _database["OPTIONS"]["pool"] = {
+            "min_size": env.int("DATABASE_POOL_MIN_SIZE", default=1),
+            "max_size": DATABASE_POOL_MAX_SIZE,
+            # Seconds to wait for a free connection before failing the request
+            "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10.0),
+            "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=600.0),
+            "max_lifetime": env.float("DATABASE_POOL_MAX_LIFETIME", default=3600.0),
+        }
+    elif DATABASE_CONNECTION_MODE == "pgbouncer":
+        # https://docs.djangoproject.com/en/dev/ref/databases/#transaction-pooling-server-side-cursors
+        _database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+        _database["CONN_HEALTH_CHECKS"] = True
+        _database["DISABLE_SERVER_SIDE_CURSORS"] = True
+        # Prepared statements live on one server connection, never prepare them
+        _database["OPTIONS"]["prepare_threshold"] = None
+    else:
+        _database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+        _database["CONN_HEALTH_CHECKS"] = True
 
 # CACHES
 # ------------------------------------------------------------------------------
@@ -33,12 +74,34 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.db.DatabaseCache",
         "LOCATION": "django_cache_table",
     },
+    # Authenticated users, see shum.users.authentication. With Redis every
+    # worker sees invalidations. The per-process fallback only drops entries
+    # in the process that saved the user, others keep theirs until
+    # AUTH_CACHE_TIMEOUT, so keep it short without Redis.
+    "auth": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+        if REDIS_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "auth",
+        }
+    ),
 }
+AUTH_CACHE_ALIAS = "auth"
+AUTH_CACHE_TIMEOUT = env.int(
+    "AUTH_CACHE_TIMEOUT",
+    default=60 if REDIS_URL else 10,
+)
 
 # SECURITY
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#secure-proxy-ssl-header
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+# Traefik, for the client address of throttles
+REST_FRAMEWORK["NUM_PROXIES"] = env.int("DJANGO_NUM_PROXIES", default=1)
 # https://docs.djangoproject.com/en/dev/ref/settings/#secure-ssl-redirect
 SECURE_SSL_REDIRECT = env.bool("DJANGO_SECURE_SSL_REDIRECT", default=False)
 # https://docs.djangoproject.com/en/dev/ref/settings/#session-cookie-secure
@@ -9,12 +9,17 @@ from django.views import defaults as default_views
 from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView
 from drf_spectacular.views import SpectacularSwaggerView
-from rest_framework.authtoken.views import obtain_auth_token
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.views import TokenVerifyView
 
+from shum.core.api.views import BatchView
+from shum.core.api.views import HealthView
+
 # Import custom JWT views
+from shum.users.api.views import AsyncUserProfileView
+from shum.users.api.views import AuthTokenView
 from shum.users.api.views import CustomTokenObtainPairView
+from shum.users.api.views import JWKSView
 from shum.users.api.views import UserLoginView
 from shum.users.api.views import UserProfileView
 from shum.users.api.views import UserRegistrationView
@@ -25,6 +30,9 @@ def trigger_error(request):
     division_by_zero = 1 / 0  # noqa: F841
 
 
+# Async read views are only worth it when served by ASGI
+profile_view = AsyncUserProfileView if settings.ASYNC_API_VIEWS else UserProfileView
+
 urlpatterns = [
     path("", TemplateView.as_view(template_name="pages/home.html"), name="home"),
     path(
@@ -41,7 +49,7 @@ urlpatterns = [
     # API URLS
     path("api/", include("config.api_router")),
     # DRF auth token
-    path("api/auth-token/", obtain_auth_token),
+    path("api/auth-token/", AuthTokenView.as_view(), name="auth_token"),
     # JWT Authentication endpoints
     path(
         "api/auth/token/",
@@ -50,10 +58,14 @@ urlpatterns = [
     ),
     path("api/auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/auth/token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path(".well-known/jwks.json", JWKSView.as_view(), name="jwks"),
     # Custom authentication endpoints
     path("api/auth/register/", UserRegistrationView.as_view(), name="user_register"),
     path("api/auth/login/", UserLoginView.as_view(), name="user_login"),
-    path("api/auth/profile/", UserProfileView.as_view(), name="user_profile"),
+    path("api/auth/profile/", profile_view.as_view(), name="user_profile"),
+    # Request multiplexing
+    path("api/batch/", BatchView.as_view(), name="api_batch"),
+    path("api/health/", HealthView.as_view(), name="api_health"),
     path("api/schema/", SpectacularAPIView.as_view(), name="api-schema"),
     path(
         "api/docs/",
@@ -0,0 +1,21 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Renderer for server-sent event streams.
+
+    Streams are returned as StreamingHttpResponse and bypass rendering, so
+    this only renders error responses (e.g. validation errors) as an event.
+    """
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        payload = json.dumps(data, cls=DjangoJSONEncoder)
+        return f"event: error\ndata: {payload}\n\n".encode()
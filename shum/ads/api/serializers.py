@@ -1,7 +1,9 @@
+from django.conf import settings
 from drf_spectacular.openapi import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from shum.ads.events import EVENT_TYPES
 from shum.ads.models import Ad
 from shum.ads.models import AdImage
 
@@ -28,6 +30,28 @@ class AdImageSerializer(serializers.ModelSerializer):
         return None
 
 
+class AdImageReorderSerializer(serializers.Serializer):
+    """Serializer for reordering ad images."""
+
+    image_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text="All image IDs of the ad in the desired order",
+    )
+
+    def validate_image_ids(self, value):
+        """Ensure the list matches the ad's images exactly once each."""
+        if len(set(value)) != len(value):
+            error_message = "Image IDs must be unique."
+            raise serializers.ValidationError(error_message)
+
+        ad = self.context["ad"]
+        if set(value) != set(ad.images.values_list("id", flat=True)):
+            error_message = "Image IDs must list every image of this ad."
+            raise serializers.ValidationError(error_message)
+        return value
+
+
 class AdSerializer(serializers.ModelSerializer):
     """Serializer for Ad model."""
 
@@ -97,3 +121,61 @@ class AdCreateSerializer(serializers.ModelSerializer):
         """Create ad with current user as owner."""
         validated_data["owner"] = self.context["request"].user
         return super().create(validated_data)
+
+
+class AdIdsSerializer(serializers.Serializer):
+    """Serializer for a bounded list of ad IDs."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        help_text="Ad IDs",
+    )
+
+    def validate_ids(self, value):
+        """Drop duplicates and enforce the configured upper bound."""
+        value = list(dict.fromkeys(value))
+        max_items = self.context.get("max_items", settings.ADS_BULK_MAX_ITEMS)
+        if len(value) > max_items:
+            error_message = f"Ensure this field has no more than {max_items} IDs."
+            raise serializers.ValidationError(error_message)
+        return value
+
+
+class AdEventFilterSerializer(serializers.Serializer):
+    """Serializer for ad event stream filters."""
+
+    types = serializers.CharField(
+        required=False,
+        help_text=f"Comma-separated event types: {', '.join(EVENT_TYPES)}",
+    )
+    owner = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Only events for ads of this owner",
+    )
+    min_price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False,
+        help_text="Only events for ads at or above this price",
+    )
+    max_price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False,
+        help_text="Only events for ads at or below this price",
+    )
+    search = serializers.CharField(
+        required=False,
+        max_length=100,
+        help_text="Only events for ads whose title contains this text",
+    )
+
+    def validate_types(self, value):
+        types = [event_type.strip() for event_type in value.split(",") if event_type]
+        unknown = set(types) - set(EVENT_TYPES)
+        if unknown or not types:
+            error_message = f"Choose from: {', '.join(EVENT_TYPES)}."
+            raise serializers.ValidationError(error_message)
+        return types
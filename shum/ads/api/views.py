@@ -1,5 +1,14 @@
+from typing import Any
+
+from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.openapi import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample
+from drf_spectacular.utils import OpenApiParameter
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_view
 from rest_framework import status
@@ -16,10 +25,26 @@ from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from shum.ads.api.renderers import EventStreamRenderer
 from shum.ads.api.serializers import AdCreateSerializer
+from shum.ads.api.serializers import AdEventFilterSerializer
+from shum.ads.api.serializers import AdIdsSerializer
+from shum.ads.api.serializers import AdImageReorderSerializer
 from shum.ads.api.serializers import AdImageSerializer
 from shum.ads.api.serializers import AdSerializer
+from shum.ads.events import astream_events
+from shum.ads.events import broker
+from shum.ads.events import publish
 from shum.ads.models import Ad
+from shum.ads.models import AdDeletion
+from shum.ads.models import AdImage
+from shum.ads.sync import ExpiredCursorError
+from shum.ads.sync import InvalidCursorError
+from shum.ads.sync import decode_cursor
+from shum.ads.sync import encode_cursor
+from shum.ads.sync import get_changes
+from shum.ads.uploads import upload_ad_images
+from shum.core.api.mixins import AsyncViewMixin
 
 
 @extend_schema_view(
@@ -42,6 +67,7 @@ class AdViewSet(
 
     queryset = Ad.objects.select_related("owner").prefetch_related("images")
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_scope = "ads"
 
     def get_serializer_class(self):
         """Return appropriate serializer class."""
@@ -54,7 +80,7 @@ class AdViewSet(
         queryset = super().get_queryset()
 
         # Only show active ads for non-owners
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "batch"]:
             if self.request.user.is_authenticated:
                 # Show all own ads, only active others
                 return queryset.filter(
@@ -65,6 +91,19 @@ class AdViewSet(
 
         return queryset
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        publish([serializer.instance], "created")
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        publish([serializer.instance], "updated")
+
+    def perform_destroy(self, instance):
+        """Delete ad and leave a tombstone for delta sync clients."""
+        AdDeletion.objects.create(ad_id=instance.pk)
+        instance.delete()
+
     @extend_schema(
         request={
             "multipart/form-data": {
@@ -114,10 +153,275 @@ class AdViewSet(
         serializer = AdImageSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(ad=ad)
+            ad.touch()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "images": {
+                        "type": "array",
+                        "items": {"type": "string", "format": "binary"},
+                    },
+                    "alt_text": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["images"],
+            },
+        },
+        responses={
+            201: OpenApiTypes.OBJECT,
+            207: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+        description=(
+            "Upload several images for ad in one request. Files are validated "
+            "and stored concurrently and created in one batch; results are "
+            "reported per file in request order."
+        ),
+        summary="Upload Ad Images (batch)",
+        tags=["Ads"],
+    )
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def upload_images(self, request, pk=None):
+        """Upload several images for ad in one request."""
+        ad = self.get_object()
+
+        # Check if user owns the ad
+        if ad.owner != request.user:
+            return Response(
+                {"detail": "You can only upload images to your own ads."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        files = request.FILES.getlist("images")
+        if not files:
+            return Response(
+                {"images": ["No files were submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_files = settings.ADS_IMAGE_BATCH_MAX_FILES
+        if len(files) > max_files:
+            return Response(
+                {"images": [f"Ensure this field has no more than {max_files} files."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = upload_ad_images(ad, files, request.data.getlist("alt_text"))
+        ad.touch()
+
+        created = 0
+        for result in results:
+            if "image" in result:
+                result["image"] = AdImageSerializer(result["image"]).data
+                created += 1
+        return self._bulk_response(results, created, status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request=AdImageReorderSerializer,
+        responses={200: AdImageSerializer(many=True)},
+        description="Reorder ad images in a single update",
+        summary="Reorder Ad Images",
+        tags=["Ads"],
+        examples=[
+            OpenApiExample(
+                "Reorder Images",
+                value={"image_ids": [12, 10, 11]},
+                request_only=True,
+            ),
+        ],
+    )
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def reorder(self, request, pk=None):
+        """Reorder ad images."""
+        ad = self.get_object()
+
+        # Check if user owns the ad
+        if ad.owner != request.user:
+            return Response(
+                {"detail": "You can only reorder images of your own ads."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = AdImageReorderSerializer(data=request.data, context={"ad": ad})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        AdImage.objects.reorder(ad, serializer.validated_data["image_ids"])
+        ad.touch()
+        images = AdImage.objects.filter(ad=ad)
+        return Response(AdImageSerializer(images, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                OpenApiTypes.STR,
+                required=True,
+                description="Comma-separated ad IDs, e.g. ids=3,1,2",
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        description=(
+            "Get several ads by ID in one request. Ads are returned in the "
+            "requested order; IDs that don't exist or aren't visible are "
+            "listed in missing."
+        ),
+        summary="Batch Get Ads",
+        tags=["Ads"],
+    )
+    @action(detail=False)
+    def batch(self, request):
+        """Get several ads by ID in one request."""
+        ids = [
+            ad_id
+            for value in request.query_params.getlist("ids")
+            for ad_id in value.split(",")
+            if ad_id.strip()
+        ]
+        ids_serializer = AdIdsSerializer(
+            data={"ids": ids},
+            context={"max_items": settings.ADS_BATCH_FETCH_MAX_IDS},
+        )
+        if not ids_serializer.is_valid():
+            return Response(
+                ids_serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ids = ids_serializer.validated_data["ids"]
+        ads = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [ads[ad_id] for ad_id in ids if ad_id in ads],
+            many=True,
+        )
+        return Response(
+            {
+                "results": serializer.data,
+                "missing": [ad_id for ad_id in ids if ad_id not in ads],
+            },
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since",
+                OpenApiTypes.STR,
+                description=(
+                    "Cursor returned by the previous call. Omit it to get a "
+                    "snapshot of all visible ads."
+                ),
+            ),
+        ],
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+            410: OpenApiTypes.OBJECT,
+        },
+        description=(
+            "Get ads created, updated, deactivated or deleted since a cursor. "
+            "Keep calling with the returned cursor while has_more is true. "
+            "A 410 response means the cursor is too old and a full resync "
+            "(no since) is required."
+        ),
+        summary="Ad Changes (delta sync)",
+        tags=["Ads"],
+    )
+    @action(detail=False)
+    def changes(self, request):
+        """Get ads changed since a cursor."""
+        position = None
+        since = request.query_params.get("since")
+        if since:
+            try:
+                position = decode_cursor(since)
+            except InvalidCursorError:
+                return Response(
+                    {"since": ["Invalid cursor."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except ExpiredCursorError:
+                return Response(
+                    {"detail": "Cursor expired, a full resync is required."},
+                    status=status.HTTP_410_GONE,
+                )
+
+        changed, removed, position, has_more = get_changes(
+            self.get_queryset(),
+            request.user,
+            position,
+        )
+        serializer = self.get_serializer(changed, many=True)
+        return Response(
+            {
+                "changed": serializer.data,
+                "removed": removed,
+                "cursor": encode_cursor(position),
+                "has_more": has_more,
+            },
+        )
+
+    @extend_schema(
+        parameters=[AdEventFilterSerializer],
+        responses={
+            (200, "text/event-stream"): OpenApiTypes.STR,
+            (400, "text/event-stream"): OpenApiTypes.STR,
+            (501, "text/event-stream"): OpenApiTypes.STR,
+            (503, "text/event-stream"): OpenApiTypes.STR,
+        },
+        description=(
+            "Stream ad created, updated and sold events as server-sent events. "
+            "Each event carries the ad ID and a compact summary. A reset "
+            "event means events were dropped and the client should catch up "
+            "through the changes endpoint. Only served under ASGI."
+        ),
+        summary="Ad Events Stream",
+        tags=["Ads"],
+    )
+    @action(detail=False, renderer_classes=[EventStreamRenderer])
+    def events(self, request):
+        """Stream ad events to the client."""
+        if settings.ADS_EVENTS_BACKEND == "off":
+            return Response(
+                {"detail": "Event streams are not enabled."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        # Streams are served by the event loop, a sync worker would be
+        # blocked for the whole stream
+        if not isinstance(request._request, ASGIRequest):  # noqa: SLF001
+            return Response(
+                {"detail": "Event streams are only served under ASGI."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+        if broker.is_full():
+            return Response(
+                {"detail": "Too many event streams, try again shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={
+                    "Retry-After": str(max(1, settings.ADS_EVENTS_RETRY_MS // 1000)),
+                },
+            )
+
+        serializer = AdEventFilterSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            astream_events(**serializer.validated_data),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @extend_schema(
         responses={200: AdSerializer},
         description="Get user's own ads",
@@ -153,5 +457,214 @@ class AdViewSet(
 
         ad.is_sold = True
         ad.save()
+        publish([ad], "sold")
         serializer = self.get_serializer(ad)
         return Response(serializer.data)
+
+    def _get_bulk_items(self, request):
+        """Return the bulk request body as a list or an error response."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return None, Response(
+                {"detail": "Expected a non-empty list of items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_items = settings.ADS_BULK_MAX_ITEMS
+        if len(items) > max_items:
+            return None, Response(
+                {"detail": f"Ensure the list has no more than {max_items} items."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return items, None
+
+    def _get_bulk_item_id(self, item):
+        """Return the integer id of a bulk item, None if it has none."""
+        ad_id = item.get("id") if isinstance(item, dict) else None
+        if isinstance(ad_id, bool) or not isinstance(ad_id, int):
+            return None
+        return ad_id
+
+    def _bulk_response(self, results, succeeded, success_status):
+        """Pick the overall status for per-item bulk results."""
+        if succeeded == len(results):
+            response_status = success_status
+        elif succeeded:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({"results": results}, status=response_status)
+
+    @extend_schema(
+        request=AdCreateSerializer(many=True),
+        responses={
+            201: OpenApiTypes.OBJECT,
+            207: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+        description=(
+            "Create many ads in one request with a batched insert. "
+            "Results are reported per item in request order."
+        ),
+        summary="Bulk Create Ads",
+        tags=["Ads"],
+    )
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def bulk_create(self, request):
+        """Create many ads owned by the current user."""
+        items, error_response = self._get_bulk_items(request)
+        if error_response:
+            return error_response
+
+        results: list[dict[str, Any]] = []
+        ads = []
+        for index, item in enumerate(items):
+            serializer = AdCreateSerializer(data=item, context={"request": request})
+            if serializer.is_valid():
+                ad = Ad(owner=request.user, **serializer.validated_data)
+                ads.append((index, ad))
+                results.append({"index": index})
+            else:
+                results.append({"index": index, "errors": serializer.errors})
+
+        Ad.objects.bulk_create([ad for _index, ad in ads])
+        publish([ad for _index, ad in ads], "created")
+        for index, ad in ads:
+            results[index]["id"] = ad.pk
+
+        return self._bulk_response(results, len(ads), status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request={
+            "application/json": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "integer"},
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "price": {"type": "string", "format": "decimal"},
+                        "is_active": {"type": "boolean"},
+                    },
+                    "required": ["id"],
+                },
+            },
+        },
+        responses={
+            200: OpenApiTypes.OBJECT,
+            207: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+        description=(
+            "Patch fields of many own ads in one request with a batched update. "
+            "Results are reported per item in request order."
+        ),
+        summary="Bulk Update Ads",
+        tags=["Ads"],
+    )
+    @action(detail=False, methods=["patch"], permission_classes=[IsAuthenticated])
+    def bulk_update(self, request):
+        """Patch fields of many ads owned by the current user."""
+        items, error_response = self._get_bulk_items(request)
+        if error_response:
+            return error_response
+
+        ids = [self._get_bulk_item_id(item) for item in items]
+        owned = Ad.objects.filter(
+            owner=request.user,
+            id__in=[ad_id for ad_id in ids if ad_id is not None],
+        ).in_bulk()
+
+        now = timezone.now()
+        results: list[dict[str, Any]] = []
+        updated = {}
+        fields = {"updated_at"}
+        for index, item in enumerate(items):
+            ad = owned.get(ids[index]) if ids[index] is not None else None
+            if ad is None or ad.pk in updated:
+                results.append(
+                    {"index": index, "errors": {"id": ["Ad not found or duplicated."]}},
+                )
+                continue
+            serializer = AdCreateSerializer(
+                ad,
+                data=item,
+                partial=True,
+                context={"request": request},
+            )
+            if not serializer.is_valid():
+                results.append({"index": index, "errors": serializer.errors})
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(ad, field, value)
+                fields.add(field)
+            ad.updated_at = now
+            updated[ad.pk] = ad
+            results.append({"index": index, "id": ad.pk})
+
+        Ad.objects.bulk_update(updated.values(), sorted(fields))
+        publish(updated.values(), "updated")
+
+        return self._bulk_response(results, len(updated), status.HTTP_200_OK)
+
+    def _bulk_set_state(self, request, event_type, **values):
+        """Apply values to many own ads with one UPDATE."""
+        serializer = AdIdsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = serializer.validated_data["ids"]
+        updated = Ad.objects.update_owned(request.user, ids, **values)
+        publish(Ad.objects.filter(id__in=updated), event_type)
+        results = [
+            {"id": ad_id, "status": "updated" if ad_id in updated else "not_found"}
+            for ad_id in ids
+        ]
+        return self._bulk_response(results, len(updated), status.HTTP_200_OK)
+
+    @extend_schema(
+        request=AdIdsSerializer,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            207: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+        description="Mark many own ads as sold with a single update",
+        summary="Bulk Mark as Sold",
+        tags=["Ads"],
+    )
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def bulk_mark_sold(self, request):
+        """Mark many ads owned by the current user as sold."""
+        return self._bulk_set_state(request, "sold", is_sold=True)
+
+    @extend_schema(
+        request=AdIdsSerializer,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            207: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+        },
+        description="Deactivate many own ads with a single update",
+        summary="Bulk Deactivate",
+        tags=["Ads"],
+    )
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def bulk_deactivate(self, request):
+        """Deactivate many ads owned by the current user."""
+        return self._bulk_set_state(request, "updated", is_active=False)
+
+
+class AsyncAdViewSet(AsyncViewMixin, AdViewSet, AsyncGenericViewSet):
+    """AdViewSet with async list and retrieve for ASGI deployments."""
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        ads = [ad async for ad in queryset]
+        serializer = self.get_serializer(ads, many=True)
+        return Response(serializer.data)
+
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
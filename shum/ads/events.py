@@ -0,0 +1,209 @@
+"""Fan-out of ad events to streaming subscribers."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "shum_ads_events"
+
+EVENT_TYPES = ("created", "updated", "sold")
+
+
+def summarize(ad):
+    """Compact ad summary carried by events."""
+    return {
+        "id": ad.pk,
+        "title": ad.title,
+        "price": ad.price,
+        "owner": ad.owner_id,
+        "is_active": ad.is_active,
+        "is_sold": ad.is_sold,
+    }
+
+
+class Subscriber:
+    """
+    A stream consumer with simple event filters.
+
+    Events are queued on an asyncio queue of the subscriber's event loop,
+    so many subscribers can be served without a thread each.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        loop,
+        types=EVENT_TYPES,
+        owner=None,
+        min_price=None,
+        max_price=None,
+        search=None,
+    ):
+        self.types = set(types)
+        self.owner = owner
+        self.min_price = min_price
+        self.max_price = max_price
+        self.search = search.lower() if search else None
+        self.loop = loop
+        self.overflowed = False
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(settings.ADS_EVENTS_QUEUE_SIZE)
+
+    def matches(self, event):
+        ad = event["ad"]
+        price = Decimal(str(ad["price"]))
+        return (
+            event["type"] in self.types
+            and (self.owner is None or ad["owner"] == self.owner)
+            and (self.min_price is None or price >= self.min_price)
+            and (self.max_price is None or price <= self.max_price)
+            and (self.search is None or self.search in ad["title"].lower())
+        )
+
+    def put(self, event):
+        """Queue event from any thread."""
+        self.loop.call_soon_threadsafe(self._put_nowait, event)
+
+    def _put_nowait(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: tell it to catch up through delta sync instead
+            self.overflowed = True
+
+
+class Broker:
+    """Process-wide registry of subscribers fed by a single listener."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def is_full(self):
+        """Whether this process serves ADS_EVENTS_MAX_STREAMS streams already."""
+        with self._lock:
+            return len(self._subscribers) >= settings.ADS_EVENTS_MAX_STREAMS
+
+    def subscribe(self, subscriber):
+        """Add subscriber, return False if the process is full."""
+        with self._lock:
+            if len(self._subscribers) >= settings.ADS_EVENTS_MAX_STREAMS:
+                return False
+            self._subscribers.add(subscriber)
+            if settings.ADS_EVENTS_BACKEND == "postgres":
+                self._ensure_listener()
+            return True
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def deliver(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            for subscriber in subscribers:
+                if subscriber.matches(event):
+                    subscriber.put(event)
+
+    def _ensure_listener(self):
+        if self._listener is None or not self._listener.is_alive():
+            self._listener = threading.Thread(
+                target=self._listen,
+                name="ads-events-listener",
+                daemon=True,
+            )
+            self._listener.start()
+
+    def _listen(self):
+        """Deliver Postgres notifications until the process exits."""
+        while True:
+            connection = connections["default"]
+            try:
+                connection.ensure_connection()
+                raw_connection = connection.connection
+                raw_connection.execute(f"LISTEN {CHANNEL}")
+                for notify in raw_connection.notifies():
+                    self.deliver([json.loads(notify.payload)])
+            except Exception:
+                logger.exception("Ad events listener failed, reconnecting")
+                connection.close()
+                time.sleep(1)
+
+
+broker = Broker()
+
+
+def publish(ads, event_type):
+    """
+    Publish an event for each ad once the current transaction commits.
+
+    With the postgres backend events go through NOTIFY, which Postgres only
+    delivers on commit, so every process's listener receives them. The local
+    backend delivers to subscribers of this process only, and with the
+    backend off nothing is published.
+    """
+    if settings.ADS_EVENTS_BACKEND == "off":
+        return
+    events = [{"type": event_type, "ad": summarize(ad)} for ad in ads]
+    if not events:
+        return
+
+    if settings.ADS_EVENTS_BACKEND == "postgres":
+        payloads = [json.dumps(event, cls=DjangoJSONEncoder) for event in events]
+        with connections["default"].cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                [CHANNEL, payloads],
+            )
+    else:
+        transaction.on_commit(lambda: broker.deliver(events))
+
+
+def _format(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+RESET_EVENT = _format("reset", {"detail": "Too many events, resync via changes."})
+
+
+async def astream_events(**filters):
+    """
+    Yield server-sent events for an async (ASGI) response.
+
+    Only served under ASGI: a sync worker would be blocked for the whole
+    stream, up to ADS_EVENTS_MAX_STREAM_SECONDS.
+    """
+    subscriber = Subscriber(loop=asyncio.get_running_loop(), **filters)
+    if not broker.subscribe(subscriber):
+        # The last slot was taken after the view checked, reconnect later
+        yield f"retry: {settings.ADS_EVENTS_RETRY_MS}\n\n"
+        return
+    try:
+        yield f"retry: {settings.ADS_EVENTS_RETRY_MS}\n\n"
+        deadline = time.monotonic() + settings.ADS_EVENTS_MAX_STREAM_SECONDS
+        while time.monotonic() < deadline:
+            if subscriber.overflowed:
+                yield RESET_EVENT
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=settings.ADS_EVENTS_HEARTBEAT_SECONDS,
+                )
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _format(event["type"], event["ad"])
+    finally:
+        broker.unsubscribe(subscriber)
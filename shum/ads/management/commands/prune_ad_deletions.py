@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shum.ads.sync import prune_deletions
+
+
+class Command(BaseCommand):
+    help = "Delete ad tombstones older than the delta sync retention."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ADS_SYNC_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones from the last DAYS days",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tombstones deleted per statement",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        deleted = prune_deletions(before, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} ad tombstones."))
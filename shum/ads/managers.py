@@ -0,0 +1,84 @@
+from django.db import connections
+from django.db import models
+from django.db import router
+from django.db import transaction
+from django.utils import timezone
+
+
+class AdImageManager(models.Manager):
+    """Custom manager for the AdImage model."""
+
+    def reorder(self, ad, image_ids):
+        """
+        Rewrite order of ad images to match image_ids in one statement.
+
+        The position of each id in image_ids becomes its new order value.
+        Ids that don't belong to ad are left untouched.
+
+        Returns:
+            int: Number of updated rows.
+        """
+        if not image_ids:
+            return 0
+
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self.model._meta.db_table)  # noqa: SLF001
+        values = ", ".join(["(%s::bigint, %s::integer)"] * len(image_ids))
+        params = [
+            value
+            for position, image_id in enumerate(image_ids)
+            for value in (image_id, position)
+        ]
+        sql = (
+            f"UPDATE {table} AS image SET {quote_name('order')} = new.position "  # noqa: S608
+            f"FROM (VALUES {values}) AS new (id, position) "
+            "WHERE image.id = new.id AND image.ad_id = %s"
+        )
+
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [*params, ad.pk])
+            return cursor.rowcount
+
+
+class AdManager(models.Manager):
+    """Custom manager for the Ad model."""
+
+    def update_owned(self, owner, ids, **values):
+        """
+        Set values on owner's ads with the given ids in one statement.
+
+        Runs ``UPDATE ... WHERE owner_id = %s AND id = ANY(%s) RETURNING id``
+        and bumps updated_at, so ads of other owners are never touched.
+
+        Returns:
+            set: IDs of the ads that were updated.
+        """
+        if not ids:
+            return set()
+
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        opts = self.model._meta  # noqa: SLF001
+
+        values.setdefault("updated_at", timezone.now())
+        assignments = []
+        params = []
+        for name, value in values.items():
+            field = opts.get_field(name)
+            if not isinstance(field, models.Field):
+                error_message = f"{name} is not a column of {opts.label}"
+                raise TypeError(error_message)
+            assignments.append(f"{quote_name(field.column)} = %s")
+            params.append(field.get_db_prep_save(value, connection))
+
+        sql = (
+            f"UPDATE {quote_name(opts.db_table)} SET {', '.join(assignments)} "  # noqa: S608
+            "WHERE owner_id = %s AND id = ANY(%s) RETURNING id"
+        )
+
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, [*params, owner.pk, list(ids)])
+            return {row[0] for row in cursor.fetchall()}
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:23
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0001_initial_ads_models'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ad_id', models.BigIntegerField(verbose_name='Ad ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Deleted at')),
+            ],
+            options={
+                'verbose_name': 'Ad Deletion',
+                'verbose_name_plural': 'Ad Deletions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ad',
+            index=models.Index(fields=['updated_at', 'id'], name='ads_ad_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='addeletion',
+            index=models.Index(fields=['deleted_at', 'id'], name='ads_addeletion_deleted_idx'),
+        ),
+    ]
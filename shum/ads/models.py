@@ -1,7 +1,11 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .managers import AdImageManager
+from .managers import AdManager
+
 
 def ad_image_path(instance, filename):
     """Generate upload path for ad images."""
@@ -29,14 +33,25 @@ class Ad(models.Model):
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated at"), auto_now=True)
 
+    objects = AdManager()
+
     class Meta:
         verbose_name = _("Ad")
         verbose_name_plural = _("Ads")
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination for delta sync
+            models.Index(fields=["updated_at", "id"], name="ads_ad_updated_at_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def touch(self):
+        """Bump updated_at so delta sync picks up changes to related images."""
+        self.updated_at = timezone.now()
+        Ad.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+
     @property
     def main_image(self):
         """Get the first image as main image."""
@@ -71,6 +86,8 @@ class AdImage(models.Model):
     # Timestamps
     created_at = models.DateTimeField(_("Created at"), auto_now_add=True)
 
+    objects = AdImageManager()
+
     class Meta:
         verbose_name = _("Ad Image")
         verbose_name_plural = _("Ad Images")
@@ -78,3 +95,23 @@ class AdImage(models.Model):
 
     def __str__(self):
         return f"{self.ad.title} - Image {self.order}"
+
+
+class AdDeletion(models.Model):
+    """Tombstone of a deleted ad, kept for delta sync clients."""
+
+    ad_id = models.BigIntegerField(_("Ad ID"))
+    deleted_at = models.DateTimeField(_("Deleted at"), default=timezone.now)
+
+    class Meta:
+        verbose_name = _("Ad Deletion")
+        verbose_name_plural = _("Ad Deletions")
+        indexes = [
+            models.Index(
+                fields=["deleted_at", "id"],
+                name="ads_addeletion_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Ad {self.ad_id} deleted at {self.deleted_at}"
@@ -0,0 +1,143 @@
+"""Delta sync of ads for offline-capable clients."""
+
+from datetime import datetime
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import models
+from django.utils import timezone
+
+from shum.ads.models import AdDeletion
+
+CURSOR_SALT = "shum.ads.sync"
+
+
+class InvalidCursorError(Exception):
+    """Cursor is malformed or was not issued by this server."""
+
+
+class ExpiredCursorError(Exception):
+    """Cursor is older than the tombstone retention, a full resync is needed."""
+
+
+def encode_cursor(position):
+    """Sign a sync position so clients can only replay what we issued."""
+    return signing.dumps(
+        {key: [moment.isoformat(), pk] for key, (moment, pk) in position.items()},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor issued by encode_cursor.
+
+    Raises:
+        InvalidCursorError: If the cursor can't be verified.
+        ExpiredCursorError: If tombstones older than the cursor were pruned.
+    """
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+        position = {
+            key: (datetime.fromisoformat(data[key][0]), int(data[key][1]))
+            for key in ("ads", "deletions")
+        }
+    except (signing.BadSignature, KeyError, IndexError, TypeError, ValueError) as exc:
+        raise InvalidCursorError from exc
+
+    retention = timedelta(days=settings.ADS_SYNC_TOMBSTONE_RETENTION_DAYS)
+    if position["deletions"][0] < timezone.now() - retention:
+        raise ExpiredCursorError
+    return position
+
+
+def _after(queryset, field, position):
+    """Filter rows strictly after a (timestamp, id) keyset position."""
+    moment, pk = position
+    return queryset.filter(
+        models.Q(**{f"{field}__gt": moment})
+        | models.Q(**{field: moment, "id__gt": pk}),
+    )
+
+
+def get_changes(queryset, user, position=None):
+    """
+    Collect ads changed after position.
+
+    Rows younger than ADS_SYNC_SETTLE_SECONDS are left for the next call, so
+    transactions that commit late can't be skipped by an advanced cursor.
+    Without a position, returns a snapshot of the ads visible to user.
+
+    Returns:
+        tuple: (changed ads, removed entries, new position, has_more)
+    """
+    limit = settings.ADS_SYNC_PAGE_SIZE
+    upper = timezone.now() - timedelta(seconds=settings.ADS_SYNC_SETTLE_SECONDS)
+
+    ads = queryset.filter(updated_at__lte=upper).order_by("updated_at", "id")
+    deletions = AdDeletion.objects.filter(deleted_at__lte=upper).order_by(
+        "deleted_at",
+        "id",
+    )
+    if position is None:
+        visible = models.Q(is_active=True)
+        if user.is_authenticated:
+            visible |= models.Q(owner=user)
+        ads = ads.filter(visible)
+        # A fresh snapshot doesn't need tombstones of earlier deletions
+        deletions = deletions.none()
+    else:
+        ads = _after(ads, "updated_at", position["ads"])
+        deletions = _after(deletions, "deleted_at", position["deletions"])
+
+    ad_rows = list(ads[: limit + 1])
+    deletion_rows = list(deletions[: limit + 1])
+    has_more = len(ad_rows) > limit or len(deletion_rows) > limit
+
+    # Exhausted streams have been read up to the settle boundary
+    new_position = {"ads": (upper, 0), "deletions": (upper, 0)}
+    if len(ad_rows) > limit:
+        ad_rows = ad_rows[:limit]
+        new_position["ads"] = (ad_rows[-1].updated_at, ad_rows[-1].pk)
+    if len(deletion_rows) > limit:
+        deletion_rows = deletion_rows[:limit]
+        new_position["deletions"] = (
+            deletion_rows[-1].deleted_at,
+            deletion_rows[-1].pk,
+        )
+
+    changed = []
+    removed = []
+    for ad in ad_rows:
+        if ad.is_active or (user.is_authenticated and ad.owner_id == user.pk):
+            changed.append(ad)
+        else:
+            removed.append(
+                {"id": ad.pk, "reason": "deactivated", "at": ad.updated_at},
+            )
+    removed.extend(
+        {"id": deletion.ad_id, "reason": "deleted", "at": deletion.deleted_at}
+        for deletion in deletion_rows
+    )
+    return changed, removed, new_position, has_more
+
+
+def prune_deletions(before, batch_size=1000):
+    """
+    Delete tombstones older than before in batches of batch_size.
+
+    Returns:
+        int: Number of deleted tombstones.
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            AdDeletion.objects.filter(deleted_at__lt=before)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size],
+        )
+        if not ids:
+            return deleted
+        deleted += AdDeletion.objects.filter(id__in=ids).delete()[0]
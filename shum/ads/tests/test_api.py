@@ -1,14 +1,28 @@
+from io import BytesIO
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.utils import translation
+from PIL import Image
 from rest_framework import status
+from rest_framework.fields import ImageField
 from rest_framework.test import APIClient
 
 from shum.ads.models import Ad
+from shum.ads.models import AdImage
 
 User = get_user_model()
 
 
+def make_image_file(name="photo.png"):
+    """Build a small in-memory PNG upload."""
+    buffer = BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
 @pytest.mark.django_db
 class TestAdAPI:
     def test_list_ads_anonymous(self):
@@ -139,3 +153,374 @@ class TestAdAPI:
         # Verify in database
         ad.refresh_from_db()
         assert ad.is_sold is True
+
+    def test_upload_images_batch(self):
+        """Batch upload creates valid images and reports per-file errors."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-upload-images", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {
+                "images": [
+                    make_image_file("front.png"),
+                    SimpleUploadedFile("notes.txt", b"not an image"),
+                    make_image_file("back.png"),
+                ],
+                "alt_text": ["Front", "Notes", "Back"],
+            },
+            format="multipart",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        results = response.data["results"]
+        assert [result["index"] for result in results] == [0, 1, 2]
+        assert "image" in results[1]["errors"]
+        assert results[0]["image"]["alt_text"] == "Front"
+        assert results[2]["image"]["alt_text"] == "Back"
+
+        images = list(AdImage.objects.filter(ad=ad))
+        assert [image.order for image in images] == [0, 1]
+        assert all(image.image.storage.exists(image.image.name) for image in images)
+
+    def test_upload_images_invalid_alt_text(self):
+        """An alt text over the column length fails its file, not the batch."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-upload-images", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {
+                "images": [make_image_file("front.png"), make_image_file("back.png")],
+                "alt_text": ["x" * 256, "Back"],
+            },
+            format="multipart",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        results = response.data["results"]
+        assert "alt_text" in results[0]["errors"]
+        assert results[1]["image"]["alt_text"] == "Back"
+        assert AdImage.objects.filter(ad=ad).count() == 1
+
+    def test_upload_images_errors_use_request_language(self):
+        """Per-file errors are translated like the rest of the response."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-upload-images", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {
+                "images": [
+                    make_image_file("front.png"),
+                    SimpleUploadedFile("notes.txt", b"not an image"),
+                ],
+            },
+            format="multipart",
+            HTTP_ACCEPT_LANGUAGE="de",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        with translation.override("de"):
+            expected = str(ImageField.default_error_messages["invalid_image"])
+        with translation.override("en"):
+            assert expected != str(ImageField.default_error_messages["invalid_image"])
+        assert response.data["results"][1]["errors"]["image"] == [expected]
+
+    def test_upload_images_other_owner_forbidden(self):
+        """Users cannot batch upload images to someone else's ad."""
+        owner = User.objects.create_user(
+            email="owner@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        other = User.objects.create_user(
+            email="other@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=owner, price="30.00")
+
+        client = APIClient()
+        client.force_authenticate(user=other)
+
+        url = reverse("api:ad-upload-images", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {"images": [make_image_file()]},
+            format="multipart",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not AdImage.objects.exists()
+
+    def test_upload_images_too_many_files(self, settings):
+        """Batch upload enforces the configured file limit."""
+        settings.ADS_IMAGE_BATCH_MAX_FILES = 1
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-upload-images", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {"images": [make_image_file("a.png"), make_image_file("b.png")]},
+            format="multipart",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not AdImage.objects.exists()
+
+    def test_reorder_images(self):
+        """Reorder rewrites the order of every image of the ad."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+        first = AdImage.objects.create(ad=ad, order=0)
+        second = AdImage.objects.create(ad=ad, order=1)
+        third = AdImage.objects.create(ad=ad, order=2)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-reorder", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {"image_ids": [third.pk, first.pk, second.pk]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [image["id"] for image in response.data] == [
+            third.pk,
+            first.pk,
+            second.pk,
+        ]
+        assert [image["order"] for image in response.data] == [0, 1, 2]
+
+    def test_reorder_images_requires_all_ids(self):
+        """Reorder rejects lists that don't match the ad's images."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="30.00")
+        other_ad = Ad.objects.create(title="Other Ad", owner=user, price="30.00")
+        image = AdImage.objects.create(ad=ad, order=0)
+        foreign_image = AdImage.objects.create(ad=other_ad, order=0)
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-reorder", kwargs={"pk": ad.pk})
+        response = client.post(
+            url,
+            {"image_ids": [foreign_image.pk, image.pk]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        foreign_image.refresh_from_db()
+        assert foreign_image.order == 0
+
+    def test_bulk_create_ads(self):
+        """Bulk create inserts valid ads and reports invalid items."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-bulk-create")
+        response = client.post(
+            url,
+            [
+                {"title": "First", "price": "10.00"},
+                {"title": "Broken"},
+                {"title": "Second", "price": "20.00", "is_active": False},
+            ],
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        results = response.data["results"]
+        assert "price" in results[1]["errors"]
+        created = Ad.objects.filter(owner=user).order_by("id")
+        assert [ad.title for ad in created] == ["First", "Second"]
+        assert [results[0]["id"], results[2]["id"]] == [ad.id for ad in created]
+        assert created[1].is_active is False
+
+    def test_bulk_update_ads(self):
+        """Bulk update patches only the current user's ads."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        other = User.objects.create_user(
+            email="other@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        own_ad = Ad.objects.create(title="Own", owner=user, price="10.00")
+        other_ad = Ad.objects.create(title="Other", owner=other, price="10.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        url = reverse("api:ad-bulk-update")
+        response = client.patch(
+            url,
+            [
+                {"id": own_ad.id, "price": "12.50"},
+                {"id": other_ad.id, "title": "Hijacked"},
+            ],
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert response.data["results"][0] == {"index": 0, "id": own_ad.id}
+        assert "id" in response.data["results"][1]["errors"]
+        own_ad.refresh_from_db()
+        other_ad.refresh_from_db()
+        assert str(own_ad.price) == "12.50"
+        assert other_ad.title == "Other"
+
+    def test_bulk_update_invalid_ids(self):
+        """Items with a missing or non-integer id are reported, not a 500."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Own", owner=user, price="10.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.patch(
+            reverse("api:ad-bulk-update"),
+            [{"id": [ad.id]}, {"id": {"pk": ad.id}}, {"id": True}, {"title": "No id"}],
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert all("id" in result["errors"] for result in response.data["results"])
+        ad.refresh_from_db()
+        assert ad.title == "Own"
+
+    def test_bulk_mark_sold_and_deactivate(self):
+        """Bulk state changes only apply to the current user's ads."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        other = User.objects.create_user(
+            email="other@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        own_ads = [
+            Ad.objects.create(title=f"Own {i}", owner=user, price="10.00")
+            for i in range(2)
+        ]
+        other_ad = Ad.objects.create(title="Other", owner=other, price="10.00")
+        ids = [ad.id for ad in own_ads] + [other_ad.id]
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse("api:ad-bulk-mark-sold"),
+            {"ids": ids},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        assert [result["status"] for result in response.data["results"]] == [
+            "updated",
+            "updated",
+            "not_found",
+        ]
+
+        response = client.post(
+            reverse("api:ad-bulk-deactivate"),
+            {"ids": [ad.id for ad in own_ads]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        for ad in own_ads:
+            ad.refresh_from_db()
+            assert ad.is_sold is True
+            assert ad.is_active is False
+        other_ad.refresh_from_db()
+        assert other_ad.is_sold is False
+        assert other_ad.is_active is True
+
+    def test_batch_get_ads(self, django_assert_max_num_queries):
+        """Batch get keeps requested order and reports hidden/missing ads."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        first = Ad.objects.create(title="First", owner=user, price="10.00")
+        second = Ad.objects.create(title="Second", owner=user, price="20.00")
+        hidden = Ad.objects.create(
+            title="Hidden",
+            owner=user,
+            price="30.00",
+            is_active=False,
+        )
+        for ad in (first, second):
+            AdImage.objects.create(ad=ad, image=f"ads/ad_{ad.id}/photo.png")
+
+        client = APIClient()
+        url = reverse("api:ad-batch")
+        ids = f"{second.id},{hidden.id},{first.id},999999"
+
+        # Ads + prefetched images, plus the ATOMIC_REQUESTS savepoint pair
+        with django_assert_max_num_queries(4):
+            response = client.get(url, {"ids": ids})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [ad["id"] for ad in response.data["results"]] == [second.id, first.id]
+        assert response.data["missing"] == [hidden.id, 999999]
+
+        # Owners also see their inactive ads, like retrieve does
+        client.force_authenticate(user=user)
+        response = client.get(url, {"ids": str(hidden.id)})
+        assert [ad["id"] for ad in response.data["results"]] == [hidden.id]
+
+    def test_batch_get_ads_limit(self, settings):
+        """Batch get enforces the configured upper bound."""
+        settings.ADS_BATCH_FETCH_MAX_IDS = 2
+
+        client = APIClient()
+        response = client.get(reverse("api:ad-batch"), {"ids": "1,2,3"})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "ids" in response.data
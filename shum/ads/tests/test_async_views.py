@@ -0,0 +1,74 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
+
+from shum.ads.api.views import AsyncAdViewSet
+from shum.ads.models import Ad
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAsyncAdViewSet:
+    @pytest.fixture
+    def owner(self):
+        return User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+    def test_view_is_async_and_non_atomic(self):
+        """Django can't wrap async views in ATOMIC_REQUESTS."""
+        view = AsyncAdViewSet.as_view({"get": "list"})
+
+        assert AsyncAdViewSet.view_is_async
+        assert view._non_atomic_requests  # noqa: SLF001
+
+    def test_list(self, owner):
+        """Async list returns the same active ads as the sync view."""
+        Ad.objects.create(title="Active Ad", owner=owner, price="10.00")
+        Ad.objects.create(
+            title="Inactive Ad",
+            owner=owner,
+            price="20.00",
+            is_active=False,
+        )
+
+        request = APIRequestFactory().get("/api/ads/")
+        view = AsyncAdViewSet.as_view({"get": "list"})
+        response = async_to_sync(view)(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [ad["title"] for ad in response.data] == ["Active Ad"]
+
+    def test_retrieve(self, owner):
+        """Async retrieve fetches the ad, missing ads are 404."""
+        ad = Ad.objects.create(title="Test Ad", owner=owner, price="10.00")
+        view = AsyncAdViewSet.as_view({"get": "retrieve"})
+
+        request = APIRequestFactory().get(f"/api/ads/{ad.pk}/")
+        response = async_to_sync(view)(request, pk=ad.pk)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["title"] == "Test Ad"
+
+        request = APIRequestFactory().get("/api/ads/0/")
+        response = async_to_sync(view)(request, pk=0)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_sync_actions_still_work(self, owner):
+        """Writes keep their sync handlers inside a transaction."""
+        request = APIRequestFactory().post(
+            "/api/ads/",
+            {"title": "New Ad", "price": "15.00"},
+            format="json",
+        )
+        force_authenticate(request, user=owner)
+
+        view = AsyncAdViewSet.as_view({"post": "create"})
+        response = async_to_sync(view)(request)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Ad.objects.filter(owner=owner, title="New Ad").exists()
@@ -0,0 +1,170 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.ads.events import Subscriber
+from shum.ads.events import astream_events
+from shum.ads.events import broker
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _short_heartbeat(settings):
+    settings.ADS_EVENTS_HEARTBEAT_SECONDS = 1
+
+
+def make_event(event_type="created", **ad):
+    return {
+        "type": event_type,
+        "ad": {
+            "id": 1,
+            "title": "Road bike",
+            "price": "100.00",
+            "owner": 1,
+            "is_active": True,
+            "is_sold": False,
+            **ad,
+        },
+    }
+
+
+class TestSubscriber:
+    def test_matches_filters(self):
+        subscriber = Subscriber(
+            loop=None,
+            types=["sold"],
+            owner=1,
+            min_price=Decimal(50),
+            max_price=Decimal(150),
+            search="bike",
+        )
+
+        assert subscriber.matches(make_event("sold"))
+        assert not subscriber.matches(make_event("created"))
+        assert not subscriber.matches(make_event("sold", owner=2))
+        assert not subscriber.matches(make_event("sold", price="200.00"))
+        assert not subscriber.matches(make_event("sold", title="Sofa"))
+
+    def test_overflow_flags_subscriber(self, settings):
+        settings.ADS_EVENTS_QUEUE_SIZE = 1
+
+        async def overflow():
+            subscriber = Subscriber(loop=asyncio.get_running_loop())
+            subscriber.put(make_event())
+            subscriber.put(make_event())
+            await asyncio.sleep(0)
+            return subscriber
+
+        assert asyncio.run(overflow()).overflowed is True
+
+    def test_async_stream_delivers_across_threads(self):
+        async def consume():
+            stream = astream_events()
+            assert (await anext(stream)).startswith("retry:")
+            await asyncio.to_thread(broker.deliver, [make_event()])
+            event = await anext(stream)
+            await stream.aclose()
+            return event
+
+        event = asyncio.run(consume())
+
+        assert event.startswith("event: created\n")
+        assert '"title": "Road bike"' in event
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAdEventsAPI:
+    async def get(self, **params):
+        return await AsyncClient().get(
+            reverse("api:ad-events"),
+            params,
+            headers={"accept": "text/event-stream"},
+        )
+
+    def test_stream_receives_sold_event(self):
+        async def consume():
+            response = await self.get(types="sold")
+            assert response.status_code == status.HTTP_200_OK
+            assert response["Content-Type"] == "text/event-stream"
+            stream = aiter(response.streaming_content)
+            assert (await anext(stream)).startswith(b"retry:")
+
+            await asyncio.to_thread(
+                broker.deliver,
+                [make_event("created"), make_event("sold", id=7)],
+            )
+            event = await anext(stream)
+            await stream.aclose()
+            return event
+
+        event = asyncio.run(consume())
+
+        assert event.startswith(b"event: sold\n")
+        assert b'"id": 7' in event
+
+    def test_stream_rejects_unknown_types(self):
+        response = asyncio.run(self.get(types="deleted"))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_stream_is_not_served_under_wsgi(self):
+        """A sync worker would be blocked for the whole stream."""
+        response = APIClient().get(
+            reverse("api:ad-events"),
+            HTTP_ACCEPT="text/event-stream",
+        )
+
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+    def test_streams_are_capped(self, settings):
+        settings.ADS_EVENTS_MAX_STREAMS = 0
+
+        response = asyncio.run(self.get())
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "5"
+
+    def test_retry_after_is_at_least_a_second(self, settings):
+        settings.ADS_EVENTS_MAX_STREAMS = 0
+        settings.ADS_EVENTS_RETRY_MS = 500
+
+        response = asyncio.run(self.get())
+
+        assert response["Retry-After"] == "1"
+
+    def test_stream_is_off_by_default(self, settings):
+        settings.ADS_EVENTS_BACKEND = "off"
+
+        response = asyncio.run(self.get())
+
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+    def test_writes_publish_nothing_when_off(self, settings, monkeypatch):
+        """No NOTIFY nor local delivery without an events backend."""
+        settings.ADS_EVENTS_BACKEND = "off"
+        user = User.objects.create_user(
+            email="seller@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        monkeypatch.setattr(broker, "deliver", pytest.fail)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                reverse("api:ad-list"),
+                {"title": "Road bike", "price": "100.00"},
+                format="json",
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert not any("pg_notify" in query["sql"] for query in queries)
@@ -1,5 +1,7 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from shum.ads.models import Ad
 from shum.ads.models import AdImage
@@ -79,3 +81,27 @@ class TestAdImageModel:
         assert image.alt_text == "Test image"
         assert image.order == 1
         assert str(image) == "Test Ad - Image 1"
+
+    def test_reorder_uses_single_update(self):
+        """Manager reorder rewrites all positions in one statement."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        ad = Ad.objects.create(title="Test Ad", owner=user, price="25.00")
+        images = [AdImage.objects.create(ad=ad, order=i) for i in range(3)]
+
+        new_order = [images[2].pk, images[0].pk, images[1].pk]
+        with CaptureQueriesContext(connection) as queries:
+            updated = AdImage.objects.reorder(ad, new_order)
+
+        statements = [
+            query["sql"]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        assert len(statements) == 1
+        assert statements[0].startswith("UPDATE")
+
+        assert updated == len(images)
+        assert list(ad.images.values_list("id", flat=True)) == new_order
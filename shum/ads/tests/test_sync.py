@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.ads.models import Ad
+from shum.ads.models import AdDeletion
+from shum.ads.sync import encode_cursor
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def _no_settle_delay(settings):
+    settings.ADS_SYNC_SETTLE_SECONDS = 0
+
+
+@pytest.mark.django_db
+class TestAdChangesAPI:
+    def test_snapshot_then_delta(self):
+        """A snapshot cursor only returns later changes and tombstones."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        kept = Ad.objects.create(title="Kept", owner=user, price="10.00")
+        updated = Ad.objects.create(title="Updated", owner=user, price="10.00")
+        deleted = Ad.objects.create(title="Deleted", owner=user, price="10.00")
+        deactivated = Ad.objects.create(title="Off", owner=user, price="10.00")
+
+        client = APIClient()
+        url = reverse("api:ad-changes")
+        response = client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {ad["id"] for ad in response.data["changed"]} == {
+            kept.id,
+            updated.id,
+            deleted.id,
+            deactivated.id,
+        }
+        assert response.data["removed"] == []
+        cursor = response.data["cursor"]
+
+        updated.title = "Updated again"
+        updated.save()
+        deactivated.is_active = False
+        deactivated.save()
+        client.force_authenticate(user=user)
+        client.delete(reverse("api:ad-detail", kwargs={"pk": deleted.id}))
+        client.force_authenticate(user=None)
+
+        response = client.get(url, {"since": cursor})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [ad["title"] for ad in response.data["changed"]] == ["Updated again"]
+        assert {
+            (entry["id"], entry["reason"]) for entry in response.data["removed"]
+        } == {(deactivated.id, "deactivated"), (deleted.id, "deleted")}
+        assert response.data["has_more"] is False
+
+        response = client.get(url, {"since": response.data["cursor"]})
+        assert response.data["changed"] == []
+        assert response.data["removed"] == []
+
+    def test_pages_with_has_more(self, settings):
+        """Large change sets are paged by keyset on updated_at."""
+        settings.ADS_SYNC_PAGE_SIZE = 2
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        for i in range(3):
+            Ad.objects.create(title=f"Ad {i}", owner=user, price="10.00")
+
+        client = APIClient()
+        url = reverse("api:ad-changes")
+        first = client.get(url)
+        second = client.get(url, {"since": first.data["cursor"]})
+
+        assert first.data["has_more"] is True
+        assert second.data["has_more"] is False
+        titles = [ad["title"] for ad in first.data["changed"]]
+        titles += [ad["title"] for ad in second.data["changed"]]
+        assert titles == ["Ad 0", "Ad 1", "Ad 2"]
+
+    def test_invalid_and_expired_cursor(self, settings):
+        """Forged cursors are rejected and stale ones require a resync."""
+        client = APIClient()
+        url = reverse("api:ad-changes")
+
+        response = client.get(url, {"since": "forged"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        stale = timezone.now() - timedelta(
+            days=settings.ADS_SYNC_TOMBSTONE_RETENTION_DAYS + 1,
+        )
+        cursor = encode_cursor({"ads": (stale, 0), "deletions": (stale, 0)})
+        response = client.get(url, {"since": cursor})
+        assert response.status_code == status.HTTP_410_GONE
+
+
+@pytest.mark.django_db
+def test_prune_ad_deletions_command():
+    """Pruning only removes tombstones older than the retention."""
+    old = AdDeletion.objects.create(
+        ad_id=1,
+        deleted_at=timezone.now() - timedelta(days=60),
+    )
+    recent = AdDeletion.objects.create(ad_id=2)
+
+    call_command("prune_ad_deletions", "--days=30", "--batch-size=1")
+
+    assert not AdDeletion.objects.filter(pk=old.pk).exists()
+    assert AdDeletion.objects.filter(pk=recent.pk).exists()
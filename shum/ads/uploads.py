@@ -0,0 +1,121 @@
+"""Batch image upload helpers for ads."""
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import translation
+from rest_framework import serializers
+
+from shum.ads.api.serializers import AdImageSerializer
+from shum.ads.models import AdImage
+
+
+def _run_field(field, value):
+    """Return (validated value, None) or (None, error messages)."""
+    try:
+        return field.run_validation(value), None
+    except serializers.ValidationError as exc:
+        return None, exc.detail
+    except DjangoValidationError as exc:
+        return None, exc.messages
+
+
+def _validate_image(uploaded_file, alt_text, language):
+    """Validate a file and its alt text, returning (file, alt_text, errors)."""
+    # Pool threads don't inherit the request's language
+    with translation.override(language):
+        uploaded_file, image_errors = _run_field(
+            serializers.ImageField(),
+            uploaded_file,
+        )
+        # The same rules as single image uploads, e.g. the column's max_length
+        alt_text_field = AdImageSerializer().fields["alt_text"]
+        alt_text, alt_text_errors = _run_field(alt_text_field, alt_text)
+    errors = {
+        name: field_errors
+        for name, field_errors in [
+            ("image", image_errors),
+            ("alt_text", alt_text_errors),
+        ]
+        if field_errors is not None
+    }
+    return uploaded_file, alt_text, errors or None
+
+
+def _store_image(ad_image, uploaded_file):
+    """Push file to storage and point ad_image at the stored name."""
+    field = ad_image.image.field
+    name = field.generate_filename(ad_image, uploaded_file.name)
+    ad_image.image.name = field.storage.save(
+        name,
+        uploaded_file,
+        max_length=field.max_length,
+    )
+    return ad_image
+
+
+def _delete_stored(ad_images):
+    """Remove already stored files so a failed batch leaves no orphans."""
+    for ad_image in ad_images:
+        ad_image.image.storage.delete(ad_image.image.name)
+
+
+def upload_ad_images(ad, files, alt_texts=()):
+    """
+    Validate, store and create images for ad in one batch.
+
+    Files are validated concurrently, pushed to storage through a bounded
+    thread pool and persisted with a single bulk_create.
+
+    Returns:
+        list: Per-file results in request order. Each item has "index",
+              "name" and either "image" (created AdImage) or "errors".
+    """
+    results = [{"index": index, "name": f.name} for index, f in enumerate(files)]
+    alt_texts = [
+        alt_texts[index] if index < len(alt_texts) else ""
+        for index in range(len(files))
+    ]
+
+    with ThreadPoolExecutor(max_workers=settings.ADS_IMAGE_UPLOAD_WORKERS) as pool:
+        language = translation.get_language()
+        validated = list(
+            pool.map(_validate_image, files, alt_texts, repeat(language)),
+        )
+
+        next_order = (
+            ad.images.order_by("-order").values_list("order", flat=True).first()
+        )
+        next_order = 0 if next_order is None else next_order + 1
+
+        pending = []
+        for index, (uploaded_file, alt_text, errors) in enumerate(validated):
+            if errors is not None:
+                results[index]["errors"] = errors
+                continue
+            ad_image = AdImage(ad=ad, alt_text=alt_text, order=next_order)
+            next_order += 1
+            pending.append((index, pool.submit(_store_image, ad_image, uploaded_file)))
+
+    stored = [future.result() for _index, future in pending if not future.exception()]
+    failures = [
+        exception
+        for _index, future in pending
+        if (exception := future.exception()) is not None
+    ]
+    if failures:
+        _delete_stored(stored)
+        raise failures[0]
+
+    try:
+        AdImage.objects.bulk_create(stored)
+    except Exception:
+        _delete_stored(stored)
+        raise
+
+    for index, future in pending:
+        results[index]["image"] = future.result()
+
+    return results
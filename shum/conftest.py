@@ -1,5 +1,6 @@
 import pytest
 
+from shum.core.throttling import buckets
 from shum.users.models import User
 from shum.users.tests.factories import UserFactory
 
@@ -9,6 +10,11 @@ def _media_storage(settings, tmpdir) -> None:
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def _throttle_buckets():
+    buckets.reset()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -0,0 +1,29 @@
+from inspect import iscoroutinefunction
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db import transaction
+from django.utils.decorators import classonlymethod
+
+
+class AsyncViewMixin:
+    """
+    Serve an adrf view with async handlers under ASGI.
+
+    Django refuses to apply ATOMIC_REQUESTS to async views, so the view opts
+    out of it and the handlers that are still sync run inside a transaction
+    instead, which keeps the behavior of the sync views.
+    """
+
+    @classonlymethod
+    def as_view(cls, *args, **kwargs):  # noqa: N805
+        view = super().as_view(*args, **kwargs)  # type: ignore[misc]
+        return transaction.non_atomic_requests(view)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)  # type: ignore[misc]
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        atomic_requests = connections[DEFAULT_DB_ALIAS].settings_dict["ATOMIC_REQUESTS"]
+        if handler and atomic_requests and not iscoroutinefunction(handler):
+            setattr(self, method, transaction.atomic(handler))
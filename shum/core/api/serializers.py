@@ -0,0 +1,43 @@
+from django.conf import settings
+from rest_framework import serializers
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    """Serializer for a single sub-request of a batch."""
+
+    method = serializers.ChoiceField(
+        choices=["GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"],
+        default="GET",
+        help_text="HTTP method of the sub-request",
+    )
+    path = serializers.RegexField(
+        r"^/api/",
+        max_length=2048,
+        help_text="API path including query string, e.g. /api/ads/?page=2",
+    )
+    body = serializers.JSONField(
+        required=False,
+        help_text="JSON body of the sub-request",
+    )
+
+    def validate_method(self, value):
+        return value.upper()
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for a batch of API sub-requests."""
+
+    requests = BatchSubRequestSerializer(
+        many=True,
+        allow_empty=False,
+        help_text="Sub-requests to run, results are returned in the same order",
+    )
+
+    def validate_requests(self, value):
+        max_requests = settings.BATCH_MAX_REQUESTS
+        if len(value) > max_requests:
+            error_message = (
+                f"Ensure this field has no more than {max_requests} requests."
+            )
+            raise serializers.ValidationError(error_message)
+        return value
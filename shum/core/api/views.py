@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db import connections
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from drf_spectacular.openapi import OpenApiTypes
+from drf_spectacular.utils import OpenApiExample
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from shum.core import metrics
+from shum.core.batch import dispatch_batch
+from shum.core.db import check_database
+from shum.core.db import get_pool_stats
+from shum.core.limits import limiter
+
+from .serializers import BatchSerializer
+
+
+@extend_schema(
+    request=BatchSerializer,
+    responses={
+        200: OpenApiTypes.OBJECT,
+        400: OpenApiTypes.OBJECT,
+        413: OpenApiTypes.OBJECT,
+    },
+    description=(
+        "Run several API requests in one round trip as the current user. "
+        "Read-only batches run concurrently; batches with writes run in order."
+    ),
+    summary="Batch Requests",
+    tags=["Batch"],
+    examples=[
+        OpenApiExample(
+            "App Startup",
+            value={
+                "requests": [
+                    {"method": "GET", "path": "/api/auth/profile/"},
+                    {"method": "GET", "path": "/api/ads/my_ads/"},
+                    {"method": "GET", "path": "/api/ads/"},
+                ],
+            },
+            request_only=True,
+        ),
+        OpenApiExample(
+            "Batch Response",
+            value={
+                "responses": [
+                    {"status": 200, "headers": {}, "body": {"id": 1}},
+                    {"status": 200, "headers": {}, "body": []},
+                    {"status": 200, "headers": {}, "body": []},
+                ],
+            },
+            response_only=True,
+        ),
+    ],
+)
+class BatchView(APIView):
+    """Run several API sub-requests in one request."""
+
+    permission_classes = [AllowAny]
+    # Sub-requests can't target the batch endpoint itself
+    batchable = False
+    # Only sub-requests that write pin the client to the primary
+    pins_to_primary = False
+
+    def post(self, request):
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response(
+                {"detail": "Invalid Content-Length header."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if content_length > settings.BATCH_MAX_REQUEST_SIZE:
+            return Response(
+                {"detail": "Batch request body is too large."},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        serializer = BatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        responses, cookies = dispatch_batch(
+            request,
+            serializer.validated_data["requests"],
+        )
+        response = Response({"responses": responses}, status=status.HTTP_200_OK)
+        response.cookies.update(cookies)
+        return response
+
+
+@extend_schema(
+    responses={200: OpenApiTypes.OBJECT, 503: OpenApiTypes.OBJECT},
+    description=(
+        "Check that every configured database answers a query. "
+        "Staff users also get the connection pool stats, metrics and in-flight "
+        "requests of the serving process."
+    ),
+    summary="Health Check",
+    tags=["Health"],
+)
+# ATOMIC_REQUESTS would need the database before the view can report it down
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class HealthView(APIView):
+    """Report database health and, for staff, pool stats and metrics."""
+
+    permission_classes = [AllowAny]
+    batchable = False
+
+    def get(self, request):
+        databases = {alias: check_database(alias) for alias in connections}
+        healthy = all(databases.values())
+        data = {
+            "status": "ok" if healthy else "unavailable",
+            "databases": {
+                alias: "ok" if ok else "unavailable" for alias, ok in databases.items()
+            },
+        }
+        if request.user.is_staff:
+            data["pools"] = {
+                alias: get_pool_stats(connections[alias]) for alias in connections
+            }
+            data["metrics"] = metrics.snapshot()
+            data["in_flight"] = limiter.snapshot()
+        return Response(
+            data,
+            status=status.HTTP_200_OK
+            if healthy
+            else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
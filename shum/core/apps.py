@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class CoreConfig(AppConfig):
+    name = "shum.core"
+    verbose_name = _("Core")
+
+    def ready(self):
+        import shum.core.checks  # noqa: F401, PLC0415
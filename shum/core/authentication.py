@@ -0,0 +1,23 @@
+"""Authentication of batch sub-requests, see shum.core.batch."""
+
+from rest_framework.authentication import BaseAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+class BatchAuthentication(BaseAuthentication):
+    """
+    Authenticate sub-requests as the user of their batch request.
+
+    Only requests built by shum.core.batch.dispatch carry a batch user,
+    others are left to the next authentication class.
+    """
+
+    def authenticate(self, request):
+        user = getattr(request, "batch_user", None)
+        if user is None:
+            return None
+        return user, getattr(request, "batch_auth", None)
+
+    def authenticate_header(self, request):
+        # DRF challenges with the first class, keep the JWT one for 401s
+        return JWTAuthentication().authenticate_header(request)
@@ -0,0 +1,244 @@
+"""Dispatch batched sub-requests through the DRF view stack."""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from inspect import isawaitable
+from io import BytesIO
+from typing import TYPE_CHECKING
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import Resolver404
+from django.urls import resolve
+from django.utils import translation
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.views import APIView
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Set in the WSGI environ of sub-requests
+BATCH_ENVIRON_KEY = "shum.batch"
+
+# Middleware that applies per-view profiles, run again for each sub-request.
+# The batch request itself already went through the rest of MIDDLEWARE.
+SUB_REQUEST_MIDDLEWARE = (
+    "shum.core.middleware.LoadSheddingMiddleware",
+    "shum.core.middleware.ReplicaMiddleware",
+    "shum.core.middleware.DatabaseTimeoutMiddleware",
+)
+
+
+class SubRequestHandler:
+    """
+    Run sub-requests through SUB_REQUEST_MIDDLEWARE, in MIDDLEWARE order.
+
+    Like Django's handler, process_view hooks run before the view and
+    process_exception hooks turn its exceptions into responses.
+    """
+
+    def __init__(self):
+        self.view_hooks: list[Callable] = []
+        self.exception_hooks: list[Callable] = []
+        handler: Callable = self.run_view
+        paths = [path for path in settings.MIDDLEWARE if path in SUB_REQUEST_MIDDLEWARE]
+        for path in reversed(paths):
+            try:
+                middleware = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, "process_view"):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, "process_exception"):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = middleware
+        self.handler = handler
+
+    def __call__(self, request):
+        return self.handler(request)
+
+    def run_view(self, request):
+        match = request.resolver_match
+        for hook in self.view_hooks:
+            response = hook(request, match.func, match.args, match.kwargs)
+            if response is not None:
+                return response
+        try:
+            response = match.func(request, *match.args, **match.kwargs)
+            if isawaitable(response):
+                # Async views (ASYNC_API_VIEWS) are driven to completion here
+                response = async_to_sync(_await)(response)
+        except Exception as exception:
+            for hook in self.exception_hooks:
+                response = hook(request, exception)
+                if response is not None:
+                    return response
+            raise
+        return response
+
+
+def _build_request(request, method, path, body):
+    """Build a WSGI request for a sub-request, inheriting the outer request."""
+    url = urlsplit(path)
+    payload = b"" if body is None else json.dumps(body, cls=DjangoJSONEncoder).encode()
+
+    environ = dict(request.META)
+    environ.setdefault("wsgi.url_scheme", request.scheme)
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": unquote(url.path),
+            "QUERY_STRING": url.query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(payload)),
+            "wsgi.input": BytesIO(payload),
+            BATCH_ENVIRON_KEY: True,
+        },
+    )
+    # The batch request already passed the queue budget, its sub-requests
+    # must not be shed for the time earlier ones took
+    environ.pop("HTTP_X_REQUEST_START", None)
+    return WSGIRequest(environ)
+
+
+def _not_found():
+    return {
+        "status": status.HTTP_404_NOT_FOUND,
+        "headers": {},
+        "body": {"detail": "Not found."},
+    }
+
+
+def _body(response):
+    """Body of a sub-response, as data to embed in the batch response."""
+    if hasattr(response, "data"):
+        return response.data
+    # Responses of middleware, e.g. when a sub-request is shed
+    if isinstance(response, JsonResponse):
+        return json.loads(response.content)
+    return None
+
+
+def dispatch(request, item, cookies):
+    """
+    Run a single sub-request and return its status, headers and body.
+
+    Cookies the sub-response sets, e.g. the replica pin of a write, are
+    added to cookies for the batch response.
+
+    Only DRF views can be targeted. The sub-request is authenticated as the
+    user of the outer request (see shum.core.authentication) instead of re-running
+    authentication, and gets the load shedding, replica and database timeout
+    profiles of its view.
+    """
+    sub_request = _build_request(
+        request,
+        item["method"],
+        item["path"],
+        item.get("body"),
+    )
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return _not_found()
+
+    view_class = getattr(match.func, "cls", None)
+    if (
+        view_class is None
+        or not issubclass(view_class, APIView)
+        or getattr(view_class, "batchable", True) is False
+    ):
+        return _not_found()
+
+    sub_request.resolver_match = match
+    if request.user.is_authenticated:
+        sub_request.batch_user = request.user
+        sub_request.batch_auth = request.auth
+
+    try:
+        response = SubRequestHandler()(sub_request)
+    except Exception:
+        logger.exception(
+            "Batch sub-request failed: %s %s",
+            item["method"],
+            item["path"],
+        )
+        return {
+            "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+            "headers": {},
+            "body": {"detail": "Internal server error."},
+        }
+
+    cookies.update(response.cookies)
+    return {
+        "status": response.status_code,
+        # Bodies are embedded as JSON, the unrendered Content-Type is meaningless
+        "headers": {
+            name: value
+            for name, value in response.items()
+            if name.lower() != "content-type"
+        },
+        "body": _body(response),
+    }
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def _dispatch_in_thread(request, item, cookies, language):
+    """Dispatch from a worker thread, releasing its DB connections afterwards."""
+    try:
+        with translation.override(language):
+            return dispatch(request, item, cookies)
+    finally:
+        connections.close_all()
+
+
+def _dispatch_atomic(request, item, cookies):
+    """Dispatch so a failed write only rolls back its own changes."""
+    with transaction.atomic():
+        result = dispatch(request, item, cookies)
+        if status.is_server_error(result["status"]):
+            transaction.set_rollback(True)
+        return result
+
+
+def dispatch_batch(request, items):
+    """
+    Dispatch sub-requests, return their results in request order and the
+    cookies their responses set.
+
+    When every sub-request is a read they run concurrently on a bounded
+    thread pool. Batches with writes run in order, each sub-request in its
+    own savepoint, so later reads see earlier writes.
+    """
+    cookies: SimpleCookie = SimpleCookie()
+    workers = min(settings.BATCH_MAX_WORKERS, len(items))
+    if workers > 1 and all(item["method"] in SAFE_METHODS for item in items):
+        language = translation.get_language()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    lambda item: _dispatch_in_thread(request, item, cookies, language),
+                    items,
+                ),
+            )
+        return results, cookies
+
+    return [_dispatch_atomic(request, item, cookies) for item in items], cookies
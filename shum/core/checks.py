@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error
+from django.core.checks import register
+
+WEB_ONLY_MIDDLEWARE = "shum.core.middleware.WebOnlyMiddleware"
+
+# Required by the admin, whose own checks (admin.E408-E410) are silenced
+# because they only look at MIDDLEWARE
+ADMIN_MIDDLEWARE = (
+    ("admin.E408", "django.contrib.auth.middleware.AuthenticationMiddleware"),
+    ("admin.E409", "django.contrib.messages.middleware.MessageMiddleware"),
+    ("admin.E410", "django.contrib.sessions.middleware.SessionMiddleware"),
+)
+
+
+@register()
+def check_web_only_middleware(app_configs, **kwargs):
+    """Admin middleware must run, directly or through WebOnlyMiddleware."""
+    available = list(settings.MIDDLEWARE)
+    if WEB_ONLY_MIDDLEWARE in available:
+        available += settings.WEB_ONLY_MIDDLEWARE
+    return [
+        Error(
+            f"'{middleware}' must be in MIDDLEWARE or WEB_ONLY_MIDDLEWARE in "
+            "order to use the admin application.",
+            id=f"core.{check_id.split('.')[1]}",
+        )
+        for check_id, middleware in ADMIN_MIDDLEWARE
+        if middleware not in available
+    ]
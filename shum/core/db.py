@@ -0,0 +1,118 @@
+"""Database connection health and pool metrics."""
+
+import logging
+from contextlib import ExitStack
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def get_pool_stats(connection):
+    """
+    Return psycopg pool stats of connection, or None if it isn't pooled.
+
+    Gauges (pool_size, pool_available, requests_waiting, ...) describe the
+    pool now, counters (requests_num, connections_lost, ...) are totals since
+    the pool was created in this process.
+    """
+    if not connection.settings_dict["OPTIONS"].get("pool"):
+        return None
+    return connection.pool.get_stats()
+
+
+def check_database(alias):
+    """Run a trivial query on alias, return whether it succeeded."""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        logger.exception("Database health check failed for %s", alias)
+        return False
+    return True
+
+
+def close_connections():
+    """
+    Close connections and pools of this process.
+
+    Pools run background threads that don't survive fork, so they have to be
+    closed in a process that is about to fork workers.
+    """
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        if get_pool_stats(connection) is not None:
+            # Only the PostgreSQL backend has pools
+            connection.close_pool()  # type: ignore[attr-defined]
+
+
+def get_timeout_profile(view_name):
+    """Name of the DATABASE_TIMEOUTS profile for view_name."""
+    for pattern, profile in settings.DATABASE_TIMEOUT_VIEWS:
+        if fnmatchcase(view_name, pattern):
+            return profile
+    return "default"
+
+
+class TimeoutWrapper:
+    """
+    Execute wrapper that applies timeouts before the first query it sees.
+
+    Inside a transaction they are set locally and end with it. Otherwise
+    they are set for the session and reset() restores the connection's
+    defaults, so pooled connections don't keep them.
+    """
+
+    def __init__(self, connection, timeouts):
+        self.connection = connection
+        self.timeouts = timeouts
+        self.scope = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.scope is None or (
+            self.scope == "local" and not self.connection.in_atomic_block
+        ):
+            self.scope = "local" if self.connection.in_atomic_block else "session"
+            settings_sql = ", ".join(
+                "set_config(%s, %s, %s)" for _name in self.timeouts
+            )
+            settings_params = [
+                value
+                for name, timeout in self.timeouts.items()
+                for value in (name, str(timeout), self.scope == "local")
+            ]
+            # The raw cursor skips execute wrappers, including this one
+            context["cursor"].cursor.execute(
+                f"SELECT {settings_sql}",
+                settings_params,
+            )
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        if self.scope != "session" or self.connection.connection is None:
+            return
+        try:
+            with self.connection.cursor() as cursor:
+                for name in self.timeouts:
+                    cursor.execute(f"RESET {name}")
+        except DatabaseError:
+            logger.exception("Failed to reset database timeouts")
+
+
+@contextmanager
+def database_timeouts(profile):
+    """Apply profile's timeouts to queries of every database in this scope."""
+    timeouts = settings.DATABASE_TIMEOUTS[profile]
+    wrappers = [TimeoutWrapper(connections[alias], timeouts) for alias in connections]
+    with ExitStack() as stack:
+        for wrapper in wrappers:
+            stack.enter_context(wrapper.connection.execute_wrapper(wrapper))
+        try:
+            yield
+        finally:
+            for wrapper in wrappers:
+                wrapper.reset()
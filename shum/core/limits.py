@@ -0,0 +1,104 @@
+"""Per-process concurrency limits for load shedding."""
+
+import threading
+import time
+from collections import Counter
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+HIGH_PRIORITY = "high"
+NORMAL_PRIORITY = "normal"
+LOW_PRIORITY = "low"
+
+
+def get_route_class(method, view_name):
+    """Route class of a request from LOAD_SHEDDING_ROUTES, first match wins."""
+    for pattern, read_class, write_class in settings.LOAD_SHEDDING_ROUTES:
+        if fnmatchcase(view_name, pattern):
+            return read_class if method in SAFE_METHODS else write_class
+    return "default"
+
+
+def get_priority(request):
+    """
+    Priority of a request: authenticated writes first, anonymous reads last.
+
+    Credentials are only checked for presence here, shedding happens before
+    authentication and must stay cheap.
+    """
+    authenticated = (
+        "HTTP_AUTHORIZATION" in request.META
+        or settings.SESSION_COOKIE_NAME in request.COOKIES
+    )
+    safe = request.method in SAFE_METHODS
+    if authenticated and not safe:
+        return HIGH_PRIORITY
+    if authenticated or not safe:
+        return NORMAL_PRIORITY
+    return LOW_PRIORITY
+
+
+def get_queue_wait(request):
+    """
+    Seconds the request waited before reaching Django, None if unknown.
+
+    Reads X-Request-Start as set by the proxy, in seconds, milliseconds or
+    microseconds since the epoch, optionally prefixed with ``t=``.
+    """
+    header = request.META.get("HTTP_X_REQUEST_START", "").removeprefix("t=")
+    try:
+        start = float(header)
+    except ValueError:
+        return None
+    if start > 1e14:  # noqa: PLR2004
+        start /= 1_000_000
+    elif start > 1e11:  # noqa: PLR2004
+        start /= 1000
+    return max(time.time() - start, 0)
+
+
+class ConcurrencyLimiter:
+    """
+    Count in-flight requests of this process, in total and by route class.
+
+    A request is refused only once its class or the process is at its limit,
+    which defaults to every thread being busy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Counter[str] = Counter()
+        self._total = 0
+
+    def acquire(self, route_class, *, total=True):
+        """
+        Take a slot, return False if the request should be shed.
+
+        With total=False the slot only counts against the route class limit,
+        for work that doesn't occupy one of the process's request threads.
+        """
+        limits = settings.LOAD_SHEDDING_LIMITS
+        limit = limits.get(route_class, limits["default"])
+        with self._lock:
+            if self._in_flight[route_class] >= limit or (
+                total and self._total >= settings.LOAD_SHEDDING_MAX_IN_FLIGHT
+            ):
+                return False
+            self._in_flight[route_class] += 1
+            self._total += total
+            return True
+
+    def release(self, route_class, *, total=True):
+        with self._lock:
+            self._in_flight[route_class] -= 1
+            self._total -= total
+
+    def snapshot(self):
+        with self._lock:
+            return {name: count for name, count in self._in_flight.items() if count}
+
+
+limiter = ConcurrencyLimiter()
@@ -0,0 +1,23 @@
+"""In-process counters for operational metrics."""
+
+import threading
+from collections import Counter
+
+_counters: Counter[str] = Counter()
+_lock = threading.Lock()
+
+
+def increment(name, value=1):
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot():
+    """
+    Return the counters of this process.
+
+    Returns:
+        dict: Counter values by name, totals since the process started.
+    """
+    with _lock:
+        return dict(_counters)
@@ -0,0 +1,414 @@
+import logging
+import re
+from contextlib import ExitStack
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING
+
+from asgiref.sync import async_to_sync
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.module_loading import import_string
+from psycopg import errors as psycopg_errors
+from rest_framework import status
+
+from shum.core import metrics
+from shum.core.batch import BATCH_ENVIRON_KEY
+from shum.core.compression import acompress_stream
+from shum.core.compression import choose_encoding
+from shum.core.compression import compress
+from shum.core.compression import compress_stream
+from shum.core.db import database_timeouts
+from shum.core.db import get_timeout_profile
+from shum.core.limits import get_priority
+from shum.core.limits import get_queue_wait
+from shum.core.limits import get_route_class
+from shum.core.limits import limiter
+from shum.core.routers import is_pinned_to_primary
+from shum.core.routers import pin_to_primary
+from shum.core.routers import reset_replica
+from shum.core.routers import use_replica
+from shum.users.hashers import PasswordHashingBusy
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def adapt_mode(handler, handler_is_async, is_async):
+    """Return handler callable in the sync or async mode is_async asks for."""
+    if is_async and not handler_is_async:
+        return sync_to_async(handler, thread_sensitive=True)
+    if not is_async and handler_is_async:
+        return async_to_sync(handler)
+    return handler
+
+
+@sync_and_async_middleware
+class AsyncCapableMiddleware:
+    """
+    Middleware that runs in the mode of the handler it wraps.
+
+    Like Django's MiddlewareMixin: under ASGI the chain stays async, so
+    async views run on the event loop instead of a thread. Subclasses
+    implement handle for sync and ahandle for async handlers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.ahandle(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def ahandle(self, request):
+        raise NotImplementedError
+
+
+class CompressionMiddleware(AsyncCapableMiddleware):
+    """
+    Compress API responses with the best coding the client accepts.
+
+    Only responses to API requests (CORS_URLS_REGEX) with a compressible
+    content type are compressed. Bodies under COMPRESSION_MIN_SIZE, already
+    encoded bodies and views in COMPRESSION_EXCLUDE_VIEWS are sent as is.
+    Streaming responses are compressed chunk by chunk and flushed after each
+    chunk, so clients still receive events as they happen.
+    """
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENCODINGS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.api_urls = re.compile(settings.CORS_URLS_REGEX)
+
+    def handle(self, request):
+        return self.process_response(request, self.get_response(request))
+
+    async def ahandle(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.compressible(request, response):
+            return response
+
+        # The coding depends on Accept-Encoding even when none is used
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = choose_encoding(
+            request.headers.get("Accept-Encoding", ""),
+            settings.COMPRESSION_ENCODINGS,
+        )
+        if coding is None:
+            return response
+
+        level = settings.COMPRESSION_LEVELS[coding]
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content,
+                    coding,
+                    level,
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content,
+                    coding,
+                    level,
+                )
+            del response["Content-Length"]
+        else:
+            content = compress(response.content, coding, level)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response["Content-Length"] = str(len(content))
+
+        # The compressed body differs byte for byte from the original
+        if etag := response.get("ETag"):
+            if etag.startswith('"'):
+                response["ETag"] = f"W/{etag}"
+        response["Content-Encoding"] = coding
+        return response
+
+    def compressible(self, request, response):
+        if (
+            not self.api_urls.match(request.path_info)
+            or response.has_header("Content-Encoding")
+            or "no-transform" in response.get("Cache-Control", "")
+        ):
+            return False
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return False
+        # Responses carrying secrets are left alone (BREACH)
+        resolver_match = request.resolver_match
+        if resolver_match is not None and any(
+            fnmatchcase(resolver_match.view_name, pattern)
+            for pattern in settings.COMPRESSION_EXCLUDE_VIEWS
+        ):
+            return False
+        content_type = response.get("Content-Type", "").partition(";")[0].strip()
+        return any(
+            fnmatchcase(content_type, pattern)
+            for pattern in settings.COMPRESSION_CONTENT_TYPES
+        )
+
+
+class WebOnlyMiddleware(AsyncCapableMiddleware):
+    """
+    Run WEB_ONLY_MIDDLEWARE for requests that can use the web stack.
+
+    API requests (CORS_URLS_REGEX) without a session cookie skip them: they
+    authenticate with tokens, and DRF views are already CSRF exempt unless
+    session authenticated. API requests with a session cookie and all other
+    pages run the full chain, so session auth and CSRF checks are unchanged.
+
+    Sync-only middleware (WhiteNoise) are adapted like Django's handler
+    does, so under ASGI only requests using the web stack pay for it.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.api_urls = re.compile(settings.CORS_URLS_REGEX)
+        is_async = iscoroutinefunction(get_response)
+        handler, handler_is_async = get_response, is_async
+        self.web_middleware: list[Callable] = []
+        for middleware_path in reversed(settings.WEB_ONLY_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            middleware_is_async = getattr(middleware, "async_capable", False) and (
+                handler_is_async or not getattr(middleware, "sync_capable", True)
+            )
+            try:
+                instance = middleware(
+                    adapt_mode(handler, handler_is_async, middleware_is_async),
+                )
+            except MiddlewareNotUsed:
+                continue
+            handler, handler_is_async = instance, middleware_is_async
+            self.web_middleware.insert(0, instance)
+        self.web_handler = adapt_mode(handler, handler_is_async, is_async)
+
+    def uses_web_stack(self, request):
+        return (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or not self.api_urls.match(request.path_info)
+        )
+
+    def handle(self, request):
+        if self.uses_web_stack(request):
+            request._web_middleware = self.web_middleware  # noqa: SLF001
+            return self.web_handler(request)
+        return self.get_response(request)
+
+    async def ahandle(self, request):
+        if self.uses_web_stack(request):
+            request._web_middleware = self.web_middleware  # noqa: SLF001
+            return await self.web_handler(request)
+        return await self.get_response(request)
+
+    def _hooks(self, request, name):
+        middleware = getattr(request, "_web_middleware", ())
+        return [getattr(m, name) for m in middleware if hasattr(m, name)]
+
+    # The handler only calls hooks of top-level middleware, call them here
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        for hook in self._hooks(request, "process_view"):
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        for hook in reversed(self._hooks(request, "process_template_response")):
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        for hook in reversed(self._hooks(request, "process_exception")):
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class LoadSheddingMiddleware(AsyncCapableMiddleware):
+    """
+    Reject requests with 503 when this worker is overloaded.
+
+    A request is shed when it waited in the proxy and server queues longer
+    than its priority's share of the budget, or when its route class or the
+    worker is at its in-flight limit.
+    """
+
+    def handle(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            self.release(request)
+
+    async def ahandle(self, request):
+        try:
+            return await self.get_response(request)
+        finally:
+            self.release(request)
+
+    def release(self, request):
+        route_class = getattr(request, "_load_shedding_route", None)
+        if route_class is not None:
+            limiter.release(route_class, total=request._load_shedding_total)  # noqa: SLF001
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route_class = get_route_class(
+            request.method,
+            request.resolver_match.view_name,
+        )
+        priority = get_priority(request)
+        share = settings.LOAD_SHEDDING_PRIORITY_SHARES[priority]
+
+        budget = settings.LOAD_SHEDDING_QUEUE_BUDGET_MS / 1000 * share
+        queue_wait = get_queue_wait(request)
+        if budget and queue_wait is not None and queue_wait > budget:
+            return self._shed(route_class, "queue_wait")
+
+        # Batch sub-requests run on the batch's pool, not a request thread
+        total = BATCH_ENVIRON_KEY not in request.META
+        if not limiter.acquire(route_class, total=total):
+            return self._shed(route_class, "in_flight")
+        request._load_shedding_route = route_class  # noqa: SLF001
+        request._load_shedding_total = total  # noqa: SLF001
+        return None
+
+    def process_exception(self, request, exception):
+        # Raised by password hashing in views outside DRF, e.g. the admin login
+        if isinstance(exception, PasswordHashingBusy):
+            route_class = getattr(request, "_load_shedding_route", "default")
+            return self._shed(route_class, "password_hashing")
+        return None
+
+    def _shed(self, route_class, reason):
+        metrics.increment(f"load_shedding.{reason}.{route_class}")
+        response = JsonResponse(
+            {"detail": "The server is overloaded, try again shortly."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response["Retry-After"] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+        return response
+
+
+class ReplicaMiddleware(AsyncCapableMiddleware):
+    """
+    Read from replicas for safe requests to DATABASE_REPLICA_VIEWS.
+
+    Successful writes pin the client to the primary for a short window, so
+    it reads its own writes while replicas catch up.
+    """
+
+    def handle(self, request):
+        token = use_replica(enabled=False)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica(token)
+        self.pin(request, response)
+        return response
+
+    async def ahandle(self, request):
+        token = use_replica(enabled=False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica(token)
+        # Loading the lazy request.user may query the database
+        await sync_to_async(self.pin)(request, response)
+        return response
+
+    def pin(self, request, response):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400  # noqa: PLR2004
+            and getattr(request, "_pins_to_primary", True)
+        ):
+            pin_to_primary(response, getattr(request, "user", None))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Views that aren't writes themselves, e.g. the batch endpoint
+        view_class = getattr(view_func, "cls", None)
+        request._pins_to_primary = getattr(view_class, "pins_to_primary", True)  # noqa: SLF001
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and any(
+                fnmatchcase(request.resolver_match.view_name, pattern)
+                for pattern in settings.DATABASE_REPLICA_VIEWS
+            )
+            and not is_pinned_to_primary(request)
+        ):
+            use_replica(enabled=True)
+
+
+class DatabaseTimeoutMiddleware(AsyncCapableMiddleware):
+    """
+    Apply per-view database timeouts and turn cancelled queries into errors.
+
+    Views matching DATABASE_TIMEOUT_VIEWS run with their DATABASE_TIMEOUTS
+    profile, others with the default profile. With ATOMIC_REQUESTS they are
+    set locally to the request's transaction. A statement timeout becomes a
+    504 and a lock timeout a 503, so clients can retry.
+    """
+
+    def handle(self, request):
+        with ExitStack() as stack:
+            request._database_timeouts = stack  # noqa: SLF001
+            return self.get_response(request)
+
+    async def ahandle(self, request):
+        stack = ExitStack()
+        request._database_timeouts = stack  # noqa: SLF001
+        try:
+            return await self.get_response(request)
+        finally:
+            # Timeouts are reset on the connections of the request's thread
+            await sync_to_async(stack.close)()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = get_timeout_profile(request.resolver_match.view_name)
+        request._database_timeouts.enter_context(database_timeouts(profile))  # noqa: SLF001
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, OperationalError):
+            return None
+
+        view_name = request.resolver_match.view_name if request.resolver_match else ""
+        if isinstance(exception.__cause__, psycopg_errors.QueryCanceled):
+            metrics.increment("db.statement_timeouts")
+            logger.warning("Statement timeout in %s", view_name)
+            return JsonResponse(
+                {"detail": "The database took too long to respond."},
+                status=status.HTTP_504_GATEWAY_TIMEOUT,
+            )
+        if isinstance(exception.__cause__, psycopg_errors.LockNotAvailable):
+            metrics.increment("db.lock_timeouts")
+            logger.warning("Lock timeout in %s", view_name)
+            response = JsonResponse(
+                {"detail": "The resource is busy, try again."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response["Retry-After"] = "1"
+            return response
+        return None
@@ -0,0 +1,112 @@
+"""Route reads of selected views to read replicas."""
+
+import random
+from contextvars import ContextVar
+
+import jwt
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+PIN_CACHE_PREFIX = "db-primary-pin"
+
+# Apps whose reads must see the latest writes, whatever the view
+PRIMARY_ONLY_APPS = {"django_cache", "sessions"}
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def use_replica(enabled):
+    """
+    Allow or forbid replica reads in the current context.
+
+    Returns:
+        Token: Pass to reset_replica to restore the previous state.
+    """
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+def _pin_key(user_id):
+    return f"{PIN_CACHE_PREFIX}:{user_id}"
+
+
+def _pin_cache():
+    # Not the default cache: in production that is a table on the primary,
+    # every replica read would query the primary to check the pin
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def _token_user_id(request):
+    """
+    User id claimed by the request's JWT, without verifying the token.
+
+    Only used to choose a database; authentication still verifies it.
+    """
+    header = request.META.get(jwt_settings.AUTH_HEADER_NAME, "")
+    parts = header.split()
+    if len(parts) != 2 or parts[0] not in jwt_settings.AUTH_HEADER_TYPES:  # noqa: PLR2004
+        return None
+    try:
+        claims = jwt.decode(parts[1], options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get(jwt_settings.USER_ID_CLAIM)
+
+
+def pin_to_primary(response, user=None):
+    """
+    Send the client's reads to the primary for DATABASE_REPLICA_PIN_SECONDS.
+
+    The cookie covers browsers and cookie-aware clients, a flag in the
+    AUTH_CACHE_ALIAS cache covers JWT clients of user across token
+    refreshes.
+    """
+    seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+    response.set_cookie(
+        settings.DATABASE_REPLICA_PIN_COOKIE,
+        "1",
+        max_age=seconds,
+        httponly=True,
+        samesite="Lax",
+    )
+    if user is not None and user.is_authenticated:
+        _pin_cache().set(_pin_key(user.pk), value=True, timeout=seconds)
+
+
+def is_pinned_to_primary(request):
+    if settings.DATABASE_REPLICA_PIN_COOKIE in request.COOKIES:
+        return True
+    user_id = _token_user_id(request)
+    return user_id is not None and bool(_pin_cache().get(_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random replica where the current context allows it.
+
+    ReplicaMiddleware allows it for safe requests to the views listed in
+    DATABASE_REPLICA_VIEWS, everything else reads from the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and _use_replica.get()
+            and model._meta.app_label not in PRIMARY_ONLY_APPS  # noqa: SLF001
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)  # noqa: S311
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
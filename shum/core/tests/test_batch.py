@@ -0,0 +1,185 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.ads.models import Ad
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestBatchAPI:
+    def test_batch_reads_as_current_user(self, settings):
+        """Sub-requests are authenticated as the batch caller."""
+        settings.BATCH_MAX_WORKERS = 1
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        Ad.objects.create(title="Own Ad", owner=user, price="10.00")
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse("api_batch"),
+            {
+                "requests": [
+                    {"method": "GET", "path": "/api/auth/profile/"},
+                    {"method": "GET", "path": "/api/ads/my_ads/"},
+                    {"method": "GET", "path": "/api/missing/"},
+                ],
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        profile, my_ads, missing = response.data["responses"]
+        assert profile["status"] == status.HTTP_200_OK
+        assert profile["body"]["email"] == "test@example.com"
+        assert [ad["title"] for ad in my_ads["body"]] == ["Own Ad"]
+        assert missing["status"] == status.HTTP_404_NOT_FOUND
+
+    def test_batch_writes_run_in_order(self):
+        """Writes run sequentially so later reads see them."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse("api_batch"),
+            {
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": "/api/ads/",
+                        "body": {"title": "New Ad", "price": "15.00"},
+                    },
+                    {"method": "POST", "path": "/api/ads/", "body": {}},
+                    {"method": "GET", "path": "/api/ads/my_ads/"},
+                ],
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        created, invalid, my_ads = response.data["responses"]
+        assert created["status"] == status.HTTP_201_CREATED
+        assert invalid["status"] == status.HTTP_400_BAD_REQUEST
+        assert [ad["title"] for ad in my_ads["body"]] == ["New Ad"]
+
+    def test_batch_anonymous_sub_requests(self):
+        """Anonymous callers get the permissions of anonymous users."""
+        client = APIClient()
+
+        response = client.post(
+            reverse("api_batch"),
+            {"requests": [{"method": "GET", "path": "/api/auth/profile/"}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        sub_response = response.data["responses"][0]
+        assert sub_response["status"] == status.HTTP_401_UNAUTHORIZED
+
+    def test_batch_cannot_nest(self):
+        """The batch endpoint can't be targeted by its own sub-requests."""
+        client = APIClient()
+
+        response = client.post(
+            reverse("api_batch"),
+            {"requests": [{"method": "POST", "path": "/api/batch/", "body": {}}]},
+            format="json",
+        )
+
+        assert response.data["responses"][0]["status"] == status.HTTP_404_NOT_FOUND
+
+    def test_batch_limits(self, settings):
+        """Batch enforces request count and body size limits."""
+        settings.BATCH_MAX_REQUESTS = 1
+        client = APIClient()
+        payload = {
+            "requests": [
+                {"method": "GET", "path": "/api/ads/"},
+                {"method": "GET", "path": "/api/ads/"},
+            ],
+        }
+
+        response = client.post(reverse("api_batch"), payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        settings.BATCH_MAX_REQUEST_SIZE = 10
+        response = client.post(reverse("api_batch"), payload, format="json")
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+        response = client.post(
+            reverse("api_batch"),
+            payload,
+            format="json",
+            CONTENT_LENGTH="lots",
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_batch_sub_requests_are_shed(self, settings):
+        """Sub-requests get the load shedding limits of their view."""
+        settings.BATCH_MAX_WORKERS = 1
+        settings.LOAD_SHEDDING_LIMITS = {
+            **settings.LOAD_SHEDDING_LIMITS,
+            "ads-read": 0,
+        }
+        client = APIClient()
+
+        response = client.post(
+            reverse("api_batch"),
+            {
+                "requests": [
+                    {"method": "GET", "path": "/api/ads/"},
+                    {"method": "GET", "path": "/api/auth/profile/"},
+                ],
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        shed, profile = response.data["responses"]
+        assert shed["status"] == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert shed["headers"]["Retry-After"] == "1"
+        assert "overloaded" in shed["body"]["detail"]
+        assert profile["status"] == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_reads_run_concurrently(settings):
+    """Read-only batches are dispatched on the worker pool."""
+    settings.BATCH_MAX_WORKERS = 3
+    user = User.objects.create_user(
+        email="test@example.com",
+        password="testpass123",  # noqa: S106
+    )
+    ads = [
+        Ad.objects.create(title=f"Ad {i}", owner=user, price="10.00") for i in range(3)
+    ]
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.post(
+        reverse("api_batch"),
+        {
+            "requests": [{"method": "GET", "path": f"/api/ads/{ad.id}/"} for ad in ads],
+        },
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["body"]["title"] for result in response.data["responses"]] == [
+        "Ad 0",
+        "Ad 1",
+        "Ad 2",
+    ]
@@ -0,0 +1,153 @@
+import gzip
+import json
+
+import brotli
+import pytest
+import zstandard
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.ads.models import Ad
+from shum.core.compression import choose_encoding
+from shum.core.middleware import CompressionMiddleware
+
+User = get_user_model()
+
+PAYLOAD = {"results": [{"title": "Ad", "description": "x" * 50} for _ in range(100)]}
+
+
+def zstd_decompressor():
+    # Streamed frames don't record the content size, decode them incrementally
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+def test_choose_encoding():
+    preferred = ["zstd", "br", "gzip"]
+
+    assert choose_encoding("gzip, deflate, br, zstd", preferred) == "zstd"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", preferred) == "gzip"
+    assert choose_encoding("br, zstd;q=0", preferred) == "br"
+    assert choose_encoding("*", preferred) == "zstd"
+    assert choose_encoding("identity", preferred) is None
+    assert choose_encoding("", preferred) is None
+
+
+class TestCompressionMiddleware:
+    def run(self, response, path="/api/ads/", accept="gzip"):
+        request = RequestFactory().get(path, headers={"accept-encoding": accept})
+        request.resolver_match = None
+        return CompressionMiddleware(lambda request: response)(request)
+
+    @pytest.mark.parametrize(
+        ("accept", "decompress"),
+        [
+            ("gzip", gzip.decompress),
+            ("br", brotli.decompress),
+            ("zstd", lambda data: zstd_decompressor().decompress(data)),
+        ],
+    )
+    def test_compresses_large_json(self, accept, decompress):
+        response = self.run(JsonResponse(PAYLOAD), accept=accept)
+
+        assert response["Content-Encoding"] == accept
+        assert response["Vary"] == "Accept-Encoding"
+        assert int(response["Content-Length"]) == len(response.content)
+        assert json.loads(decompress(response.content)) == PAYLOAD
+
+    def test_skips_small_bodies(self):
+        response = self.run(JsonResponse({"detail": "ok"}))
+
+        assert not response.has_header("Content-Encoding")
+
+    def test_skips_encoded_and_binary_bodies(self):
+        encoded = HttpResponse(b"x" * 2000, content_type="application/json")
+        encoded["Content-Encoding"] = "gzip"
+        image = HttpResponse(b"x" * 2000, content_type="image/jpeg")
+
+        assert self.run(encoded).content == b"x" * 2000
+        assert not self.run(image).has_header("Content-Encoding")
+
+    def test_skips_pages(self):
+        response = self.run(JsonResponse(PAYLOAD), path="/about/")
+
+        assert not response.has_header("Content-Encoding")
+
+    def test_without_accept_encoding(self):
+        response = self.run(JsonResponse(PAYLOAD), accept="")
+
+        assert not response.has_header("Content-Encoding")
+        assert response["Vary"] == "Accept-Encoding"
+
+    def test_streaming_flushes_each_chunk(self):
+        """Each chunk can be decoded as soon as it is received."""
+        decompressor = zstd_decompressor()
+        response = self.run(
+            StreamingHttpResponse(
+                iter([b"data: 1\n\n", b"data: 2\n\n"]),
+                content_type="text/event-stream",
+            ),
+            accept="zstd",
+        )
+        chunks = [decompressor.decompress(chunk) for chunk in response]
+
+        assert response["Content-Encoding"] == "zstd"
+        assert chunks[:2] == [b"data: 1\n\n", b"data: 2\n\n"]
+
+
+@pytest.mark.django_db
+class TestCompressionViews:
+    def test_ad_list_is_compressed(self):
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        Ad.objects.bulk_create(
+            Ad(title=f"Ad {number}", owner=user, price="10.00") for number in range(20)
+        )
+        client = APIClient()
+
+        response = client.get(reverse("api:ad-list"), HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.content))) == 20  # noqa: PLR2004
+
+    def test_token_responses_are_not_compressed(self, settings):
+        """Responses with secrets are excluded, see BREACH."""
+        settings.COMPRESSION_MIN_SIZE = 0
+        client = APIClient()
+
+        response = client.post(
+            reverse("token_obtain_pair"),
+            {"email": "nobody@example.com", "password": "wrong"},
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        assert not response.has_header("Content-Encoding")
+
+    def test_batch_responses_are_not_compressed(self):
+        """Batches can embed the responses of excluded views."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        Ad.objects.bulk_create(
+            Ad(title=f"Ad {number}", owner=user, price="10.00") for number in range(20)
+        )
+        client = APIClient()
+
+        response = client.post(
+            reverse("api_batch"),
+            {"requests": [{"method": "GET", "path": "/api/ads/"}]},
+            format="json",
+            HTTP_ACCEPT_ENCODING="gzip",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header("Content-Encoding")
@@ -0,0 +1,87 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.core.db import get_pool_stats
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+class TestHealthAPI:
+    def test_health_anonymous(self):
+        """Anyone can check health, pool stats are for staff only."""
+        response = APIClient().get(reverse("api_health"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["status"] == "ok"
+        assert response.data["databases"] == {"default": "ok", "replica": "ok"}
+        assert "pools" not in response.data
+
+    def test_health_staff_sees_pools(self):
+        """Staff users get pool stats, None for unpooled databases."""
+        user = User.objects.create_user(
+            email="staff@example.com",
+            password="testpass123",  # noqa: S106
+            is_staff=True,
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse("api_health"))
+
+        assert response.data["pools"] == {"default": None, "replica": None}
+
+    def test_health_database_down(self, monkeypatch):
+        """A failing database makes the service unavailable."""
+        monkeypatch.setattr("shum.core.api.views.check_database", lambda alias: False)
+
+        response = APIClient().get(reverse("api_health"))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.data["status"] == "unavailable"
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_health_default_database_unreachable():
+    """The check answers 503 even though requests are atomic on default."""
+    connection = connections["default"]
+    port = connection.settings_dict["PORT"]
+    connection.close()
+    connection.settings_dict["PORT"] = "1"
+    try:
+        response = APIClient().get(reverse("api_health"))
+    finally:
+        connection.close()
+        connection.settings_dict["PORT"] = port
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.data["databases"] == {
+        "default": "unavailable",
+        "replica": "ok",
+    }
+
+
+@pytest.mark.django_db
+def test_get_pool_stats():
+    """Pooled connections report pool sizing and usage."""
+    max_size = 2
+    connection = connections["default"]
+    settings_dict = {
+        **connection.settings_dict,
+        "OPTIONS": {"pool": {"min_size": 1, "max_size": max_size}},
+    }
+    pooled = connection.__class__(settings_dict, alias="pool_test")
+    try:
+        pooled.ensure_connection()
+        stats = get_pool_stats(pooled)
+    finally:
+        pooled.close()
+        pooled.close_pool()  # type: ignore[attr-defined]
+
+    assert stats["pool_min"] == 1
+    assert stats["pool_max"] == max_size
+    assert stats["requests_num"] == 1
@@ -0,0 +1,149 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from gunicorn.workers.gthread import ThreadWorker
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from config.gunicorn import QueueTimingWorker
+from shum.core import metrics
+from shum.core.limits import get_route_class
+from shum.core.limits import limiter
+
+User = get_user_model()
+
+
+def test_get_route_class():
+    """Routes are classified by view name and method."""
+    assert get_route_class("GET", "api:ad-list") == "ads-read"
+    assert get_route_class("POST", "api:ad-list") == "ads-write"
+    assert get_route_class("POST", "api:ad-upload-images") == "uploads"
+    assert get_route_class("POST", "token_obtain_pair") == "auth"
+    assert get_route_class("GET", "home") == "default"
+
+
+def test_slots_outside_the_total(settings):
+    """Batch sub-requests only count against their route class limit."""
+    settings.LOAD_SHEDDING_MAX_IN_FLIGHT = 1
+    assert limiter.acquire("default")
+    try:
+        assert not limiter.acquire("ads-read")
+        assert limiter.acquire("ads-read", total=False)
+        limiter.release("ads-read", total=False)
+    finally:
+        limiter.release("default")
+
+    assert limiter.snapshot() == {}
+
+
+def test_worker_stamps_queue_start(monkeypatch):
+    """Gunicorn sets X-Request-Start when the proxy didn't."""
+    handled = []
+    monkeypatch.setattr(ThreadWorker, "enqueue_req", lambda self, conn: None)
+    monkeypatch.setattr(
+        ThreadWorker,
+        "handle_request",
+        lambda self, req, conn: handled.append(dict(req.headers)),
+    )
+    worker = object.__new__(QueueTimingWorker)
+    conn = SimpleNamespace()
+
+    worker.enqueue_req(conn)
+    worker.handle_request(SimpleNamespace(headers=[]), conn)
+    worker.handle_request(
+        SimpleNamespace(headers=[("X-REQUEST-START", "t=1")]),
+        conn,
+    )
+
+    assert handled[0]["X-REQUEST-START"] == f"t={int(conn.queued_at * 1_000_000)}"
+    assert handled[1]["X-REQUEST-START"] == "t=1"
+
+
+@pytest.mark.django_db
+class TestLoadSheddingMiddleware:
+    @pytest.fixture
+    def busy(self):
+        """Hold one in-flight ads read for the duration of the test."""
+        assert limiter.acquire("ads-read")
+        yield
+        limiter.release("ads-read")
+
+    def test_route_class_limit(self, settings, busy):
+        """Requests over their route class limit get 503 and Retry-After."""
+        settings.LOAD_SHEDDING_LIMITS = {**settings.LOAD_SHEDDING_LIMITS, "ads-read": 1}
+        before = metrics.snapshot().get("load_shedding.in_flight.ads-read", 0)
+
+        response = APIClient().get(reverse("api:ad-list"))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+        assert metrics.snapshot()["load_shedding.in_flight.ads-read"] == before + 1
+
+    def test_authenticated_writes_have_priority(self, settings):
+        """Anonymous reads get a smaller share of the queue budget."""
+        settings.LOAD_SHEDDING_QUEUE_BUDGET_MS = 1000
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        started = f"t={time.time() - 0.7:.3f}"
+
+        response = APIClient().get(
+            reverse("api:ad-list"),
+            HTTP_X_REQUEST_START=started,
+        )
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        client = APIClient()
+        client.force_login(user)
+        response = client.post(
+            reverse("api:ad-list"),
+            {"title": "New Ad", "price": "15.00"},
+            format="json",
+            HTTP_X_REQUEST_START=started,
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    @pytest.mark.parametrize(
+        "route_class",
+        ["auth", "ads-read", "ads-write", "uploads", "admin", "default"],
+    )
+    def test_normal_concurrency_is_not_shed(self, settings, route_class):
+        """Until every thread is busy and requests queue, nothing is shed."""
+        held = settings.LOAD_SHEDDING_MAX_IN_FLIGHT - 1
+        for _ in range(held):
+            assert limiter.acquire(route_class)
+        try:
+            assert limiter.acquire(route_class)
+            limiter.release(route_class)
+            response = APIClient().get(
+                reverse("api:ad-list"),
+                HTTP_X_REQUEST_START=f"t={time.time():.3f}",
+            )
+        finally:
+            for _ in range(held):
+                limiter.release(route_class)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_queue_wait_budget(self, settings):
+        """Requests that waited longer than their budget are shed."""
+        settings.LOAD_SHEDDING_QUEUE_BUDGET_MS = 1000
+        client = APIClient()
+
+        started = f"t={time.time() - 5:.3f}"
+        response = client.get(reverse("api:ad-list"), HTTP_X_REQUEST_START=started)
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        started = f"t={int(time.time() * 1000)}"
+        response = client.get(reverse("api:ad-list"), HTTP_X_REQUEST_START=started)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_slots_are_released(self):
+        """Finished requests free their slot."""
+        APIClient().get(reverse("api:ad-list"))
+
+        assert limiter.snapshot() == {}
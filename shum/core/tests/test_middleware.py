@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import HttpResponse
+from django.http import JsonResponse
+from django.test import AsyncClient
+from django.test import RequestFactory
+from django.urls import path
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.core.checks import check_web_only_middleware
+from shum.core.middleware import WebOnlyMiddleware
+
+User = get_user_model()
+
+view_tasks = []
+
+
+@transaction.non_atomic_requests
+async def task_view(request):
+    view_tasks.append(asyncio.current_task())
+    return JsonResponse({"detail": "ok"})
+
+
+urlpatterns = [path("api/task/", task_view)]
+
+
+class TestWebOnlyMiddleware:
+    @pytest.fixture
+    def middleware(self):
+        def get_response(request):
+            return HttpResponse(b"session" if hasattr(request, "session") else b"")
+
+        return WebOnlyMiddleware(get_response)
+
+    def test_api_without_session_skips_web_middleware(self, middleware):
+        """Token and anonymous API calls skip session, CSRF, auth and messages."""
+        request = RequestFactory().get("/api/ads/")
+
+        assert middleware(request).content == b""
+
+    def test_api_with_session_runs_web_middleware(self, middleware):
+        """Session-authenticated API calls keep the full chain."""
+        request = RequestFactory().get("/api/ads/")
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = "session-key"
+
+        assert middleware(request).content == b"session"
+
+    def test_pages_run_web_middleware(self, middleware):
+        """HTML pages keep the full chain."""
+        request = RequestFactory().get("/about/")
+
+        assert middleware(request).content == b"session"
+
+    def test_check_requires_admin_middleware(self, settings):
+        """The admin middleware must be configured somewhere."""
+        assert check_web_only_middleware(None) == []
+
+        settings.WEB_ONLY_MIDDLEWARE = []
+        errors = check_web_only_middleware(None)
+        assert [error.id for error in errors] == ["core.E408", "core.E409", "core.E410"]
+
+
+@pytest.mark.django_db
+class TestWebOnlyMiddlewareSecurity:
+    def test_session_api_writes_require_csrf(self):
+        """Session-authenticated API writes are still CSRF checked."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(user)
+
+        response = client.post(
+            reverse("api:ad-list"),
+            {"title": "New Ad", "price": "15.00"},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_session_api_reads_are_authenticated(self):
+        """Session auth keeps working for API calls with a session cookie."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        client = APIClient()
+        client.force_login(user)
+
+        response = client.get(reverse("user_profile"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["email"] == "test@example.com"
+
+    def test_admin_requires_login(self):
+        """The admin still gets sessions and authentication."""
+        response = APIClient().get(reverse("admin:index"))
+
+        assert response.status_code == status.HTTP_302_FOUND
+
+
+class TestAsyncMiddleware:
+    def test_async_view_runs_on_event_loop(self, settings):
+        """
+        Under ASGI async views run in the request's task on the event loop.
+
+        A sync-only middleware makes Django call the rest of the chain
+        through a thread, which runs the view in a task of its own.
+        """
+        settings.ROOT_URLCONF = __name__
+        view_tasks.clear()
+
+        async def get():
+            response = await AsyncClient().get("/api/task/")
+            return response, asyncio.current_task()
+
+        response, task = asyncio.run(get())
+
+        assert response.status_code == status.HTTP_200_OK
+        assert view_tasks == [task]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_web_stack_runs_under_asgi(self):
+        """Sync-only web middleware are adapted to the async chain."""
+        response = asyncio.run(AsyncClient().get(reverse("admin:index")))
+
+        assert response.status_code == status.HTTP_302_FOUND
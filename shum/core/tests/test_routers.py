@@ -0,0 +1,120 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shum.ads.models import Ad
+from shum.core.routers import ReplicaRouter
+from shum.core.routers import reset_replica
+from shum.core.routers import use_replica
+
+User = get_user_model()
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+
+
+def test_router_uses_replica_only_when_allowed(replicas):
+    """Reads go to a replica only in contexts that allow it."""
+    router = ReplicaRouter()
+    assert router.db_for_read(Ad) is None
+
+    token = use_replica(enabled=True)
+    try:
+        assert router.db_for_read(Ad) == "replica"
+        assert router.db_for_write(Ad) == "default"
+    finally:
+        reset_replica(token)
+
+
+# The replica is a separate connection that can't see the uncommitted rows
+# of the test transaction, like a replica that hasn't caught up yet
+@pytest.mark.django_db(databases=["default", "replica"])
+class TestReplicaMiddleware:
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+    def test_listed_views_read_from_replica(self, replicas, user):
+        """Safe requests to listed views read from the replica."""
+        Ad.objects.create(title="Fresh Ad", owner=user, price="10.00")
+
+        response = APIClient().get(reverse("api:ad-list"))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == []
+
+    def test_unlisted_views_read_from_primary(self, replicas, user):
+        """Views not listed in DATABASE_REPLICA_VIEWS keep reading the primary."""
+        Ad.objects.create(title="Fresh Ad", owner=user, price="10.00")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse("api:ad-my-ads"))
+
+        assert [ad["title"] for ad in response.data] == ["Fresh Ad"]
+
+    def test_writes_pin_cookie_clients_to_primary(self, replicas, user):
+        """After a write, the client's reads see its own changes."""
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse("api:ad-list"),
+            {"title": "New Ad", "price": "15.00"},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = client.get(reverse("api:ad-list"))
+        assert [ad["title"] for ad in response.data] == ["New Ad"]
+
+    def test_writes_pin_jwt_user_to_primary(self, replicas, user):
+        """JWT clients without cookies are pinned through the cache."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        client.post(
+            reverse("api:ad-list"),
+            {"title": "New Ad", "price": "15.00"},
+            format="json",
+        )
+        client.cookies.clear()
+
+        response = client.get(reverse("api:ad-list"))
+
+        assert [ad["title"] for ad in response.data] == ["New Ad"]
+
+    def test_batch_writes_pin_to_primary(self, replicas, user, settings):
+        """The pin cookie of a write sub-request reaches the client."""
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.post(
+            reverse("api_batch"),
+            {"requests": [{"method": "GET", "path": "/api/ads/"}]},
+            format="json",
+        )
+        assert settings.DATABASE_REPLICA_PIN_COOKIE not in response.cookies
+
+        response = client.post(
+            reverse("api_batch"),
+            {
+                "requests": [
+                    {
+                        "method": "POST",
+                        "path": "/api/ads/",
+                        "body": {"title": "New Ad", "price": "15.00"},
+                    },
+                ],
+            },
+            format="json",
+        )
+        assert response.data["responses"][0]["status"] == status.HTTP_201_CREATED
+        assert response.cookies[settings.DATABASE_REPLICA_PIN_COOKIE].value == "1"
@@ -0,0 +1,140 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.core import metrics
+from shum.core import throttling
+from shum.core.throttling import Buckets
+from shum.core.throttling import MemoryBuckets
+from shum.core.throttling import parse_rate
+
+User = get_user_model()
+
+
+@pytest.fixture
+def rates(settings):
+    """Set throttle rates for the test, on top of the configured ones."""
+
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+
+    return set_rates
+
+
+def test_parse_rate():
+    assert parse_rate("10/min") == (10, 10 / 60)
+    assert parse_rate("3/s") == (3, 3)
+    assert parse_rate("24/day") == (24, 24 / 86400)
+
+
+def test_memory_bucket_refills(monkeypatch):
+    """A bucket allows a burst of its capacity, then refills over time."""
+    now = 1000.0
+    monkeypatch.setattr(throttling.time, "monotonic", lambda: now)
+    bucket = MemoryBuckets()
+
+    assert [bucket.take("key", 3, 1.0) for _ in range(3)] == [0, 0, 0]
+    assert bucket.take("key", 3, 1.0) == pytest.approx(1.0)
+    assert bucket.take("other", 3, 1.0) == 0
+
+    now += 0.5
+    assert bucket.take("key", 3, 1.0) == pytest.approx(0.5)
+    now += 0.5
+    assert bucket.take("key", 3, 1.0) == 0
+    now += 60
+    assert [bucket.take("key", 3, 1.0) for _ in range(4)][-2:] == [0, 1.0]
+
+
+def test_redis_errors_let_requests_through(settings):
+    settings.REDIS_URL = "redis://127.0.0.1:1/0"
+    buckets = Buckets()
+    before = metrics.snapshot().get("throttle.errors", 0)
+
+    assert buckets.take("key", 1, 1.0) == 0
+    assert metrics.snapshot()["throttle.errors"] == before + 1
+
+
+@pytest.mark.django_db
+class TestThrottles:
+    def login(self, email, address="10.0.0.1"):
+        return APIClient().post(
+            reverse("user_login"),
+            {"email": email, "password": "wrong-password"},
+            format="json",
+            REMOTE_ADDR=address,
+        )
+
+    def test_login_is_throttled_by_email(self, rates):
+        """Guesses at one account are limited from any number of addresses."""
+        rates(auth_email="2/min")
+
+        assert (
+            self.login("victim@example.com", "10.0.0.1").status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+        assert (
+            self.login("Victim@example.com", "10.0.0.2").status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+        response = self.login("victim@example.com", "10.0.0.3")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response["Retry-After"]) == 30  # noqa: PLR2004
+        assert (
+            self.login("other@example.com", "10.0.0.3").status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+
+    def test_login_is_throttled_by_ip(self, rates):
+        rates(auth_ip="2/min")
+
+        for email in ["a@example.com", "b@example.com"]:
+            assert self.login(email).status_code == status.HTTP_400_BAD_REQUEST
+        assert (
+            self.login("c@example.com").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        assert (
+            self.login("c@example.com", "10.0.0.2").status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+
+    @pytest.mark.parametrize("url", ["token_obtain_pair", "auth_token"])
+    def test_token_views_share_the_login_scope(self, rates, url):
+        rates(auth_ip="1/min")
+        client = APIClient()
+
+        assert (
+            client.post(reverse(url), {}, format="json").status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
+        response = client.post(reverse(url), {}, format="json")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_anonymous_ad_reads(self, rates, user):
+        """Anonymous reads share an IP bucket, authenticated reads don't use it."""
+        rates(ads_anon="1/min")
+        anonymous = APIClient()
+        authenticated = APIClient()
+        authenticated.force_authenticate(user)
+
+        assert anonymous.get(reverse("api:ad-list")).status_code == status.HTTP_200_OK
+        assert (
+            anonymous.get(reverse("api:ad-list")).status_code
+            == status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        assert (
+            authenticated.get(reverse("api:ad-list")).status_code == status.HTTP_200_OK
+        )
+
+    def test_views_without_scope_are_not_throttled(self, rates, user):
+        rates(auth_ip="1/min", auth_user="1/min")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        for _ in range(3):
+            assert client.get(reverse("user_profile")).status_code == status.HTTP_200_OK
@@ -0,0 +1,103 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.db import connection
+from django.urls import reverse
+from psycopg import errors as psycopg_errors
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from shum.ads.api.views import AdViewSet
+from shum.core import metrics
+from shum.core.db import database_timeouts
+from shum.users.api.views import UserViewSet
+
+User = get_user_model()
+
+
+def show(setting):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SHOW {setting}")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestDatabaseTimeouts:
+    def test_connections_have_no_timeouts(self):
+        """Migrations and commands can take as long as they need."""
+        assert show("statement_timeout") == "0"
+        assert show("lock_timeout") == "0"
+
+    def test_profile_applies_in_scope(self):
+        """A profile overrides the defaults for queries in its scope."""
+        with database_timeouts("admin"):
+            assert show("statement_timeout") == "30s"
+            assert show("lock_timeout") == "5s"
+
+    def test_statement_timeout_is_504(self, settings, monkeypatch):
+        """Cancelled queries map to 504 and are counted."""
+        settings.DATABASE_TIMEOUTS = {
+            **settings.DATABASE_TIMEOUTS,
+            "public_read": {"statement_timeout": 10, "lock_timeout": 10},
+        }
+
+        def slow_list(self, request):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_sleep(1)")
+
+        monkeypatch.setattr(AdViewSet, "list", slow_list)
+        before = metrics.snapshot().get("db.statement_timeouts", 0)
+
+        response = APIClient().get(reverse("api:ad-list"))
+
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert metrics.snapshot()["db.statement_timeouts"] == before + 1
+
+    def test_lock_timeout_is_503(self, monkeypatch):
+        """Lock timeouts map to 503 with Retry-After."""
+
+        def locked_list(self, request):
+            raise OperationalError from psycopg_errors.LockNotAvailable
+
+        monkeypatch.setattr(AdViewSet, "list", locked_list)
+
+        response = APIClient().get(reverse("api:ad-list"))
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_session_timeouts_are_reset():
+    """Outside transactions, timeouts don't outlive their scope."""
+    with database_timeouts("admin"):
+        assert show("statement_timeout") == "30s"
+
+    assert show("statement_timeout") == "0"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_requests_use_the_default_profile(monkeypatch):
+    """Views without a profile use the default one, for their transaction."""
+    timeouts: dict[str, str] = {}
+
+    def profile(self, request):
+        timeouts.update(
+            statement_timeout=show("statement_timeout"),
+            lock_timeout=show("lock_timeout"),
+        )
+        return Response()
+
+    monkeypatch.setattr(UserViewSet, "me", profile)
+    user = User.objects.create_user(
+        email="test@example.com",
+        password="testpass123",  # noqa: S106
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    client.get(reverse("api:user-me"))
+
+    assert timeouts == {"statement_timeout": "5s", "lock_timeout": "2s"}
+    assert show("statement_timeout") == "0"
@@ -0,0 +1,22 @@
+import pytest
+from django.contrib.auth.password_validation import get_default_password_validators
+
+from shum.core.warmup import build_serializer_fields
+from shum.core.warmup import warm_up
+
+
+def test_build_serializer_fields():
+    """Fields of project serializers are built without a request."""
+    assert build_serializer_fields() > 0
+
+
+@pytest.mark.django_db
+def test_warm_up_loads_password_validators():
+    """Password validators and their data are loaded before fork."""
+    # django-stubs type the functools.cache wrapper as a plain callable
+    get_default_password_validators.cache_clear()  # type: ignore[attr-defined]
+
+    warm_up()
+
+    cache_info = get_default_password_validators.cache_info()  # type: ignore[attr-defined]
+    assert cache_info.currsize == 1
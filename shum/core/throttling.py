@@ -0,0 +1,230 @@
+"""
+Token-bucket throttles for DRF views.
+
+A view opts in with throttle_scope. Rates come from DEFAULT_THROTTLE_RATES
+under ``<scope>_<key>``, where key names what each bucket counts:
+
+- ``ip``: the client address
+- ``anon``: the client address, for anonymous requests only
+- ``user``: the authenticated user, anonymous requests aren't counted
+- ``email``: the email (or username) in the request body, e.g. of a login
+
+A rate "N/period" lets a client burst N requests, then refills its bucket
+at N per period. A scope without a rate for a key isn't throttled by it.
+
+Buckets live in Redis when REDIS_URL is set, updated by a Lua script so
+each check is one atomic round trip. Otherwise they live in process memory
+and only limit each process on its own. If Redis fails, requests are let
+through: throttling must not take logins down with it.
+"""
+
+import functools
+import hashlib
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from shum.core import metrics
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Memory buckets are pruned of full ones beyond this many
+MAX_MEMORY_BUCKETS = 100_000
+
+# Returns the seconds until a token is available, 0 if one was taken.
+# Redis' clock is used, so hosts with skewed clocks share buckets correctly.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = capacity
+if bucket[1] then
+    local elapsed = math.max(0, now - tonumber(bucket[2]))
+    tokens = math.min(capacity, tonumber(bucket[1]) + elapsed * per_second)
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / per_second * 1000))
+return tostring(wait)
+"""
+
+
+@functools.cache
+def parse_rate(rate):
+    """Return (capacity, tokens per second) of a rate like "10/min"."""
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class MemoryBuckets:
+    """Buckets of this process only, for development and tests."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _full_at = self._buckets.get(key, (capacity, now, 0))
+            tokens = min(capacity, tokens + (now - updated_at) * per_second)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / per_second
+            if not wait:
+                tokens -= 1
+            full_at = now + (capacity - tokens) / per_second
+            self._buckets[key] = (tokens, now, full_at)
+            if len(self._buckets) > MAX_MEMORY_BUCKETS:
+                # A full bucket is the same as no bucket
+                self._buckets = {
+                    key: bucket
+                    for key, bucket in self._buckets.items()
+                    if bucket[2] > now
+                }
+        return wait
+
+
+class RedisBuckets:
+    """Buckets in Redis, shared by all processes."""
+
+    def __init__(self, url, prefix="throttle"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        # Sent with EVALSHA, and loaded again if Redis doesn't have it
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, capacity, per_second):
+        wait = self._take(keys=[f"{self.prefix}:{key}"], args=[capacity, per_second])
+        return float(wait)
+
+
+class Buckets:
+    """The bucket store of this process."""
+
+    def __init__(self):
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = (
+                RedisBuckets(settings.REDIS_URL)
+                if settings.REDIS_URL
+                else MemoryBuckets()
+            )
+        return self._store
+
+    def reset(self):
+        """Forget the store and its buckets, e.g. after settings change."""
+        self._store = None
+
+    def take(self, key, capacity, per_second):
+        """Take a token, return 0 or the seconds until one is available."""
+        try:
+            return self.store.take(key, capacity, per_second)
+        except redis.RedisError:
+            logger.warning("Could not check throttle %s", key, exc_info=True)
+            metrics.increment("throttle.errors")
+            return 0.0
+
+
+buckets = Buckets()
+
+
+class BucketThrottle(BaseThrottle):
+    """A bucket per scope and key, see the module docstring."""
+
+    key_name: str | None = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_key(self, request):
+        """Return what the bucket is for, None to not throttle the request."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return True
+        name = f"{scope}_{self.key_name}"
+        # Read on every request, DRF reloads api_settings when settings change
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(name)
+        if rate is None:
+            return True
+        key = self.get_key(request)
+        if key is None:
+            return True
+
+        wait = buckets.take(f"{name}:{key}", *parse_rate(rate))
+        if not wait:
+            return True
+        self.wait_seconds = wait
+        metrics.increment(f"throttle.{name}")
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(BucketThrottle):
+    key_name = "ip"
+
+    def get_key(self, request):
+        return self.get_ident(request)
+
+
+class AnonThrottle(BucketThrottle):
+    key_name = "anon"
+
+    def get_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class UserThrottle(BucketThrottle):
+    key_name = "user"
+
+    def get_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class EmailThrottle(BucketThrottle):
+    """
+    Throttle attempts per account, whichever addresses they come from.
+
+    Counts requests whose body has an email, or a username as DRF's
+    auth-token view expects.
+    """
+
+    key_name = "email"
+    fields = ("email", "username")
+
+    def get_key(self, request):
+        data = request.data
+        if not hasattr(data, "get"):
+            return None
+        for field in self.fields:
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                # Emails are personal data, keep them out of the keyspace
+                email = value.strip().lower()
+                return hashlib.sha256(email.encode()).hexdigest()
+        return None
@@ -0,0 +1,68 @@
+"""Pre-fork warm-up of lazily built process state."""
+
+import logging
+
+from django.conf import settings
+from django.contrib.auth.password_validation import get_default_password_validators
+from django.urls import get_resolver
+from django.utils import translation
+from django.utils.module_loading import autodiscover_modules
+from rest_framework.serializers import BaseSerializer
+
+from shum.core.db import close_connections
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_MODULES = ("api.serializers", "api.views")
+
+PROJECT_PACKAGE = "shum."
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def build_serializer_fields():
+    """
+    Build the fields of every project serializer once.
+
+    Returns:
+        int: Number of serializers whose fields were built.
+    """
+    built = 0
+    for serializer_class in set(_subclasses(BaseSerializer)):
+        if not serializer_class.__module__.startswith(PROJECT_PACKAGE):
+            continue
+        try:
+            serializer_class().fields  # noqa: B018
+        except Exception:  # noqa: BLE001
+            # Serializers that need arguments are built on first use instead
+            logger.debug("Skipped warm-up of %s", serializer_class.__qualname__)
+        else:
+            built += 1
+    return built
+
+
+def warm_up():
+    """
+    Load what Django and DRF otherwise build on the first requests.
+
+    Meant to run in the Gunicorn master with preload_app, before workers are
+    forked, so workers share the memory and start with warm caches. Database
+    connections and pools opened meanwhile are closed, they must not be shared.
+    """
+    autodiscover_modules(*WARM_UP_MODULES)
+
+    resolver = get_resolver()
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            resolver.reverse_dict  # noqa: B018
+            resolver.namespace_dict  # noqa: B018
+
+    built = build_serializer_fields()
+    get_default_password_validators()
+
+    close_connections()
+    logger.info("Warm-up done, built fields of %d serializers", built)
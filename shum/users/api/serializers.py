@@ -1,14 +1,40 @@
+from allauth.account.models import EmailAddress
 from django.contrib.auth import authenticate
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import QueryDict
+from django.utils.translation import gettext_lazy as _
 from drf_spectacular.openapi import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.serializers import TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import UntypedToken
 
+from shum.users.authentication import get_cached_user
+from shum.users.last_login import last_logins
 from shum.users.models import User
+from shum.users.revocation import revocations
 
 
-class UserSerializer(serializers.ModelSerializer[User]):
+class NormalizedEmailMixin(serializers.Serializer):
+    """Normalize the email before validation, as it will be stored."""
+
+    def to_internal_value(self, data):
+        # The uniqueness check compares the stored, lowercased email
+        if isinstance(data, dict | QueryDict) and isinstance(data.get("email"), str):
+            data = data.copy()
+            data["email"] = User.objects.normalize_email(data["email"])
+        return super().to_internal_value(data)
+
+
+class UserSerializer(NormalizedEmailMixin, serializers.ModelSerializer[User]):
     """Serializer for User model with first_name and last_name extraction."""
 
     first_name = serializers.SerializerMethodField(
@@ -75,6 +101,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
     def validate(self, attrs):
         data = super().validate(attrs)
+        last_logins.record(self.user)
 
         # Split name into first_name and last_name
         name_parts = self.user.name.split(" ", 1) if self.user.name else ["", ""]
@@ -97,7 +124,58 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that revokes rotated refresh tokens.
+
+    Refreshing again with a rotated token returns the tokens it was rotated
+    into during the revocation grace window, and fails after it.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        record = revocations.get(jti)
+        if record is None:
+            user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+            if user_id is not None and not api_settings.USER_AUTHENTICATION_RULE(
+                get_cached_user(user_id),
+            ):
+                raise AuthenticationFailed(
+                    str(self.error_messages["no_active_account"]),
+                    "no_active_account",
+                )
+
+            data = {"access": str(refresh.access_token)}
+            if not api_settings.ROTATE_REFRESH_TOKENS:
+                return data
+
+            expires_at = refresh["exp"]
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+            if not api_settings.BLACKLIST_AFTER_ROTATION:
+                return data
+            record = revocations.rotate(jti, expires_at, data)
+            if record is None:
+                return data
+
+        if not revocations.in_grace(record):
+            raise TokenError(_("Token is blacklisted"))
+        return record["tokens"]
+
+
+class RevocableTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        if revocations.get(token.get(api_settings.JTI_CLAIM)) is not None:
+            raise serializers.ValidationError(_("Token is blacklisted"))
+        return {}
+
+
+class UserRegistrationSerializer(NormalizedEmailMixin, serializers.ModelSerializer):
     """
     Serializer for user registration with JWT tokens.
 
@@ -125,9 +203,25 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ["id", "email", "first_name", "last_name", "password"]
         extra_kwargs = {
             "password": {"write_only": True},
-            "email": {"help_text": "User's email address (must be unique)"},
+            "email": {
+                "help_text": "User's email address (must be unique)",
+                # Checked by the INSERT in create(), not by a SELECT before it
+                "validators": [],
+            },
         }
 
+    def validate(self, attrs):
+        # Validators compare the password with the user to be created
+        user = User(
+            email=attrs["email"],
+            name=f"{attrs['first_name']} {attrs['last_name']}".strip(),
+        )
+        try:
+            validate_password(attrs["password"], user=user)
+        except ValidationError as e:
+            raise serializers.ValidationError({"password": e.messages}) from e
+        return attrs
+
     def create(self, validated_data):
         # Combine first_name and last_name into name field
         first_name = validated_data.pop("first_name", "")
@@ -136,8 +230,24 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
         validated_data["name"] = name
 
-        # Create user
-        return User.objects.create_user(**validated_data)
+        with transaction.atomic(savepoint=False):
+            user = User.objects.create_user_if_new(**validated_data)
+            if user is not None:
+                # Lets allauth send the verification email and confirm it
+                EmailAddress.objects.create(
+                    user=user,
+                    email=user.email,
+                    primary=True,
+                    verified=False,
+                )
+        if user is None:
+            email_field = User._meta.get_field("email")  # noqa: SLF001
+            error_message = email_field.error_messages["unique"] % {
+                "model_name": User._meta.verbose_name,  # noqa: SLF001
+                "field_label": email_field.verbose_name,
+            }
+            raise serializers.ValidationError({"email": [error_message]})
+        return user
 
     def save(self, **kwargs):
         """
@@ -215,6 +325,8 @@ class UserLoginSerializer(serializers.Serializer):
             first_name = name_parts[0] if name_parts else ""
             last_name = name_parts[1] if len(name_parts) > 1 else ""
 
+            last_logins.record(user)
+
             # Generate tokens
             refresh = RefreshToken.for_user(user)
 
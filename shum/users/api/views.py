@@ -1,22 +1,32 @@
 import logging
 
+from adrf.views import APIView as AsyncAPIView
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.cache import get_conditional_response
 from drf_spectacular.openapi import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample
 from drf_spectacular.utils import extend_schema
 from drf_spectacular.utils import extend_schema_view
 from rest_framework import status
+from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
+from rest_framework.exceptions import ValidationError
 from rest_framework.mixins import ListModelMixin
 from rest_framework.mixins import RetrieveModelMixin
 from rest_framework.mixins import UpdateModelMixin
 from rest_framework.permissions import AllowAny
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
+from rest_framework_simplejwt import state
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from shum.core.api.mixins import AsyncViewMixin
+
 from .serializers import CustomTokenObtainPairSerializer
 from .serializers import UserLoginSerializer
 from .serializers import UserRegistrationSerializer
@@ -61,6 +71,42 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom JWT token view with user data."""
 
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = "auth"
+
+
+class AuthTokenView(ObtainAuthToken):
+    """DRF's auth-token view, throttled like the other logins."""
+
+    throttle_classes = APIView.throttle_classes
+    throttle_scope = "auth"
+
+
+@extend_schema(
+    responses={200: OpenApiTypes.OBJECT},
+    description=(
+        "Public keys that verify access and refresh tokens, by kid. Empty when "
+        "tokens are signed with a shared secret."
+    ),
+    summary="JSON Web Key Set",
+    tags=["Authentication"],
+)
+class JWKSView(APIView):
+    """Publish the JWT verification keys for gateways and other services."""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        backend = state.token_backend
+        jwks = getattr(backend, "jwks", {"keys": []})
+        etag = f'"{getattr(backend, "jwks_etag", "none")}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(jwks, status=status.HTTP_200_OK)
+        response["ETag"] = etag
+        response["Cache-Control"] = f"public, max-age={settings.JWT_JWKS_MAX_AGE}"
+        return response
 
 
 @extend_schema(
@@ -106,6 +152,7 @@ class UserRegistrationView(APIView):
     """User registration endpoint that returns JWT tokens."""
 
     permission_classes = [AllowAny]
+    throttle_scope = "register"
 
     def post(self, request):
         # Log incoming request data for debugging
@@ -121,6 +168,13 @@ class UserRegistrationView(APIView):
                 data = serializer.save()
                 logger.info("User created successfully: %s", data["user"]["email"])
                 return Response(data, status=status.HTTP_201_CREATED)
+            except ValidationError as e:
+                # The email is taken
+                logger.warning("Registration validation errors: %s", e.detail)
+                return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+            except APIException:
+                # e.g. PasswordHashingBusy, DRF answers with its status
+                raise
             except Exception:
                 logger.exception("Error saving user")
                 return Response(
@@ -174,6 +228,7 @@ class UserLoginView(APIView):
     """User login endpoint that returns JWT tokens."""
 
     permission_classes = [AllowAny]
+    throttle_scope = "auth"
 
     def post(self, request):
         # Log incoming login request data for debugging
@@ -208,3 +263,11 @@ class UserProfileView(APIView):
     def get(self, request):
         serializer = UserSerializer(request.user, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncUserProfileView(AsyncViewMixin, UserProfileView, AsyncAPIView):
+    """UserProfileView with an async handler for ASGI deployments."""
+
+    async def get(self, request):
+        serializer = UserSerializer(request.user, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -11,3 +11,7 @@ class UsersConfig(AppConfig):
     def ready(self):
         with contextlib.suppress(ImportError):
             import shum.users.signals  # noqa: F401, PLC0415
+
+        from shum.users.signing import install_token_backend  # noqa: PLC0415
+
+        install_token_backend()
@@ -0,0 +1,165 @@
+"""
+DRF authentication classes that resolve the user from a cache.
+
+Each class behaves like the one it extends, but loads the user (and the
+DRF token) from the AUTH_CACHE_ALIAS cache, so authenticated requests don't
+query the database in the common case. Entries expire after
+AUTH_CACHE_TIMEOUT seconds and are dropped by shum.users.signals when a user
+is saved or deleted and when a token is deleted, and again when that change
+commits. Queryset updates bypass those signals, the timeout bounds how long
+they go unnoticed.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth import HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.authentication import TokenAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def get_cache():
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def token_cache_key(key):
+    # Token keys are credentials, keep them out of the cache keyspace
+    return f"auth:token:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def get_cached_user(user_id):
+    """
+    Return the user whose USER_ID_FIELD is user_id, None if there is none.
+
+    Misses read the primary, a lagging replica could put a user back in the
+    cache as it was before the change that invalidated it.
+    """
+    cache = get_cache()
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user_model = get_user_model()
+        try:
+            user = user_model._default_manager.using(DEFAULT_DB_ALIAS).get(  # noqa: SLF001
+                **{api_settings.USER_ID_FIELD: user_id},
+            )
+        except user_model.DoesNotExist:
+            return None
+        cache.set(key, user, settings.AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id):
+    get_cache().delete(user_cache_key(user_id))
+
+
+def invalidate_token(key):
+    get_cache().delete(token_cache_key(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"),
+            ) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM,
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+
+        return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cache = get_cache()
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model._default_manager.using(DEFAULT_DB_ALIAS).get(key=key)  # noqa: SLF001
+            except ObjectDoesNotExist as e:
+                raise exceptions.AuthenticationFailed(_("Invalid token.")) from e
+            cache.set(cache_key, token, settings.AUTH_CACHE_TIMEOUT)
+
+        user = get_cached_user(token.user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+        token.user = user
+        return (user, token)
+
+
+def get_session_user(request):
+    """
+    Return the user logged in to the request's session from the cache.
+
+    Returns None whenever the session needs Django's full check (no user,
+    unknown backend, inactive user or a session hash that doesn't match the
+    current password, which may still match a fallback secret key).
+    """
+    session = getattr(request, "session", None)
+    if session is None:
+        return None
+    try:
+        user_id = get_user_model()._meta.pk.to_python(session[SESSION_KEY])  # noqa: SLF001
+        backend_path = session[BACKEND_SESSION_KEY]
+    except (KeyError, ValidationError):
+        return None
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return None
+
+    # Sessions store the primary key, which is also SIMPLE_JWT's USER_ID_FIELD
+    user = get_cached_user(user_id)
+    if user is None or not user.is_active:
+        return None
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(
+        session_hash,
+        user.get_session_auth_hash(),
+    ):
+        return None
+    return user
+
+
+class CachedSessionAuthentication(SessionAuthentication):
+    def authenticate(self, request):
+        user = get_session_user(request._request)  # noqa: SLF001
+        if user is None:
+            return super().authenticate(request)
+
+        self.enforce_csrf(request)
+        return (user, None)
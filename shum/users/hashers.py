@@ -0,0 +1,156 @@
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from shum.core import metrics
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Too many logins at once, try again shortly.")
+    default_code = "password_hashing_busy"
+
+    @property
+    def wait(self):
+        # DRF sends it as Retry-After
+        return settings.LOAD_SHEDDING_RETRY_AFTER
+
+
+class HashingPool:
+    """
+    A bounded thread pool for password hashing.
+
+    At most PASSWORD_HASHING_WORKERS hashes run at once per process, so a
+    burst of logins can't take every CPU from other requests. Up to
+    PASSWORD_HASHING_QUEUE_SIZE more wait for a thread. Beyond that,
+    PasswordHashingBusy is raised at once instead of queueing. argon2-cffi
+    releases the GIL, so the threads hash in parallel.
+
+    Callers block until their hash is done, which suits the sync auth views
+    served by Gunicorn's threaded workers. No view hashes passwords under
+    ASGI, an async one would need to await the future instead.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _get_executor(self):
+        with self._lock:
+            # Threads don't survive a fork, workers start their own pool
+            if self._executor is None or self._pid != os.getpid():
+                workers = settings.PASSWORD_HASHING_WORKERS
+                self._executor = ThreadPoolExecutor(
+                    workers,
+                    thread_name_prefix="password-hashing",
+                )
+                self._slots = threading.BoundedSemaphore(
+                    workers + settings.PASSWORD_HASHING_QUEUE_SIZE,
+                )
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def reset(self):
+        """Drop the pool, e.g. after its settings change."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _call(self, function, *args):
+        self._local.in_pool = True
+        return function(*args)
+
+    def submit(self, function, *args):
+        """Schedule function(*args), return a Future."""
+        executor, slots = self._get_executor()
+        if not slots.acquire(blocking=False):
+            metrics.increment("password_hashing.rejected")
+            raise PasswordHashingBusy
+        try:
+            future = executor.submit(self._call, function, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _future: slots.release())
+        return future
+
+    def run(self, function, *args):
+        """Run function(*args) in the pool, wait for and return its result."""
+        # Hashers called from a pool task must not wait for a free thread
+        if getattr(self._local, "in_pool", False):
+            return function(*args)
+        return self.submit(function, *args).result()
+
+
+hashing_pool = HashingPool()
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 with the costs from the ARGON2_* settings.
+
+    Find costs for a machine with `manage.py calibrate_argon2`. Hashes made
+    with other costs still verify, and are rehashed with these on the next
+    successful login. Hashing and verification run in hashing_pool.
+    """
+
+    def encode(self, password, salt):
+        return hashing_pool.run(super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return hashing_pool.run(super().verify, password, encoded)
+
+    @property
+    def time_cost(self):  # type: ignore[override]
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):  # type: ignore[override]
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):  # type: ignore[override]
+        return settings.ARGON2_PARALLELISM
+
+
+def time_hashes(hasher, *, concurrency=1, rounds=3):
+    """
+    Hash rounds passwords per thread with concurrency threads at once.
+
+    argon2-cffi releases the GIL, so the threads load the CPUs the way
+    concurrent logins do. Returns the median and p95 seconds per hash and
+    the CPU seconds each hash used.
+    """
+    barrier = threading.Barrier(concurrency)
+    salt = hasher.salt()
+
+    def run():
+        barrier.wait()
+        latencies = []
+        for _round in range(rounds):
+            started = time.perf_counter()
+            hasher.encode("calibration password", salt)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    cpu_started = time.process_time()
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [executor.submit(run) for _ in range(concurrency)]
+        latencies = [latency for future in futures for latency in future.result()]
+    cpu = (time.process_time() - cpu_started) / len(latencies)
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return statistics.median(latencies), p95, cpu
@@ -0,0 +1,106 @@
+"""
+Write-behind buffer of last_login timestamps.
+
+Logins record the time in process memory instead of updating the user row.
+The buffer is written with one UPDATE per LAST_LOGIN_BATCH_SIZE users by a
+timer LAST_LOGIN_FLUSH_SECONDS after the first login it holds, and when the
+worker exits, so stored values lag by at most that long. A worker that is
+killed loses its unwritten timestamps.
+"""
+
+import contextlib
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db import DatabaseError
+from django.db import connections
+from django.utils import timezone
+
+from shum.core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def write_last_logins(last_logins):
+    """Store {user pk: timestamp}, never moving a last_login backwards."""
+    user_model = get_user_model()
+    connection = connections[DEFAULT_DB_ALIAS]
+    table = connection.ops.quote_name(user_model._meta.db_table)  # noqa: SLF001
+    pk = connection.ops.quote_name(user_model._meta.pk.column)  # noqa: SLF001
+    items = list(last_logins.items())
+    batch_size = settings.LAST_LOGIN_BATCH_SIZE
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        values = ", ".join(["(%s, %s::timestamptz)"] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS u "  # noqa: S608
+                "SET last_login = GREATEST(u.last_login, v.last_login) "
+                f"FROM (VALUES {values}) AS v(id, last_login) "
+                f"WHERE u.{pk} = v.id",
+                [value for item in batch for value in item],
+            )
+
+
+class LastLoginBuffer:
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user, when=None):
+        """Set user.last_login and queue it to be stored."""
+        when = when or timezone.now()
+        user.last_login = when
+        if not settings.LAST_LOGIN_FLUSH_SECONDS:
+            write_last_logins({user.pk: when})
+            return
+
+        with self._lock:
+            self._merge({user.pk: when})
+
+    def _merge(self, last_logins):
+        for pk, when in last_logins.items():
+            self._pending[pk] = max(when, self._pending.get(pk, when))
+        if self._timer is None:
+            self._timer = threading.Timer(
+                settings.LAST_LOGIN_FLUSH_SECONDS,
+                self._flush_in_background,
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Store the buffered timestamps, return how many users were updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        try:
+            write_last_logins(pending)
+        except DatabaseError:
+            logger.exception("Could not store %d last logins", len(pending))
+            # Retry with the next flush
+            with self._lock:
+                self._merge(pending)
+            raise
+        metrics.increment("last_login.flushed", len(pending))
+        return len(pending)
+
+    def _flush_in_background(self):
+        try:
+            # Logged, and retried by the next flush
+            with contextlib.suppress(DatabaseError):
+                self.flush()
+        finally:
+            connections.close_all()
+
+
+last_logins = LastLoginBuffer()
@@ -0,0 +1,116 @@
+import os
+
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.core.management.base import BaseCommand
+
+from shum.users.hashers import time_hashes
+
+KIB_PER_MIB = 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Find the Argon2 costs that keep password hashing within a target "
+        "latency on this machine, with pool-size hashes running at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Median latency of one hash under full load",
+        )
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Hashes computed at once, e.g. the password hashing pool size",
+        )
+        parser.add_argument(
+            "--memory-budget-mb",
+            type=int,
+            default=1024,
+            help="Memory all concurrent hashes may use together",
+        )
+        parser.add_argument(
+            "--min-memory-mb",
+            type=int,
+            default=19,
+            help="Lowest memory cost to consider (OWASP minimum: 19)",
+        )
+        parser.add_argument(
+            "--max-memory-mb",
+            type=int,
+            default=64,
+            help="Highest memory cost to consider",
+        )
+        parser.add_argument("--parallelism", type=int, default=1)
+        parser.add_argument("--max-time-cost", type=int, default=10)
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=3,
+            help="Hashes per thread for each measurement",
+        )
+
+    def measure(self, time_cost, memory_cost, options):
+        hasher = Argon2PasswordHasher()
+        hasher.time_cost = time_cost
+        hasher.memory_cost = memory_cost
+        hasher.parallelism = options["parallelism"]
+        median, p95, cpu = time_hashes(
+            hasher,
+            concurrency=options["pool_size"],
+            rounds=options["rounds"],
+        )
+        self.stdout.write(
+            f"  time_cost={time_cost} memory_cost={memory_cost} KiB: "
+            f"median {median * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, "
+            f"CPU {cpu * 1000:.0f} ms",
+        )
+        return median * 1000
+
+    def handle(self, *args, **options):
+        target_ms = options["target_ms"]
+        pool_size = options["pool_size"]
+        # The most memory per hash that fits the budget with a full pool
+        memory_mb = min(
+            options["max_memory_mb"],
+            options["memory_budget_mb"] // pool_size,
+        )
+        self.stdout.write(
+            f"Argon2 on {os.cpu_count()} CPUs, {pool_size} hashes at once, "
+            f"target {target_ms:g} ms",
+        )
+
+        best = None
+        while memory_mb >= options["min_memory_mb"]:
+            memory_cost = memory_mb * KIB_PER_MIB
+            for time_cost in range(1, options["max_time_cost"] + 1):
+                if self.measure(time_cost, memory_cost, options) > target_ms:
+                    break
+                best = (time_cost, memory_cost)
+            if best is not None:
+                break
+            # Even one pass is too slow, trade memory for time
+            memory_mb //= 2
+
+        if best is None:
+            self.stderr.write(
+                self.style.ERROR(
+                    "No costs meet the target, raise --target-ms or lower "
+                    "--pool-size or --min-memory-mb.",
+                ),
+            )
+            return
+
+        time_cost, memory_cost = best
+        self.stdout.write(
+            self.style.SUCCESS(
+                "\nSet these for shum.users.hashers.TunedArgon2PasswordHasher:",
+            ),
+        )
+        self.stdout.write(f"ARGON2_TIME_COST={time_cost}")
+        self.stdout.write(f"ARGON2_MEMORY_COST={memory_cost}")
+        self.stdout.write(f"ARGON2_PARALLELISM={options['parallelism']}")
@@ -2,6 +2,8 @@ from typing import TYPE_CHECKING
 
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.db import connections
+from django.db import router
 
 if TYPE_CHECKING:
     from .models import User  # noqa: F401
@@ -10,6 +12,19 @@ if TYPE_CHECKING:
 class UserManager(DjangoUserManager["User"]):
     """Custom manager for the User model."""
 
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        Lowercase the whole address.
+
+        Emails are stored lowercased, so case-insensitive lookups are exact
+        matches that use the unique index on email.
+        """
+        return super().normalize_email(email).lower()
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: self.normalize_email(username)})
+
     def _create_user(self, email: str, password: str | None, **extra_fields):
         """
         Create and save a user with the given email and password.
@@ -28,6 +43,47 @@ class UserManager(DjangoUserManager["User"]):
         extra_fields.setdefault("is_superuser", False)
         return self._create_user(email, password, **extra_fields)
 
+    def create_user_if_new(self, email: str, password: str | None, **extra_fields):
+        """
+        Create a user unless the email is taken, in one INSERT … ON CONFLICT.
+
+        Returns the user, or None if a user has the email. Concurrent calls
+        with the same email create one user, without an IntegrityError
+        aborting the transaction. Like a queryset insert, sends no
+        pre_save or post_save signals.
+        """
+        extra_fields.setdefault("is_staff", False)
+        extra_fields.setdefault("is_superuser", False)
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        user.password = make_password(password)
+
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        opts = self.model._meta  # noqa: SLF001
+        fields = [field for field in opts.local_concrete_fields if field != opts.pk]
+        quote_name = connection.ops.quote_name
+        columns = ", ".join(quote_name(field.column) for field in fields)
+        placeholders = ", ".join(["%s"] * len(fields))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote_name(opts.db_table)} ({columns}) "  # noqa: S608
+                f"VALUES ({placeholders}) "
+                f"ON CONFLICT ({quote_name(opts.get_field('email').column)}) "
+                f"DO NOTHING RETURNING {quote_name(opts.pk.column)}",
+                [
+                    field.get_db_prep_save(field.pre_save(user, add=True), connection)
+                    for field in fields
+                ],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        user.pk = row[0]
+        user._state.adding = False  # noqa: SLF001
+        user._state.db = using  # noqa: SLF001
+        return user
+
     def create_superuser(self, email: str, password: str | None = None, **extra_fields):  # type: ignore[override]
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 08:03
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_add_avatar_field'),
+    ]
+
+    operations = [
+        # Fails if two users' emails differ only in case, merge them first
+        migrations.RunSQL(
+            "UPDATE users_user SET email = LOWER(email) WHERE email <> LOWER(email)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.CheckConstraint(condition=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='users_user_email_lowercase'),
+        ),
+    ]
@@ -2,8 +2,11 @@ from typing import ClassVar
 
 from django.contrib.auth.models import AbstractUser
 from django.db.models import CharField
+from django.db.models import CheckConstraint
 from django.db.models import EmailField
 from django.db.models import ImageField
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
@@ -43,6 +46,25 @@ class User(AbstractUser):
 
     objects: ClassVar[UserManager] = UserManager()
 
+    class Meta:
+        verbose_name = _("user")
+        verbose_name_plural = _("users")
+        constraints = [
+            # Keeps the unique index on email case-insensitive
+            CheckConstraint(
+                condition=Q(email=Lower("email")),
+                name="users_user_email_lowercase",
+            ),
+        ]
+
+    def clean(self):
+        super().clean()
+        self.email = self.__class__.objects.normalize_email(self.email)
+
+    def save(self, *args, **kwargs):
+        self.email = self.__class__.objects.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self) -> str:
         """Get URL for user's detail view.
 
@@ -0,0 +1,213 @@
+"""
+Revocation of rotated refresh tokens.
+
+Rotating a refresh token records its jti, with the tokens issued for it,
+until the old token would have expired anyway. The record is written with
+SET NX, so of several concurrent refreshes with the same token only one
+writes. The others get the same tokens back during a short grace window,
+after which the old token is rejected.
+
+Records live in Redis when REDIS_URL is set, otherwise in process memory,
+which is only correct with a single process. Each process also keeps a
+Bloom filter of the revoked jtis, synced from Redis every
+JWT_REVOCATION_SYNC_SECONDS. A jti the filter doesn't contain is not
+revoked, so checking a valid token needs no round trip. The filter can
+lag other processes by the sync interval, which stays below the grace
+window: the record is still written atomically, so a token rotated
+elsewhere gets that rotation's tokens back instead of a second rotation.
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+# Allowance for clock differences between the hosts recording rotations
+SYNC_MARGIN_SECONDS = 5
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter of strings."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, item):
+        """Add item, counting it only if the filter didn't contain it."""
+        added = False
+        for position in self._positions(item):
+            bit = 1 << (position & 7)
+            if not self.bits[position >> 3] & bit:
+                self.bits[position >> 3] |= bit
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class MemoryStore:
+    """Revocation records of this process only, for development and tests."""
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, record, ttl):
+        """Store record unless jti has one, return the existing record."""
+        now = time.time()
+        with self._lock:
+            existing = self._records.get(jti)
+            if existing is not None and existing[0] > now:
+                return existing[1]
+            self._records[jti] = (now + ttl, record)
+        return None
+
+    def get(self, jti):
+        expires_at, record = self._records.get(jti, (0, None))
+        return record if expires_at > time.time() else None
+
+    def revoked_since(self, timestamp):
+        now = time.time()
+        return [
+            jti
+            for jti, (expires_at, record) in list(self._records.items())
+            if expires_at > now and record["rotated_at"] >= timestamp
+        ]
+
+
+class RedisStore:
+    """
+    Revocation records in Redis, shared by all processes.
+
+    Each record is a key expiring with its token. A sorted set of jtis by
+    rotation time lets processes fetch the revocations they haven't seen.
+    """
+
+    def __init__(self, url, prefix="jwt:revoked"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.log_key = f"{prefix}:log"
+
+    def add(self, jti, record, ttl):
+        key = f"{self.prefix}:{jti}"
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.set(key, json.dumps(record), nx=True, ex=max(1, math.ceil(ttl)))
+        pipeline.zadd(self.log_key, {jti: record["rotated_at"]}, nx=True)
+        # Tokens rotated longer ago than their lifetime have expired
+        pipeline.zremrangebyscore(self.log_key, "-inf", time.time() - lifetime)
+        created, _added, _removed = pipeline.execute()
+        if created:
+            return None
+        return self.get(jti)
+
+    def get(self, jti):
+        value = self.client.get(f"{self.prefix}:{jti}")
+        return json.loads(value) if value is not None else None
+
+    def revoked_since(self, timestamp):
+        return [
+            jti.decode()
+            for jti in self.client.zrangebyscore(self.log_key, timestamp, "+inf")
+        ]
+
+
+class RevocationList:
+    """The revocation store of this process with its Bloom filter."""
+
+    def __init__(self):
+        self._store = None
+        self._bloom: BloomFilter | None = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = (
+                RedisStore(settings.REDIS_URL) if settings.REDIS_URL else MemoryStore()
+            )
+        return self._store
+
+    def reset(self):
+        """Forget the store and the filter, e.g. after settings change."""
+        with self._lock:
+            self._store = None
+            self._bloom = None
+            self._synced_at = 0.0
+
+    def _sync(self):
+        """Return the filter, after adding the revocations since the last sync."""
+        now = time.time()
+        bloom = self._bloom
+        if (
+            bloom is not None
+            and now - self._synced_at < settings.JWT_REVOCATION_SYNC_SECONDS
+        ):
+            return bloom
+        if bloom is None or bloom.count > bloom.capacity:
+            # Bloom filters can't forget, rebuild from unexpired records
+            bloom = BloomFilter(
+                settings.JWT_REVOCATION_BLOOM_CAPACITY,
+                settings.JWT_REVOCATION_BLOOM_ERROR_RATE,
+            )
+            since = 0.0
+        else:
+            since = self._synced_at - SYNC_MARGIN_SECONDS
+        # Fetched without the lock, checks don't wait on the round trip. A
+        # rotation this misses was recorded after now, the next sync adds it.
+        revoked = self.store.revoked_since(since)
+        with self._lock:
+            for jti in revoked:
+                bloom.add(jti)
+            self._bloom = bloom
+            self._synced_at = now
+        return bloom
+
+    def get(self, jti):
+        """Return the rotation record of jti, None if it isn't revoked."""
+        if jti not in self._sync():
+            return None
+        return self.store.get(jti)
+
+    def rotate(self, jti, expires_at, tokens):
+        """
+        Record that jti was rotated into tokens.
+
+        Returns None if this call recorded it, or the record of the rotation
+        that won a race with it.
+        """
+        bloom = self._sync()
+        record = {"rotated_at": time.time(), "tokens": tokens}
+        existing = self.store.add(jti, record, expires_at - record["rotated_at"])
+        with self._lock:
+            bloom.add(jti)
+        return existing
+
+    def in_grace(self, record):
+        rotated_ago = time.time() - record["rotated_at"]
+        return rotated_ago <= settings.JWT_REVOCATION_GRACE_SECONDS
+
+
+revocations = RevocationList()
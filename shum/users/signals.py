@@ -0,0 +1,47 @@
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.settings import api_settings
+
+from shum.users.authentication import invalidate_token
+from shum.users.authentication import invalidate_user
+from shum.users.last_login import last_logins
+from shum.users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop the cached user when it changes, e.g. is deactivated or its password.
+
+    Dropped again on commit: until then other requests read the old row and
+    may cache it, which would outlive the change by AUTH_CACHE_TIMEOUT.
+    """
+    # A stale last_login doesn't affect authentication
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id), using=kwargs["using"])
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+    transaction.on_commit(
+        lambda: invalidate_token(instance.key),
+        using=kwargs["using"],
+    )
+
+
+# Replace django.contrib.auth's receiver, which saves the user on every login
+user_logged_in.disconnect(dispatch_uid="update_last_login")
+
+
+@receiver(user_logged_in)
+def buffer_last_login(sender, user, **kwargs):
+    last_logins.record(user)
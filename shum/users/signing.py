@@ -0,0 +1,171 @@
+"""
+Asymmetric JWT signing with a ring of keys identified by kid.
+
+Keys are PEM files named ``<kid>.pem`` in JWT_KEYS_DIR. Ed25519 keys sign
+with EdDSA and RSA keys with RS256. Tokens are signed with the private key
+of JWT_ACTIVE_KEY_ID and carry its kid in the header, verification picks
+the public key by kid. Every key in the directory is published at
+``/.well-known/jwks.json``, so other services can verify tokens without
+calling us.
+
+Rotating a key:
+
+1. Add the new private key to the directory. It is published but not used.
+2. Once verifiers have fetched the new JWKS, set JWT_ACTIVE_KEY_ID to it.
+3. After REFRESH_TOKEN_LIFETIME, delete the old key (or keep its public key
+   only until then).
+"""
+
+import hashlib
+import json
+from functools import cached_property
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from cryptography.hazmat.primitives.serialization import load_pem_public_key
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from jwt.algorithms import OKPAlgorithm
+from jwt.algorithms import RSAAlgorithm
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.exceptions import TokenBackendExpiredToken
+from rest_framework_simplejwt.settings import api_settings
+
+ALGORITHMS = {
+    Ed25519PrivateKey: "EdDSA",
+    Ed25519PublicKey: "EdDSA",
+    RSAPrivateKey: "RS256",
+    RSAPublicKey: "RS256",
+}
+
+
+class SigningKey:
+    """A parsed key of the ring, private_key is None for retired keys."""
+
+    def __init__(self, kid, private_key=None, public_key=None):
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = public_key or private_key.public_key()
+        self.algorithm = next(
+            (
+                algorithm
+                for key_type, algorithm in ALGORITHMS.items()
+                if isinstance(self.public_key, key_type)
+            ),
+            None,
+        )
+        if self.algorithm is None:
+            error_message = f"JWT key {kid} must be an Ed25519 or RSA key"
+            raise ImproperlyConfigured(error_message)
+
+    @classmethod
+    def from_pem(cls, kid, pem):
+        try:
+            return cls(kid, private_key=load_pem_private_key(pem, password=None))
+        except ValueError:
+            return cls(kid, public_key=load_pem_public_key(pem))
+
+    @property
+    def jwk(self):
+        algorithm = OKPAlgorithm if self.algorithm == "EdDSA" else RSAAlgorithm
+        jwk = algorithm.to_jwk(self.public_key, as_dict=True)
+        return {**jwk, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+def load_keys(directory):
+    """Return the keys of directory by kid."""
+    return {
+        path.stem: SigningKey.from_pem(path.stem, path.read_bytes())
+        for path in sorted(Path(directory).glob("*.pem"))
+    }
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """simplejwt token backend signing with the active key of a key ring."""
+
+    def __init__(self, keys, active_kid, **kwargs):
+        active = keys.get(active_kid)
+        if active is None or active.private_key is None:
+            error_message = f"No private JWT key with kid {active_kid!r}"
+            raise ImproperlyConfigured(error_message)
+        super().__init__(active.algorithm, **kwargs)
+        self.keys = keys
+        self.active = active
+
+    @cached_property
+    def jwks(self):
+        return {"keys": [key.jwk for key in self.keys.values()]}
+
+    @cached_property
+    def jwks_etag(self):
+        body = json.dumps(self.jwks, sort_keys=True).encode()
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    def encode(self, payload):
+        payload = payload.copy()
+        if self.audience is not None:
+            payload["aud"] = self.audience
+        if self.issuer is not None:
+            payload["iss"] = self.issuer
+        return jwt.encode(
+            payload,
+            self.active.private_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):  # noqa: FBT002
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.keys.get(kid)
+            if key is None:
+                raise TokenBackendError(_("Token is invalid"))
+            return jwt.decode(
+                token,
+                key.public_key,
+                # Only the key's own algorithm, an HS256 token is not accepted
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.ExpiredSignatureError as e:
+            raise TokenBackendExpiredToken(_("Token is expired")) from e
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+
+def install_token_backend():
+    """
+    Replace simplejwt's HS256 backend with the key ring, if JWT_KEYS_DIR is set.
+
+    Tokens look their backend up in rest_framework_simplejwt.state when
+    created, so replacing it there covers every token class.
+    """
+    if not settings.JWT_KEYS_DIR:
+        return
+    keys = load_keys(settings.JWT_KEYS_DIR)
+    active_kid = settings.JWT_ACTIVE_KEY_ID
+    if not active_kid and len(keys) == 1:
+        active_kid = next(iter(keys))
+    state.token_backend = KeyRingTokenBackend(
+        keys,
+        active_kid,
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
@@ -1,6 +1,10 @@
 import pytest
+from asgiref.sync import async_to_sync
+from rest_framework import status
 from rest_framework.test import APIRequestFactory
+from rest_framework.test import force_authenticate
 
+from shum.users.api.views import AsyncUserProfileView
 from shum.users.api.views import UserViewSet
 from shum.users.models import User
 
@@ -42,3 +46,15 @@ class TestUserViewSet:
         }
 
         assert response.data == expected_data
+
+
+class TestAsyncUserProfileView:
+    def test_get(self, user: User):
+        request = APIRequestFactory().get("/fake-url/")
+        force_authenticate(request, user=user)
+
+        view = AsyncUserProfileView.as_view()
+        response = async_to_sync(view)(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["email"] == user.email
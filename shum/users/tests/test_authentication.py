@@ -1,11 +1,30 @@
+import threading
+
 import pytest
+from allauth.account.models import EmailAddress
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db import connections
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
 from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
 
 from shum.users.api.serializers import UserLoginSerializer
 from shum.users.api.serializers import UserRegistrationSerializer
+from shum.users.authentication import CachedJWTAuthentication
+from shum.users.authentication import CachedSessionAuthentication
+from shum.users.authentication import CachedTokenAuthentication
+from shum.users.authentication import get_cache
+from shum.users.authentication import user_cache_key
 
 User = get_user_model()
 
@@ -146,6 +165,73 @@ class TestEmailAuthentication:
         user = User.objects.get(email=email)
         assert user.name == f"{first_name} {last_name}"
 
+    def test_registration_rejects_email_differing_in_case(self):
+        """Emails are unique regardless of case."""
+        User.objects.create_user(email="taken@example.com", password="testpass123")  # noqa: S106
+
+        response = APIClient().post(
+            "/api/auth/register/",
+            {
+                "email": "Taken@Example.com",
+                "password": "testpass123",
+                "first_name": "John",
+                "last_name": "Doe",
+            },
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {
+            "email": ["user with this email address already exists."],
+        }
+
+    def test_registration_queries(self):
+        """Registration inserts the user and its email address, nothing else."""
+        client = APIClient()
+        data = {
+            "email": "newuser@example.com",
+            "password": "testpass123",
+            "first_name": "John",
+            "last_name": "Doe",
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post("/api/auth/register/", data, format="json")
+
+        # Besides the savepoints of the request's transaction
+        statements = [
+            query["sql"].split(" ", 3)[:3]
+            for query in queries.captured_queries
+            if "SAVEPOINT" not in query["sql"]
+        ]
+        assert statements == [
+            ["INSERT", "INTO", '"users_user"'],
+            ["INSERT", "INTO", '"account_emailaddress"'],
+        ]
+        assert response.status_code == status.HTTP_201_CREATED
+        email_address = EmailAddress.objects.get(user_id=response.data["user"]["id"])
+        assert email_address.email == "newuser@example.com"
+        assert email_address.primary
+        assert not email_address.verified
+
+    def test_registration_conflict_after_validation(self):
+        """An email taken between validation and insert is a 400, not a 500."""
+        serializer = UserRegistrationSerializer(
+            data={
+                "email": "race@example.com",
+                "password": "testpass123",
+                "first_name": "John",
+                "last_name": "Doe",
+            },
+        )
+        assert serializer.is_valid()
+        User.objects.create_user(email="race@example.com", password="testpass123")  # noqa: S106
+
+        with pytest.raises(ValidationError) as excinfo:
+            serializer.save()
+        assert "email" in excinfo.value.detail
+        assert User.objects.filter(email="race@example.com").count() == 1
+
     def test_login_serializer_consolidates_token_generation(self):
         """Test that login serializer handles complete response generation."""
         email = "test@example.com"
@@ -203,3 +289,119 @@ class TestEmailAuthentication:
         # Verify user was created
         user = User.objects.get(email=email)
         assert user.name == f"{first_name} {last_name}"
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self):
+        cache.clear()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+    def authenticate(self, authentication, **headers):
+        request = Request(APIRequestFactory().get("/api/ads/", headers=headers))
+        return authentication.authenticate(request)
+
+    def test_jwt_user_is_cached(self, user, django_assert_num_queries):
+        """Repeated JWT requests don't query the user."""
+        header = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        authentication = CachedJWTAuthentication()
+
+        with django_assert_num_queries(1):
+            self.authenticate(authentication, **header)
+        with django_assert_num_queries(0):
+            authenticated, _token = self.authenticate(authentication, **header)
+        assert authenticated == user
+
+    def test_jwt_user_is_invalidated_on_save(self, user):
+        """Deactivating a user takes effect immediately."""
+        header = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        authentication = CachedJWTAuthentication()
+        self.authenticate(authentication, **header)
+
+        user.is_active = False
+        user.save()
+
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(authentication, **header)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_user_cached_before_commit_is_invalidated(self, user):
+        """A request reading the old row until the change commits can't keep it."""
+        header = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        authentication = CachedJWTAuthentication()
+
+        def concurrent_request():
+            try:
+                self.authenticate(authentication, **header)
+            finally:
+                connections.close_all()
+
+        with transaction.atomic():
+            user.is_active = False
+            user.save()
+            # Sees the committed, active user and caches it
+            thread = threading.Thread(target=concurrent_request)
+            thread.start()
+            thread.join()
+            assert get_cache().get(user_cache_key(user.pk)).is_active
+
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(authentication, **header)
+
+    def test_last_login_keeps_cached_user(self, user, django_assert_num_queries):
+        header = {"authorization": f"Bearer {AccessToken.for_user(user)}"}
+        authentication = CachedJWTAuthentication()
+        self.authenticate(authentication, **header)
+
+        user.save(update_fields=["last_login"])
+
+        with django_assert_num_queries(0):
+            self.authenticate(authentication, **header)
+
+    def test_token_is_cached_until_deleted(self, user, django_assert_num_queries):
+        token = Token.objects.create(user=user)
+        header = {"authorization": f"Token {token.key}"}
+        authentication = CachedTokenAuthentication()
+
+        with django_assert_num_queries(2):
+            self.authenticate(authentication, **header)
+        with django_assert_num_queries(0):
+            authenticated, cached_token = self.authenticate(authentication, **header)
+        assert authenticated == user
+        assert cached_token.key == token.key
+
+        token.delete()
+
+        with pytest.raises(AuthenticationFailed):
+            self.authenticate(authentication, **header)
+
+    def test_session_user_is_cached(self, user, django_assert_num_queries):
+        client = APIClient()
+        client.force_login(user)
+        request = APIRequestFactory().get("/api/ads/")
+        request.session = client.session
+        authentication = CachedSessionAuthentication()
+
+        authentication.authenticate(Request(request))
+        with django_assert_num_queries(0):
+            authenticated, _token = authentication.authenticate(Request(request))
+        assert authenticated == user
+
+    def test_session_after_password_change(self, user):
+        """A password change still logs out other sessions."""
+        client = APIClient()
+        client.force_login(user)
+        assert client.get("/api/auth/profile/").status_code == status.HTTP_200_OK
+
+        user.set_password("newpass456")
+        user.save()
+
+        response = client.get("/api/auth/profile/")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
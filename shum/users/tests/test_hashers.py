@@ -0,0 +1,123 @@
+import threading
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.users.hashers import hashing_pool
+
+User = get_user_model()
+
+
+@pytest.fixture
+def argon2(settings):
+    settings.PASSWORD_HASHERS = ["shum.users.hashers.TunedArgon2PasswordHasher"]
+    settings.ARGON2_TIME_COST = 1
+    settings.ARGON2_MEMORY_COST = 1024
+    settings.ARGON2_PARALLELISM = 1
+    return settings
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/auth/login/", "/api/auth/token/"])
+def test_login_upgrades_outdated_hash(argon2, url):
+    """A successful login rehashes the password with the current costs."""
+    user = User.objects.create_user(
+        email="test@example.com",
+        password="testpass123",  # noqa: S106
+    )
+    argon2.ARGON2_TIME_COST = 2
+
+    response = APIClient().post(
+        url,
+        {"email": "test@example.com", "password": "testpass123"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    user.refresh_from_db()
+    decoded = identify_hasher(user.password).decode(user.password)
+    assert decoded["time_cost"] == 2  # noqa: PLR2004
+    assert user.check_password("testpass123")
+
+
+@pytest.mark.django_db
+class TestHashingPool:
+    @pytest.fixture(autouse=True)
+    def _pool(self, argon2):
+        argon2.PASSWORD_HASHING_WORKERS = 1
+        argon2.PASSWORD_HASHING_QUEUE_SIZE = 0
+        hashing_pool.reset()
+        yield
+        hashing_pool.reset()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+    def test_saturated_pool_sheds_logins(self, user):
+        """Logins fail fast with 503 while every hashing slot is taken."""
+        release = threading.Event()
+        busy = hashing_pool.submit(release.wait)
+        try:
+            response = APIClient().post(
+                "/api/auth/login/",
+                {"email": "test@example.com", "password": "testpass123"},
+                format="json",
+            )
+        finally:
+            release.set()
+            busy.result()
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+
+    def test_saturated_pool_sheds_registrations(self):
+        """Registrations get the same 503, not a 500, and create no user."""
+        release = threading.Event()
+        busy = hashing_pool.submit(release.wait)
+        try:
+            response = APIClient().post(
+                "/api/auth/register/",
+                {
+                    "email": "new@example.com",
+                    "password": "tram-lilac-57-oven",
+                    "first_name": "Maria",
+                    "last_name": "Kovalenko",
+                },
+                format="json",
+            )
+        finally:
+            release.set()
+            busy.result()
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response["Retry-After"] == "1"
+        assert not User.objects.filter(email="new@example.com").exists()
+
+
+def test_calibrate_argon2():
+    out = StringIO()
+
+    call_command(
+        "calibrate_argon2",
+        "--target-ms=10000",
+        "--pool-size=2",
+        "--memory-budget-mb=2",
+        "--min-memory-mb=1",
+        "--max-time-cost=2",
+        "--rounds=1",
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "ARGON2_TIME_COST=2" in output
+    assert "ARGON2_MEMORY_COST=1024" in output
+    assert "ARGON2_PARALLELISM=1" in output
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.users.last_login import last_logins
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestLastLoginBuffer:
+    @pytest.fixture(autouse=True)
+    def _buffered(self, settings):
+        settings.LAST_LOGIN_FLUSH_SECONDS = 60
+        yield
+        last_logins.flush()
+
+    @pytest.fixture
+    def user(self):
+        return User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+
+    def login(self, url):
+        return APIClient().post(
+            url,
+            {"email": "test@example.com", "password": "testpass123"},
+            format="json",
+        )
+
+    @pytest.mark.parametrize("url", ["/api/auth/token/", "/api/auth/login/"])
+    def test_login_does_not_write_user(self, user, url, django_assert_num_queries):
+        """The user row is only written by the flush."""
+        response = self.login(url)
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.last_login is None
+
+        with django_assert_num_queries(1):
+            assert last_logins.flush() == 1
+        user.refresh_from_db()
+        assert user.last_login is not None
+
+    def test_session_login_is_buffered(self, user):
+        APIClient().force_login(user)
+
+        user.refresh_from_db()
+        assert user.last_login is None
+
+    def test_flush_batches_users(self, settings, django_assert_num_queries):
+        settings.LAST_LOGIN_BATCH_SIZE = 2
+        users = [
+            User.objects.create_user(email=f"user{number}@example.com")
+            for number in range(5)
+        ]
+        for user in users:
+            last_logins.record(user)
+
+        with django_assert_num_queries(3):
+            assert last_logins.flush() == len(users)
+        assert User.objects.filter(last_login__isnull=True).count() == 0
+
+    def test_flush_keeps_latest_login(self, user):
+        """An older buffered login, e.g. from another worker, doesn't win."""
+        now = timezone.now()
+        User.objects.filter(pk=user.pk).update(last_login=now)
+
+        last_logins.record(user, when=now - timedelta(minutes=5))
+        last_logins.flush()
+
+        user.refresh_from_db()
+        assert user.last_login == now
+
+    def test_write_through(self, user, settings):
+        settings.LAST_LOGIN_FLUSH_SECONDS = 0
+
+        last_logins.record(user)
+
+        assert User.objects.get(pk=user.pk).last_login == user.last_login
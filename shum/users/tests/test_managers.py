@@ -1,7 +1,12 @@
 from io import StringIO
 
 import pytest
+from allauth.account.utils import filter_users_by_email
+from django.contrib.auth import authenticate
 from django.core.management import call_command
+from django.db import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from shum.users.models import User
 
@@ -36,6 +41,76 @@ class TestUserManager:
         )
         assert user.username is None
 
+    def test_email_is_lowercased(self):
+        user = User.objects.create_user(
+            email="John.Smith@Example.COM",
+            password="something-r@nd0m!",  # noqa: S106
+        )
+        assert user.email == "john.smith@example.com"
+        assert User.objects.get_by_natural_key("JOHN.SMITH@example.com") == user
+
+    def test_create_user_if_new(self):
+        user = User.objects.create_user_if_new(
+            email="John@Example.com",
+            password="something-r@nd0m!",  # noqa: S106
+            name="John",
+        )
+
+        assert user == User.objects.get(email="john@example.com")
+        assert user.check_password("something-r@nd0m!")
+        assert not user.is_staff
+        assert not user._state.adding  # noqa: SLF001
+        assert (
+            User.objects.create_user_if_new(email="JOHN@example.com", password=None)
+            is None
+        )
+        assert User.objects.count() == 1
+
+    def test_mixed_case_email_is_rejected_by_database(self):
+        user = User.objects.create_user(email="john@example.com")
+        with pytest.raises(IntegrityError):
+            User.objects.filter(pk=user.pk).update(email="John@example.com")
+
+
+def explain_user_lookups(queries):
+    """Return the query plans of the captured lookups of users by email."""
+    plans = []
+    with connection.cursor() as cursor:
+        # The test table is tiny, make the planner use an index if it can
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for query in queries:
+            if '"users_user"."email" =' in query["sql"]:
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plans.append("\n".join(row[0] for row in cursor.fetchall()))
+    return plans
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "lookup",
+    [
+        lambda email: authenticate(email=email, password="something-r@nd0m!"),  # noqa: S106
+        filter_users_by_email,
+    ],
+    ids=["model_backend", "allauth"],
+)
+def test_email_lookup_uses_unique_index(lookup):
+    user = User.objects.create_user(
+        email="john@example.com",
+        password="something-r@nd0m!",  # noqa: S106
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        found = lookup("John@Example.com")
+
+    assert found in (user, [user])
+    plans = explain_user_lookups(queries.captured_queries)
+    assert plans
+    for plan in plans:
+        # The unique index, or Django's varchar_pattern_ops index on email
+        assert "Seq Scan" not in plan
+        assert "Index Scan using users_user_email_" in plan
+
 
 @pytest.mark.django_db
 def test_createsuperuser_command():
@@ -0,0 +1,95 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from shum.users.revocation import BloomFilter
+from shum.users.revocation import revocations
+
+User = get_user_model()
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for number in range(1000):
+        bloom.add(f"revoked-{number}")
+
+    assert all(f"revoked-{number}" in bloom for number in range(1000))
+    false_positives = sum(f"valid-{number}" in bloom for number in range(10000))
+    assert false_positives < 200  # noqa: PLR2004
+
+
+def test_bloom_filter_counts_distinct_items():
+    """Adding a jti again, as syncs overlapping in time do, isn't counted."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for _ in range(3):
+        for number in range(10):
+            bloom.add(f"revoked-{number}")
+
+    assert bloom.count == 10  # noqa: PLR2004
+
+
+@pytest.mark.django_db
+class TestRefreshTokenRevocation:
+    @pytest.fixture(autouse=True)
+    def _revocations(self):
+        revocations.reset()
+        yield
+        revocations.reset()
+
+    @pytest.fixture
+    def refresh(self):
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        return str(RefreshToken.for_user(user))
+
+    def post_refresh(self, refresh):
+        return APIClient().post(
+            "/api/auth/token/refresh/",
+            {"refresh": refresh},
+            format="json",
+        )
+
+    def test_rotation_revokes_old_token(self, refresh, settings):
+        settings.JWT_REVOCATION_GRACE_SECONDS = 0
+        response = self.post_refresh(refresh)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["refresh"] != refresh
+
+        assert self.post_refresh(refresh).status_code == status.HTTP_401_UNAUTHORIZED
+        # The rotated token still works
+        new_refresh = response.data["refresh"]
+        assert self.post_refresh(new_refresh).status_code == status.HTTP_200_OK
+
+    def test_concurrent_refresh_in_grace_window(self, refresh):
+        """A retried or concurrent refresh gets the same tokens back."""
+        first = self.post_refresh(refresh)
+        second = self.post_refresh(refresh)
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data == first.data
+
+    def test_verify_rejects_revoked_token(self, refresh):
+        client = APIClient()
+        url = "/api/auth/token/verify/"
+        assert client.post(url, {"token": refresh}).status_code == status.HTTP_200_OK
+
+        self.post_refresh(refresh)
+
+        response = client.post(url, {"token": refresh})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_valid_tokens_skip_the_store(self, refresh, monkeypatch):
+        """Tokens missing from the Bloom filter are never looked up."""
+        self.post_refresh(refresh)
+
+        def get(jti):
+            raise AssertionError(jti)
+
+        monkeypatch.setattr(revocations.store, "get", get)
+        token = RefreshToken(refresh)
+        token.set_jti()
+        assert revocations.get(token["jti"]) is None
@@ -0,0 +1,114 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.hazmat.primitives.serialization import NoEncryption
+from cryptography.hazmat.primitives.serialization import PrivateFormat
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt import state
+from rest_framework_simplejwt.tokens import AccessToken
+
+from shum.users.signing import KeyRingTokenBackend
+from shum.users.signing import SigningKey
+from shum.users.signing import load_keys
+
+User = get_user_model()
+
+
+def write_key(directory, kid, private_key):
+    pem = private_key.private_bytes(
+        Encoding.PEM,
+        PrivateFormat.PKCS8,
+        NoEncryption(),
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+@pytest.fixture
+def keys(tmp_path):
+    write_key(tmp_path, "ed-2025", Ed25519PrivateKey.generate())
+    write_key(tmp_path, "rsa-2024", generate_private_key(65537, 2048))
+    return load_keys(tmp_path)
+
+
+@pytest.fixture
+def key_ring(keys, monkeypatch):
+    backend = KeyRingTokenBackend(keys, "ed-2025")
+    monkeypatch.setattr(state, "token_backend", backend)
+    return backend
+
+
+class TestKeyRingTokenBackend:
+    def test_signs_with_active_key(self, key_ring):
+        token = key_ring.encode({"user_id": 1})
+
+        assert jwt.get_unverified_header(token) == {
+            "alg": "EdDSA",
+            "kid": "ed-2025",
+            "typ": "JWT",
+        }
+        assert key_ring.decode(token) == {"user_id": 1}
+
+    def test_verifies_tokens_of_previous_key(self, keys):
+        """Tokens signed before a rotation stay valid."""
+        token = KeyRingTokenBackend(keys, "rsa-2024").encode({"user_id": 1})
+
+        assert KeyRingTokenBackend(keys, "ed-2025").decode(token) == {"user_id": 1}
+
+    def test_rejects_unknown_keys(self, key_ring):
+        """Unknown kids, foreign keys and shared-secret tokens are rejected."""
+        tokens = [
+            KeyRingTokenBackend({kid: SigningKey(kid, key)}, kid).encode({"user_id": 1})
+            for kid, key in [
+                ("unknown", Ed25519PrivateKey.generate()),
+                ("ed-2025", Ed25519PrivateKey.generate()),
+            ]
+        ]
+        tokens.append(jwt.encode({"user_id": 1}, "secret", headers={"kid": "ed-2025"}))
+
+        for token in tokens:
+            with pytest.raises(Exception, match="Token is invalid"):
+                key_ring.decode(token)
+
+    def test_public_keys_verify_only(self, keys):
+        retired = keys["rsa-2024"]
+        retired.private_key = None
+
+        with pytest.raises(Exception, match="No private JWT key"):
+            KeyRingTokenBackend(keys, "rsa-2024")
+
+
+@pytest.mark.django_db
+class TestJWKSView:
+    def test_tokens_verify_with_published_keys(self, key_ring):
+        """A gateway can verify our tokens with the JWKS alone."""
+        user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",  # noqa: S106
+        )
+        token = str(AccessToken.for_user(user))
+
+        response = APIClient().get("/.well-known/jwks.json")
+        assert response.status_code == status.HTTP_200_OK
+        assert "public" in response["Cache-Control"]
+        jwks = jwt.PyJWKSet.from_dict(response.json())
+        key = jwks[jwt.get_unverified_header(token)["kid"]]
+
+        assert jwt.decode(token, key, algorithms=["EdDSA"])["user_id"] == str(user.id)
+        assert "d" not in response.json()["keys"][0]
+
+    def test_not_modified(self, key_ring):
+        client = APIClient()
+        etag = client.get("/.well-known/jwks.json")["ETag"]
+
+        response = client.get("/.well-known/jwks.json", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_shared_secret_publishes_no_keys(self):
+        response = APIClient().get("/.well-known/jwks.json")
+
+        assert response.json() == {"keys": []}
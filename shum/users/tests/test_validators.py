@@ -0,0 +1,132 @@
+import gzip
+from difflib import SequenceMatcher
+
+import pytest
+from django.contrib.auth.password_validation import CommonPasswordValidator
+from django.contrib.auth.password_validation import UserAttributeSimilarityValidator
+from django.core.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from shum.users.models import User
+from shum.users.validators import BoundedUserAttributeSimilarityValidator
+from shum.users.validators import CompactCommonPasswordValidator
+from shum.users.validators import PasswordHashSet
+from shum.users.validators import load_password_set
+
+
+class TestCompactCommonPasswordValidator:
+    def test_matches_django_validator(self):
+        django_validator = CommonPasswordValidator()
+        validator = CompactCommonPasswordValidator()
+
+        assert len(validator.passwords) == len(django_validator.passwords)
+        for password in list(django_validator.passwords)[:500]:
+            assert password in validator.passwords
+        for password in ["Password123", " qwerty ", "correct horse battery"]:
+            assert (password.lower().strip() in validator.passwords) == (
+                password.lower().strip() in django_validator.passwords
+            )
+
+    def test_rejects_common_password(self):
+        with pytest.raises(ValidationError) as excinfo:
+            CompactCommonPasswordValidator().validate("Password123")
+        assert excinfo.value.error_list[0].code == "password_too_common"
+
+    def test_list_is_loaded_once(self):
+        assert (
+            CompactCommonPasswordValidator().passwords
+            is CompactCommonPasswordValidator().passwords
+        )
+
+    def test_custom_list(self, tmp_path):
+        plain = tmp_path / "passwords.txt"
+        plain.write_text("hunter2\nswordfish\n")
+        gzipped = tmp_path / "passwords.txt.gz"
+        with gzip.open(gzipped, "wt") as f:
+            f.write("hunter2\nswordfish\n")
+
+        for path in [plain, gzipped]:
+            validator = CompactCommonPasswordValidator(password_list_path=path)
+            with pytest.raises(ValidationError):
+                validator.validate("Hunter2")
+            validator.validate("hunter3")
+        load_password_set.cache_clear()
+
+    def test_hash_set(self):
+        passwords = PasswordHashSet(["a", "b", "b", "c"])
+
+        assert len(passwords) == 3  # noqa: PLR2004
+        assert "b" in passwords
+        assert "d" not in passwords
+        assert "" not in PasswordHashSet([])
+
+
+class TestBoundedUserAttributeSimilarityValidator:
+    @pytest.mark.parametrize(
+        "password",
+        ["john.doe1", "doejohn!", "examplecom", "zq9#Lm2!vX", "J0hnD0e@ex"],
+    )
+    def test_matches_django_validator(self, password):
+        user = User(email="john.doe@example.com", name="John Doe")
+
+        def outcome(validator):
+            try:
+                validator.validate(password, user=user)
+            except ValidationError as e:
+                return e.error_list[0].params
+            return None
+
+        assert outcome(BoundedUserAttributeSimilarityValidator()) == outcome(
+            UserAttributeSimilarityValidator(["email", "name"]),
+        )
+
+    def test_ratio_is_quick_ratio(self):
+        user = User(email="someone@example.com", name="Maria")
+        validator = BoundedUserAttributeSimilarityValidator(max_similarity=0.5)
+        assert SequenceMatcher(a="mariaxx", b="maria").quick_ratio() >= 0.5  # noqa: PLR2004
+
+        with pytest.raises(ValidationError) as excinfo:
+            validator.validate("MariaXX", user=user)
+        assert excinfo.value.error_list[0].params == {"verbose_name": "Name of User"}
+
+    def test_long_password_is_not_compared(self):
+        name = "a" * 200
+        user = User(email="someone@example.com", name=name)
+
+        BoundedUserAttributeSimilarityValidator().validate(name, user=user)
+        with pytest.raises(ValidationError):
+            UserAttributeSimilarityValidator(["name"]).validate(name, user=user)
+
+
+@pytest.mark.django_db
+class TestRegistrationPasswordValidation:
+    def register(self, password):
+        return APIClient().post(
+            "/api/auth/register/",
+            {
+                "email": "maria.kovalenko@example.com",
+                "password": password,
+                "first_name": "Maria",
+                "last_name": "Kovalenko",
+            },
+            format="json",
+        )
+
+    @pytest.mark.parametrize(
+        "password",
+        ["password123", "12345678901", "kovalenko1"],
+    )
+    def test_weak_password_is_rejected(self, password):
+        response = self.register(password)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.data
+        assert not User.objects.filter(
+            email="maria.kovalenko@example.com",
+        ).exists()
+
+    def test_strong_password_is_accepted(self):
+        response = self.register("tram-lilac-57-oven")
+
+        assert response.status_code == status.HTTP_201_CREATED
@@ -0,0 +1,136 @@
+"""
+Password validators with a small, predictable cost.
+
+Drop-in replacements for Django's CommonPasswordValidator and
+UserAttributeSimilarityValidator, listed in AUTH_PASSWORD_VALIDATORS.
+"""
+
+import bisect
+import functools
+import gzip
+import hashlib
+import re
+from array import array
+from collections import Counter
+
+from django.contrib.auth.password_validation import CommonPasswordValidator
+from django.contrib.auth.password_validation import UserAttributeSimilarityValidator
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError
+
+
+def _password_hash(password):
+    digest = hashlib.blake2b(password.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class PasswordHashSet:
+    """
+    A frozen set of passwords, stored as sorted 64-bit hashes.
+
+    Django keeps its 20,000 common passwords as a set of str, about 1.5 MB
+    of small objects per process. This keeps one 160 KB array instead, and
+    lookups don't touch per-entry reference counts, so workers forked after
+    it was loaded share its pages. A password whose hash collides with a
+    listed one is reported as listed, at 20,000 entries that is about one
+    password in 10^15.
+    """
+
+    def __init__(self, passwords):
+        self._hashes = array("Q", sorted({_password_hash(p) for p in passwords}))
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, password):
+        digest = _password_hash(password)
+        index = bisect.bisect_left(self._hashes, digest)
+        return index < len(self._hashes) and self._hashes[index] == digest
+
+
+@functools.cache
+def load_password_set(path):
+    """Return the passwords of a list file, which may be gzipped, once per path."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return PasswordHashSet(line.strip() for line in f)
+    except OSError:
+        with open(path, encoding="utf-8") as f:  # noqa: PTH123
+            return PasswordHashSet(line.strip() for line in f)
+
+
+class CompactCommonPasswordValidator(CommonPasswordValidator):
+    """
+    CommonPasswordValidator backed by a shared PasswordHashSet.
+
+    The list is read once per process, by the Gunicorn master when it warms
+    up, instead of once per validator instance in every worker.
+    """
+
+    def __init__(
+        self,
+        password_list_path=CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH,
+    ):
+        if password_list_path is CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH:
+            password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+        self.passwords = load_password_set(str(password_list_path))
+
+
+class BoundedUserAttributeSimilarityValidator(UserAttributeSimilarityValidator):
+    """
+    UserAttributeSimilarityValidator with a bounded cost.
+
+    Similarity is SequenceMatcher.quick_ratio(), the share of characters the
+    password and an attribute have in common, computed from character
+    counts with the password counted once for all attributes. Passwords
+    longer than max_password_length are not compared: they are far from
+    guessable from a name or an email, and would only make the check slower.
+    """
+
+    # The attributes shum.users.models.User has
+    DEFAULT_USER_ATTRIBUTES = ("email", "name")
+
+    def __init__(
+        self,
+        user_attributes=DEFAULT_USER_ATTRIBUTES,
+        max_similarity=0.7,
+        max_password_length=128,
+    ):
+        super().__init__(user_attributes, max_similarity)
+        self.max_password_length = max_password_length
+
+    def validate(self, password, user=None):
+        if not user or len(password) > self.max_password_length:
+            return
+
+        password = password.lower()
+        password_length = len(password)
+        password_counts = Counter(password)
+        for attribute_name in self.user_attributes:
+            value = getattr(user, attribute_name, None)
+            if not value or not isinstance(value, str):
+                continue
+            value_lower = value.lower()
+            value_parts = dict.fromkeys([*re.split(r"\W+", value_lower), value_lower])
+            for value_part in value_parts:
+                # Django's shortcut: a part this much shorter can't be similar
+                if (
+                    password_length >= 10 * len(value_part)
+                    and len(value_part) < self.max_similarity / 2 * password_length
+                ):
+                    continue
+                common = sum((password_counts & Counter(value_part)).values())
+                length = password_length + len(value_part)
+                ratio = 2.0 * common / length if length else 1.0
+                if ratio >= self.max_similarity:
+                    try:
+                        verbose_name = str(
+                            user._meta.get_field(attribute_name).verbose_name,  # noqa: SLF001
+                        )
+                    except FieldDoesNotExist:
+                        verbose_name = attribute_name
+                    raise ValidationError(
+                        self.get_error_message(),
+                        code="password_too_similar",
+                        params={"verbose_name": verbose_name},
+                    )